@@ -0,0 +1,83 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SUBCOMMANDS = [
+    ["version"],
+    ["clone", "--help"],
+    ["profile", "--help"],
+    ["profile", "ls"],
+    ["config", "--help"],
+    # Fast paths, which don't load the CLI.
+    ["env", "work"],
+    ["exec", "work", "true"],
+    ["query", "profiles"],
+    ["query", "resolve", "git@github.com:acme/api.git"],
+    # Commands which would do real work are timed up to their help text.
+    ["check", "--help"],
+    ["repos", "ls"],
+    ["stats"],
+    ["maintain", "--help"],
+    ["watch", "--help"],
+    ["hook", "--help"],
+    ["bundle", "create", "--help"],
+    ["worktree", "add", "--help"],
+]
+
+
+@pytest.fixture
+def cli_home(home):
+    """
+    A HOME with one profile, 'work', where a GitProf subprocess looks for its config.
+    """
+    config_dir = home / ".config" / "gitprof"
+    config_dir.mkdir(parents=True)
+    profile = {
+        "name": "work",
+        "ssh_key": str(home / ".ssh" / "id_work"),
+        "git_name": "User",
+        "git_email": "user@example.com",
+        "service": "GitHub",
+        "match": ["github.com/acme"],
+    }
+    (config_dir / "config.json").write_text(json.dumps({"profiles": [profile]}))
+    return home
+
+
+@pytest.mark.parametrize("args", SUBCOMMANDS, ids=lambda a: " ".join(a))
+def bench_cli_startup(benchmark, cli_home, args):
+    command = [sys.executable, "-m", "gitprof", *args]
+    benchmark.pedantic(
+        subprocess.run,
+        args=(command,),
+        # Runs from any directory, not only the repository root.
+        kwargs={"stdout": subprocess.DEVNULL, "check": True, "cwd": REPO_ROOT},
+        rounds=10,
+        warmup_rounds=1,
+    )
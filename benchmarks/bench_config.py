@@ -0,0 +1,47 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import pytest
+
+from gitprof.files import Config
+
+PROFILE_COUNTS = [10, 1000, 10000]
+
+
+@pytest.mark.parametrize("count", PROFILE_COUNTS)
+def bench_config_load(benchmark, make_config, count):
+    make_config(count)
+    benchmark(Config)
+
+
+@pytest.mark.parametrize("count", PROFILE_COUNTS)
+def bench_config_save(benchmark, make_config, count):
+    make_config(count)
+    benchmark(Config().save)
+
+
+@pytest.mark.parametrize("count", PROFILE_COUNTS)
+def bench_config_lookup(benchmark, make_config, count):
+    make_config(count)
+    config = Config()
+    profile = benchmark(config.get_profile, f"profile-{count - 1}")
+
+    assert profile is not None
@@ -0,0 +1,47 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import itertools
+
+from gitprof import command_utils, ssh
+from gitprof.cli.clone import do_clone
+from gitprof.files import Profile
+
+
+def bench_set_git_configs(benchmark, home, make_repo, monkeypatch, tmp_path):
+    dest = tmp_path / "repo"
+    do_clone(ssh.get_ssh_command("key"), make_repo(1, 1), str(dest))
+    monkeypatch.chdir(dest)
+
+    profile = Profile("bench", "key", git_name="Bench", git_email="bench@example.com")
+    benchmark(command_utils.set_git_configs, profile)
+
+
+def bench_do_clone(benchmark, home, make_repo, repo_size, tmp_path):
+    url = make_repo(*repo_size)
+    ssh_command = ssh.get_ssh_command("key")
+    counter = itertools.count()
+
+    def setup():
+        return (ssh_command, url, str(tmp_path / f"clone-{next(counter)}")), {}
+
+    benchmark.extra_info["repo_files"], benchmark.extra_info["repo_commits"] = repo_size
+    benchmark.pedantic(do_clone, setup=setup, rounds=5)
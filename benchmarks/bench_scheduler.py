@@ -0,0 +1,67 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import asyncio
+from collections import Counter
+
+import pytest
+
+from gitprof import process
+from gitprof.scheduler import Scheduler
+
+HOST_COUNTS = [1, 4, 16]
+
+
+def _simulate(jobs, per_host, sizes, duration):
+    """
+    Schedules simulated jobs (`sizes[host]` each, sleeping for `duration`), returning
+    the results and the most jobs which ran on each host at once.
+    """
+    items = [(host, i) for host, size in sizes.items() for i in range(size)]
+    running, peak = Counter(), Counter()
+
+    async def job(item):
+        host = item[0]
+        running[host] += 1
+        peak[host] = max(peak[host], running[host])
+        await asyncio.sleep(duration)
+        running[host] -= 1
+        return item
+
+    scheduler = Scheduler(jobs, per_host)
+    results = process.run_sync(scheduler.map(job, items, key=lambda item: (item[0], None)))
+    assert results == items
+
+    return results, peak
+
+
+@pytest.mark.parametrize("hosts", HOST_COUNTS)
+def bench_scheduler_overhead(benchmark, hosts):
+    sizes = {f"host-{h}": 2000 // hosts for h in range(hosts)}
+    benchmark(_simulate, 16, 8, sizes, 0)
+
+
+def bench_scheduler_fairness(benchmark):
+    sizes = {"big.example.com": 60, "small.example.com": 6}
+    _, peak = benchmark.pedantic(_simulate, args=(8, 4, sizes, 0.002), rounds=5)
+
+    assert peak["big.example.com"] <= 4
+    assert peak["small.example.com"] == 4
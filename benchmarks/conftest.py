@@ -0,0 +1,188 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Fixtures for the benchmark suite.
+
+Every benchmark runs against a temporary HOME, so the real GitProf config and
+`~/.ssh` directory are never read or modified.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+_home = tempfile.mkdtemp(prefix="gitprof-bench-home-")
+os.environ["HOME"] = _home
+os.environ["USERPROFILE"] = _home
+os.environ.update(
+    GIT_AUTHOR_NAME="Bench",
+    GIT_AUTHOR_EMAIL="bench@example.com",
+    GIT_COMMITTER_NAME="Bench",
+    GIT_COMMITTER_EMAIL="bench@example.com",
+    GIT_CONFIG_NOSYSTEM="1",
+)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gitprof import agent, completion, daemon, files, hooks  # noqa: E402
+from gitprof import maintenance, metrics, repos, ssh  # noqa: E402
+
+# Modules which keep paths under GitProf's config and cache directories.
+_PATH_MODULES = [agent, completion, daemon, files, hooks, maintenance, metrics, repos, ssh]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--repo-files",
+        type=int,
+        default=200,
+        help="Number of files in the generated repository used by clone benchmarks",
+    )
+    parser.addoption(
+        "--repo-commits",
+        type=int,
+        default=20,
+        help="Number of commits in the generated repository used by clone benchmarks",
+    )
+
+
+def _git(*args, cwd=None):
+    subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """
+    Points GitProf's config, cache and SSH directories at an empty temporary HOME.
+    """
+    config_dir = tmp_path / "config"
+    cache_dir = tmp_path / "cache"
+    ssh_dir = tmp_path / ".ssh"
+    for path in (config_dir, cache_dir, ssh_dir):
+        path.mkdir()
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(ssh, "ssh_dir", str(ssh_dir))
+    # Modules copy these paths when they're imported, so each copy is redirected.
+    redirect = [(files.cache_dir, str(cache_dir)), (files.config_dir, str(config_dir))]
+    for module in _PATH_MODULES:
+        for name, value in list(vars(module).items()):
+            if not isinstance(value, str):
+                continue
+            for old, new in redirect:
+                if value == old or value.startswith(old + os.sep):
+                    monkeypatch.setattr(module, name, new + value[len(old) :])
+                    break
+
+    return tmp_path
+
+
+@pytest.fixture
+def make_config(home):
+    """
+    Writes a config file containing `count` generated profiles.
+    """
+
+    def factory(count: int) -> str:
+        profiles = [
+            {
+                "name": f"profile-{i}",
+                "ssh_key": f"{ssh.ssh_dir}/key-{i}",
+                "git_name": f"User {i}",
+                "git_email": f"user{i}@example.com",
+                "service": "GitHub",
+            }
+            for i in range(count)
+        ]
+
+        with open(files.config_file, "w") as f:
+            json.dump({"profiles": profiles}, f, indent=4)
+
+        return files.config_file
+
+    return factory
+
+
+@pytest.fixture
+def make_ssh_dir(home):
+    """
+    Fills the temporary `~/.ssh` with `count` private/public key pairs.
+    """
+
+    def factory(count: int) -> str:
+        for i in range(count):
+            for name in (f"id_bench_{i:05d}", f"id_bench_{i:05d}.pub"):
+                with open(os.path.join(ssh.ssh_dir, name), "w") as f:
+                    f.write("key\n")
+
+        return ssh.ssh_dir
+
+    return factory
+
+
+@pytest.fixture(scope="session")
+def make_repo(tmp_path_factory):
+    """
+    Creates (and caches for the session) a local repository with the given number
+    of files and commits, returning its `file://` URL.
+    """
+    cache = {}
+
+    def factory(num_files: int, num_commits: int, file_size: int = 1024) -> str:
+        key = (num_files, num_commits, file_size)
+        if key in cache:
+            return cache[key]
+
+        repo = tmp_path_factory.mktemp(f"repo-{num_files}-{num_commits}")
+        _git("init", "-q", str(repo))
+
+        for commit in range(num_commits):
+            for i in range(num_files):
+                if commit and i % num_commits != commit:
+                    continue
+
+                with open(repo / f"file-{i}.txt", "wb") as f:
+                    f.write(os.urandom(file_size // 2).hex().encode())
+
+            _git("add", "-A", cwd=repo)
+            _git("commit", "-q", "-m", f"Commit {commit}", cwd=repo)
+
+        cache[key] = repo.as_uri()
+        return cache[key]
+
+    return factory
+
+
+@pytest.fixture
+def repo_size(request):
+    return request.config.getoption("--repo-files"), request.config.getoption(
+        "--repo-commits"
+    )
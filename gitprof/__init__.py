@@ -20,8 +20,7 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 import os
-
-from gitprof.cli import root
+import sys
 
 __version__ = "1.1.1"
 
@@ -34,4 +33,20 @@ def init():
     """
     Entry-point when gitprof is called as a standalone executable.
     """
+    # Commands run by scripts and editors skip loading the CLI.
+    if sys.argv[1:2] in (["env"], ["exec"]):
+        from gitprof.env import main
+    elif sys.argv[1:2] == ["query"]:
+        from gitprof.daemon import main
+    elif sys.argv[1:2] == ["__complete"]:
+        from gitprof.completion import main
+    else:
+        main = None
+
+    code = main(sys.argv[1:]) if main else None
+    if code is not None:
+        sys.exit(code)
+
+    from gitprof.cli import root
+
     root()
@@ -0,0 +1,195 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Management of a dedicated ssh-agent, so that passphrase-protected keys are unlocked
+once and then reused by every Git operation in a bulk run.
+"""
+import os
+import re
+from typing import Dict, List, Optional
+
+from gitprof import files
+from gitprof import process
+from gitprof import ssh
+from gitprof import timings
+from gitprof.exceptions import GitProfError
+
+agent_socket = os.path.join(files.cache_dir, "agent.sock")
+agent_pid_file = os.path.join(files.cache_dir, "agent.pid")
+
+_loaded_keys: Dict[str, bool] = {}
+
+
+class AgentError(GitProfError):
+    pass
+
+
+def _env(socket: str = None) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["SSH_AUTH_SOCK"] = socket or agent_socket
+    return env
+
+
+def validate_lifetime(lifetime: str) -> str:
+    """
+    Checks a key lifetime in ssh-add's format, e.g. '3600', '30m', '8h' or '1d12h'.
+    """
+    if not re.match(r"^(\d+[sSmMhHdDwW]?)+$", lifetime or ""):
+        raise AgentError(f"Invalid lifetime '{lifetime}'. Use a value such as '30m' or '8h'.")
+
+    return lifetime
+
+
+def is_running(socket: str = None) -> bool:
+    socket = socket or agent_socket
+    if not os.path.exists(socket):
+        return False
+
+    result = process.run(["ssh-add", "-l"], env=_env(socket), stdout=process.DEVNULL, timeout=10)
+
+    # ssh-add exits with 2 when it can't talk to an agent.
+    return result.returncode in (0, 1) and not result.timed_out
+
+
+def start() -> str:
+    """
+    Starts GitProf's ssh-agent if it isn't already running, returning its socket.
+    """
+    if is_running():
+        return agent_socket
+
+    if os.path.exists(agent_socket):
+        os.remove(agent_socket)
+
+    result = process.run(["ssh-agent", "-s", "-a", agent_socket], stderr=process.STDOUT, timeout=10)
+
+    pid = re.findall(r"SSH_AGENT_PID=(\d+)", result.stdout)
+    if not result.ok or not pid:
+        raise AgentError(f"Failed to start ssh-agent: {result.stdout.strip()}")
+
+    with open(agent_pid_file, "w") as f:
+        f.write(pid[0])
+
+    return agent_socket
+
+
+def stop() -> bool:
+    """
+    Stops GitProf's ssh-agent. Returns False if it wasn't running.
+    """
+    if not os.path.exists(agent_pid_file):
+        return False
+
+    with open(agent_pid_file, "r") as f:
+        pid = f.read().strip()
+
+    # After a reboot or crash the pid may belong to another process by now, so only
+    # kill it if our agent still answers on its socket. Otherwise the files are stale.
+    ok = False
+    if pid.isdigit() and is_running():
+        env = _env()
+        env["SSH_AGENT_PID"] = pid
+        result = process.run(
+            ["ssh-agent", "-k"], env=env, stdout=process.DEVNULL, stderr=process.DEVNULL, timeout=10
+        )
+        ok = result.ok
+
+    for path in (agent_pid_file, agent_socket):
+        if os.path.exists(path):
+            os.remove(path)
+
+    _loaded_keys.clear()
+    return ok
+
+
+def load_key(ssh_key: str, lifetime: str = None) -> str:
+    """
+    Adds a key to GitProf's ssh-agent, starting the agent if necessary. ssh-add asks
+    for the key's passphrase on the terminal if it has one.
+    """
+    command = ["ssh-add"]
+
+    if lifetime:
+        command += ["-t", validate_lifetime(lifetime)]
+
+    socket = start()
+
+    command.append(ssh.fully_normalise_path(ssh_key))
+
+    result = process.run(
+        command,
+        env=_env(socket),
+        stdin=process.INHERIT,
+        stdout=process.INHERIT,
+        stderr=process.INHERIT,
+    )
+
+    if not result.ok:
+        raise AgentError(f"Failed to add '{ssh_key}' to the agent.")
+
+    _loaded_keys.clear()
+    return socket
+
+
+def list_keys(socket: str = None) -> List[str]:
+    if not is_running(socket):
+        return []
+
+    result = process.run(["ssh-add", "-l"], env=_env(socket), stderr=process.DEVNULL, timeout=10)
+
+    return [line for line in result.stdout.splitlines() if line.strip()] if result.ok else []
+
+
+def _fingerprint(ssh_key: str) -> Optional[str]:
+    key = ssh.fully_normalise_path(ssh_key)
+    public = key if key.endswith(".pub") else f"{key}.pub"
+
+    result = process.run(
+        ["ssh-keygen", "-l", "-f", public if os.path.exists(public) else key],
+        stderr=process.DEVNULL,
+        timeout=10,
+    )
+
+    parts = result.stdout.split()
+    return parts[1] if result.ok and len(parts) > 1 else None
+
+
+def has_key(ssh_key: str) -> bool:
+    """
+    Returns True if GitProf's agent is running and holds the key. The answer is cached
+    for the rest of the process, so bulk operations only check each key once.
+    """
+    if ssh_key not in _loaded_keys:
+        # Most users never start the agent, so don't run ssh-keygen unless it has keys.
+        with timings.span("ssh-agent lookup"):
+            keys = list_keys() if os.path.exists(agent_socket) else []
+            fingerprint = _fingerprint(ssh_key) if keys else None
+            _loaded_keys[ssh_key] = bool(fingerprint) and any(fingerprint in line for line in keys)
+
+    return _loaded_keys[ssh_key]
+
+
+def get_socket_for(ssh_key: str) -> Optional[str]:
+    """
+    Returns GitProf's agent socket if the agent holds the key, otherwise None.
+    """
+    return agent_socket if has_key(ssh_key) else None
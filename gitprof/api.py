@@ -0,0 +1,157 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Python API for GitProf.
+
+Unlike the CLI, these functions never print, prompt or exit: failures are raised as
+subclasses of `gitprof.exceptions.GitProfError` and results are returned as objects.
+
+Each feature lives in its own module (`profiles`, `keys`, `cloning`, `bundles`,
+`probes`, `maintenance`, `worktrees` and `retry`); this module collects their public
+functions and result types in one place.
+"""
+import os
+from typing import Iterable, List
+
+from gitprof.bundles import BundleResult, create_bundles
+from gitprof.cloning import (
+    CloneResult,
+    clone,
+    find_seed_bundle,
+    get_clone_dest,
+    get_seed_path,
+    is_partial_clone,
+    resume_clone_async,
+    run_clone,
+    run_clone_async,
+    seed_from_bundle_async,
+)
+from gitprof.files import Config
+from gitprof.keys import KeyResult, create_ssh_keys
+from gitprof.maintenance import MaintainResult, maintain
+from gitprof.probes import (
+    PROBE_DENIED,
+    PROBE_ERROR,
+    PROBE_LOCKED,
+    PROBE_NOT_FOUND,
+    PROBE_OK,
+    PROBE_TIMEOUT,
+    PROBE_UNREACHABLE,
+    ProbeResult,
+    check_access,
+    classify_probe,
+)
+from gitprof.profiles import (
+    ApplyResult,
+    ProfileLike,
+    apply_profile,
+    create_profile,
+    delete_profile,
+    get_git_config_values,
+    get_profile,
+    resolve_profile,
+    validate_profile,
+)
+from gitprof.repos import DEFAULT_DEPTH, RepoEntry, RepoIndex, record_repos
+from gitprof.retry import TRANSIENT_ERRORS, RetryPolicy, is_transient_failure
+from gitprof.worktrees import add_worktree
+
+__all__ = [
+    "ApplyResult",
+    "BundleResult",
+    "CloneResult",
+    "KeyResult",
+    "MaintainResult",
+    "PROBE_DENIED",
+    "PROBE_ERROR",
+    "PROBE_LOCKED",
+    "PROBE_NOT_FOUND",
+    "PROBE_OK",
+    "PROBE_TIMEOUT",
+    "PROBE_UNREACHABLE",
+    "ProbeResult",
+    "ProfileLike",
+    "RetryPolicy",
+    "TRANSIENT_ERRORS",
+    "add_worktree",
+    "apply_profile",
+    "check_access",
+    "classify_probe",
+    "clone",
+    "create_bundles",
+    "create_profile",
+    "create_ssh_keys",
+    "delete_profile",
+    "find_repos",
+    "find_seed_bundle",
+    "get_clone_dest",
+    "get_git_config_values",
+    "get_profile",
+    "get_seed_path",
+    "is_partial_clone",
+    "is_transient_failure",
+    "list_repos",
+    "load_config",
+    "maintain",
+    "record_repos",
+    "resolve_profile",
+    "resume_clone_async",
+    "run_clone",
+    "run_clone_async",
+    "seed_from_bundle_async",
+    "validate_profile",
+]
+
+
+def load_config() -> Config:
+    return Config()
+
+
+def list_repos(profile: str = None, refresh: bool = False) -> List[RepoEntry]:
+    """
+    Returns the indexed repositories, optionally only those using the given profile.
+    """
+    index = RepoIndex()
+    if refresh:
+        index.refresh()
+        index.save()
+
+    return index.find(profile)
+
+
+def find_repos(roots: Iterable[str], depth: int = DEFAULT_DEPTH) -> List[str]:
+    """
+    Returns the repositories up to `depth` levels below each root, using the repository
+    index's cached directory listings where they're still current. The index itself
+    isn't changed.
+    """
+    roots = [os.path.abspath(r) for r in roots]
+    index = RepoIndex()
+    for root in roots:
+        index.add_root(root, depth)
+    index.refresh(roots)
+
+    return [
+        e.path
+        for e in index.find()
+        if any(e.path == r or e.path.startswith(r.rstrip(os.sep) + os.sep) for r in roots)
+    ]
@@ -0,0 +1,146 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Seed bundles, which clones take most of their objects from (see `cloning.clone`).
+"""
+import os
+import shutil
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+from gitprof import agent
+from gitprof import gitconfig
+from gitprof import process
+from gitprof import routing
+from gitprof import scheduler
+from gitprof import ssh
+from gitprof.cloning import get_seed_path
+from gitprof.exceptions import NotARepositoryError, ProfileNotFoundError
+from gitprof.files import Config
+from gitprof.profiles import ProfileLike, get_profile, validate_profile
+from gitprof.retry import is_transient_failure
+
+
+@dataclass
+class BundleResult:
+    source: str
+    url: Optional[str]
+    path: Optional[str]
+    returncode: int
+    duration: float
+    output: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+def create_bundles(
+    sources: Iterable[str],
+    out_dir: str,
+    profile: ProfileLike = None,
+    jobs: int = 1,
+    callback: Callable[[BundleResult], None] = None,
+    config: Config = None,
+    per_host: int = None,
+) -> List[BundleResult]:
+    """
+    Writes a seed bundle with the branches and tags of each source to `out_dir`, laid
+    out for `cloning.clone(seed=out_dir)` (see `cloning.get_seed_path`). Existing bundles are replaced
+    atomically, so clones can keep reading them while they're refreshed.
+
+    A source is either a local repository, bundled as it is, or a URL, which is cloned
+    (bare, into a temporary directory) with `profile` or the profile its rules select.
+    """
+    config = config or Config()
+    sources = list(sources)
+
+    plan = []
+    for source in sources:
+        if os.path.isdir(source):
+            if not gitconfig.find_git_dir(source):
+                raise NotARepositoryError(source)
+            url = gitconfig.read_repo_config(source).get("remote.origin.url")
+            plan.append((source, url, None))
+            continue
+
+        p = get_profile(profile, config) if profile else config.resolve_profile(source)
+        if not p:
+            raise ProfileNotFoundError(None, f"No profile rule matches '{source}'.")
+        validate_profile(p)
+        ssh_command = ssh.get_ssh_command(p.ssh_key, agent.get_socket_for(p.ssh_key))
+        plan.append((source, source, ssh_command))
+
+    async def do_one(item) -> BundleResult:
+        source, url, ssh_command = item
+        result = BundleResult(source, url, None, returncode=0, duration=0.0)
+        if url:
+            await make_bundle(result, ssh_command)
+        else:
+            result.returncode = 1
+            result.output = f"'{source}' has no 'origin' remote to name its bundle after.\n"
+
+        if callback:
+            callback(result)
+
+        return result
+
+    async def make_bundle(result: BundleResult, ssh_command: Optional[str]) -> None:
+        source, url = result.source, result.url
+        path = os.path.abspath(get_seed_path(out_dir, url))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        repo, work_dir = source, None
+
+        async def step(command: List[str], **kwargs) -> bool:
+            done = await process.run_async(command, stderr=process.STDOUT, **kwargs)
+            result.returncode = done.returncode
+            result.duration += done.duration
+            result.output += done.stdout
+            return done.ok
+
+        try:
+            if ssh_command:
+                work_dir = f"{path}.{os.getpid()}.git"
+                repo = work_dir
+                env = dict(os.environ, GIT_SSH_COMMAND=ssh_command)
+                if not await step(["git", "clone", "--bare", url, work_dir], env=env):
+                    return
+
+            bundle = ["git", "-C", repo, "bundle", "create", temp, "--branches", "--tags"]
+            if await step(bundle):
+                os.replace(temp, path)
+                result.path = path
+        finally:
+            if work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    return scheduler.run_scheduled(
+        do_one,
+        plan,
+        key=lambda item: (routing.get_host(item[1] or item[0]), None),
+        failed=lambda r: not r.ok and is_transient_failure(r.output),
+        jobs=jobs,
+        per_host=per_host,
+    )
@@ -21,11 +21,32 @@
 #  SOFTWARE.
 import click
 import gitprof
+from gitprof import timings
 
 
 @click.group()
-def root():
-    pass
+@click.option(
+    "--timings",
+    "show_timings",
+    is_flag=True,
+    help=f"Print how long each step took. Set {timings.TRACE_ENV_VAR}=<file> "
+    f"to also write a Chrome trace-event file.",
+)
+@click.pass_context
+def root(ctx: click.Context, show_timings: bool):
+    traced = timings.enable_from_env()
+    if not (show_timings or traced):
+        return
+
+    timings.enable()
+    command = timings.span(f"gitprof {ctx.invoked_subcommand}", category="command")
+    command.begin()
+
+    def finish():
+        command.end()
+        timings.report(summary=show_timings)
+
+    ctx.call_on_close(finish)
 
 
 @root.command("version", help="Show GitProf version")
@@ -36,7 +57,35 @@ def version():
 from gitprof.cli.clone import clone
 from gitprof.cli.profile import profile
 from gitprof.cli.config import config
+from gitprof.cli.agent import agent
+from gitprof.cli.watch import watch
+from gitprof.cli.repos import repos
+from gitprof.cli.stats import stats
+from gitprof.cli.key import key
+from gitprof.cli.env import print_env, exec_command
+from gitprof.cli.daemon import daemon, query
+from gitprof.cli.hook import hook
+from gitprof.cli.completion import completion
+from gitprof.cli.worktree import worktree
+from gitprof.cli.bundle import bundle
+from gitprof.cli.check import check
+from gitprof.cli.maintain import maintain
 
 root.add_command(clone)
 root.add_command(profile)
 root.add_command(config)
+root.add_command(agent)
+root.add_command(watch)
+root.add_command(repos)
+root.add_command(stats)
+root.add_command(key)
+root.add_command(print_env)
+root.add_command(exec_command)
+root.add_command(daemon)
+root.add_command(query)
+root.add_command(hook)
+root.add_command(completion)
+root.add_command(worktree)
+root.add_command(bundle)
+root.add_command(check)
+root.add_command(maintain)
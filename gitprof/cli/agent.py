@@ -0,0 +1,76 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import sys
+
+import click
+
+from gitprof import agent as ssh_agent
+from gitprof import api
+from gitprof import os_utils
+from gitprof.cli import root
+from gitprof.exceptions import GitProfError
+
+
+@root.group("agent", help="Unlock profile SSH keys once for bulk operations")
+def agent():
+    if os_utils.is_windows():
+        click.echo("Error: the GitProf ssh-agent isn't supported on Windows.", err=True)
+        sys.exit(1)
+
+
+@agent.command("load", help="Add a profile's SSH key to GitProf's ssh-agent")
+@click.argument("profile")
+@click.option(
+    "-t",
+    "--lifetime",
+    help="How long the agent keeps the key, e.g. '30m' or '8h' (default: until stopped)",
+)
+def load(profile: str, lifetime: str):
+    try:
+        profile = api.get_profile(profile)
+        socket = ssh_agent.load_key(profile.ssh_key, lifetime=lifetime)
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    click.echo(
+        f"Loaded the SSH key for profile '{profile.name}'. GitProf's bulk commands will use it automatically.\n"
+        f"To use the agent in other commands, set SSH_AUTH_SOCK={socket}"
+    )
+
+
+@agent.command("ls", help="List the keys held by GitProf's ssh-agent")
+def list_keys():
+    if not ssh_agent.is_running():
+        return click.echo("GitProf's ssh-agent is not running.")
+
+    keys = ssh_agent.list_keys()
+    click.echo(f"ssh-agent socket: {ssh_agent.agent_socket}")
+    click.echo("\n".join(keys) if keys else "The agent holds no keys.")
+
+
+@agent.command("stop", help="Stop GitProf's ssh-agent, forgetting all keys")
+def stop():
+    if ssh_agent.stop():
+        click.echo("Stopped GitProf's ssh-agent.")
+    else:
+        click.echo("GitProf's ssh-agent is not running.")
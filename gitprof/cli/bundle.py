@@ -0,0 +1,97 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import sys
+from typing import Tuple
+
+import click
+
+from gitprof import api
+from gitprof.api import BundleResult
+from gitprof.cli import output
+from gitprof.cli import root
+from gitprof.exceptions import GitProfError
+
+
+@root.group("bundle", help="Make Git bundles to seed clones from")
+def bundle():
+    pass
+
+
+RECORD_FIELDS = ("source", "url", "path", "ok", "duration", "error")
+
+
+def _print_result(result: BundleResult) -> None:
+    if result.ok:
+        click.echo(f"Wrote '{result.path}'.")
+        return
+
+    if result.output:
+        click.echo(result.output.rstrip(), err=True)
+    click.echo(f"Error: failed to bundle '{result.source}'.", err=True)
+
+
+@bundle.command(
+    "create",
+    help="Bundle local repositories or remote URLs for 'gitprof clone --seed-from'",
+)
+@click.argument("sources", nargs=-1, required=True)
+@click.option(
+    "-o",
+    "--output-dir",
+    default=".",
+    show_default=True,
+    type=click.Path(file_okay=False),
+    help="Where to write the bundles",
+)
+@click.option("-p", "--profile", help="Which profile to clone URLs with")
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="How many repositories to bundle at the same time",
+)
+@output.format_option
+def create_bundles(
+    sources: Tuple[str], output_dir: str, profile: str, jobs: int, output_format: str
+):
+    writer = output.RecordWriter(output_format, RECORD_FIELDS)
+
+    def on_result(result: BundleResult) -> None:
+        if writer.enabled:
+            writer.write(output.to_record(result, RECORD_FIELDS))
+        else:
+            _print_result(result)
+
+    try:
+        with writer:
+            results = api.create_bundles(
+                sources, output_dir, profile=profile, jobs=jobs, callback=on_result
+            )
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        click.echo(f"\n{len(failed)} of {len(results)} bundles failed.", err=True)
+        sys.exit(1)
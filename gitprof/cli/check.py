@@ -0,0 +1,174 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import functools
+import sys
+from collections import defaultdict
+from typing import List, Tuple
+
+import click
+
+from gitprof import api
+from gitprof import command_utils
+from gitprof.api import ProbeResult
+from gitprof.cli import output
+from gitprof.cli import root
+from gitprof.exceptions import GitProfError
+from gitprof.files import Config
+from gitprof.scheduler import Scheduler
+from gitprof.ux import StatusLine
+
+
+def read_url_file(path: str) -> List[str]:
+    """
+    Reads URLs from a file ('-' for stdin), one per line, skipping blank lines and
+    '#' comments.
+    """
+    with click.open_file(path, "r") as f:
+        lines = [line.strip() for line in f]
+
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def format_progress(scheduler: Scheduler) -> str:
+    """
+    Summarises a scheduler's progress, with the number of jobs running per host.
+    """
+    total = scheduler.done + scheduler.in_flight + scheduler.queued
+    hosts = ", ".join(
+        f"{host} {h.in_flight}/{h.limit}" + (" (resting)" if scheduler.is_resting(host) else "")
+        for host, h in scheduler.hosts.items()
+        if h.in_flight or h.queued
+    )
+    return (
+        f"{scheduler.done}/{total} done, {scheduler.in_flight} running, "
+        f"{scheduler.queued} queued" + (f" | {hosts}" if hosts else "")
+    )
+
+
+RECORD_FIELDS = ("url", "profile", "host", "status", "duration", "error")
+
+
+def print_report(results: List[ProbeResult], verbose: bool = False, err: bool = False) -> None:
+    """
+    Prints a summary per host, listing the repositories which failed.
+    """
+    echo = functools.partial(click.echo, err=err)
+    by_host = defaultdict(list)
+    for r in results:
+        by_host[r.host].append(r)
+
+    for host, host_results in sorted(by_host.items()):
+        failed = [r for r in host_results if not r.ok]
+        summary = f"{len(host_results) - len(failed)} ok"
+        if failed:
+            summary += f", {len(failed)} failed"
+        echo(f"{host}: {summary}")
+
+        for r in failed:
+            echo(f"  {r.status:<12} {r.url} (profile '{r.profile}')")
+            if verbose and r.output:
+                echo("\n".join(f"      {line}".rstrip() for line in r.output.strip().splitlines()))
+
+    if any(r.status == api.PROBE_LOCKED for r in results):
+        echo(
+            "Keys with a passphrase can't be checked until they're loaded with "
+            "'gitprof agent load'."
+        )
+
+
+@root.command("check", help="Check that repositories can be reached before cloning them")
+@click.argument("urls", nargs=-1)
+@click.option("-p", "--profile", help="Which profile to check with")
+@click.option(
+    "-f",
+    "--from-file",
+    help="Read URLs from a file ('-' for stdin), one per line",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=16,
+    show_default=True,
+    help="How many repositories to check at the same time",
+)
+@click.option(
+    "-t",
+    "--timeout",
+    type=click.FloatRange(min=1),
+    default=30.0,
+    show_default=True,
+    help="Seconds to wait for each repository",
+)
+@click.option(
+    "--per-host",
+    type=click.IntRange(min=1),
+    help="How many repositories on the same host to check at the same time [default: 8]",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Show Git's error messages")
+@output.format_option
+def check(
+    urls: Tuple[str],
+    profile: str,
+    from_file: str,
+    jobs: int,
+    timeout: float,
+    per_host: int,
+    verbose: bool,
+    output_format: str,
+):
+    urls = list(urls) + (read_url_file(from_file) if from_file else [])
+    if not urls:
+        click.echo("Error: give some URLs to check, or --from-file.", err=True)
+        sys.exit(1)
+
+    fallback = None
+    if not profile and not all(Config().resolve_profile(u) for u in urls):
+        fallback = command_utils.choose_profile_interactive(
+            None, title="Choose a profile for repositories without a matching rule"
+        )
+
+    writer = output.RecordWriter(output_format, RECORD_FIELDS)
+    status = StatusLine(enabled=not writer.enabled)
+    try:
+        with writer:
+            results = api.check_access(
+                urls,
+                profile=profile,
+                fallback=fallback,
+                jobs=jobs,
+                timeout=timeout,
+                per_host=per_host,
+                callback=lambda r: writer.write(output.to_record(r, RECORD_FIELDS)),
+                progress=lambda s: status.update(format_progress(s)),
+            )
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    finally:
+        status.clear()
+
+    if not writer.enabled:
+        print_report(results, verbose)
+
+    if not all(r.ok for r in results):
+        sys.exit(1)
@@ -19,30 +19,20 @@
 #  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
-import os
-import re
-import subprocess
 import sys
+from typing import Tuple
 
 import click
 
+from gitprof import api
 from gitprof import command_utils
-from gitprof import os_utils
-from gitprof import ssh
-from gitprof import ux
+from gitprof.api import CloneResult
+from gitprof.cli import output
 from gitprof.cli import root
-from gitprof.files import Config, Profile
-from gitprof.vcs import services
-
-
-def _create_clone_command(ssh_command, repo, dest) -> str:
-    if os_utils.is_windows():
-        return (
-            f"powershell -c "
-            + f'"git -c core.sshCommand="""{ssh_command}""" clone {repo}" "{dest}"'
-        )
-
-    return f'git -c core.sshCommand="{ssh_command}" clone "{repo}" "{dest}"'
+from gitprof.cli.check import format_progress, print_report
+from gitprof.exceptions import GitProfError
+from gitprof.files import Config
+from gitprof.ux import StatusLine
 
 
 def do_clone(
@@ -54,76 +44,201 @@ def do_clone(
     if add_to_known_hosts:
         ssh_command = f"{ssh_command} -o StrictHostKeyChecking=no"
 
-    cmd = _create_clone_command(ssh_command, repo, dest)
-
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        shell=True,
-    )
-
     print()
+    result = api.run_clone(ssh_command, repo, dest, stream=True)
 
-    for c in iter(lambda: process.stdout.read(1), b""):
-        sys.stdout.buffer.write(c)
-
-    process.wait()
-    if process.returncode != 0:
+    if result.returncode != 0:
         print(
             f"\nError: clone failed. Please view the error message above for details."
         )
         sys.exit(1)
 
 
-@root.command("clone", help="Clone a Git repository")
-@click.argument("repo")
-@click.option("-p", "--profile", help="Which profile to clone the repo with")
-def clone(repo: str, profile: str):
-    profile: Profile = command_utils.choose_profile_interactive(
-        profile, title="Choose a profile to clone with"
-    )
+def _print_result(result: CloneResult, echo=click.echo) -> None:
+    if result.attempts > 1 or result.resumed:
+        resumed = ", resumed" if result.resumed else ""
+        echo(f"'{result.url}' took {result.attempts} attempts{resumed}.")
 
-    click.echo(f"Cloning '{repo}' with profile: {profile}")
-    profile: Profile = Config().get_profile(name=profile)
-
-    if not profile:
-        click.echo(
-            f"Profile '{profile}' appears to be missing. Have you created it?",
-            err=True,
+    if result.ok:
+        submodules = len(result.applied.submodules)
+        suffix = f" and {submodules} submodules" if submodules else ""
+        seeded = " (seeded from a bundle)" if result.seeded else ""
+        echo(
+            f"Finished setting up '{result.dest}'{suffix} with profile '{result.profile}'{seeded}."
         )
-        exit(1)
+        return
+
+    if result.output:
+        echo(result.output.rstrip(), err=True)
+    echo(f"Error: failed to clone '{result.url}'.", err=True)
+
+
+RECORD_FIELDS = (
+    "url",
+    "dest",
+    "profile",
+    "ok",
+    "returncode",
+    "duration",
+    "attempts",
+    "resumed",
+    "seeded",
+    "error",
+)
+
 
-    ssh_key = profile.ssh_key
-    if not ssh_key:
-        click.echo(f"Can't find SSH key for profile '{profile}'")
-        sys.exit(0)
+def _preflight(
+    repos: Tuple[str], profile: str, fallback: str, jobs: int, per_host: int, quiet: bool
+) -> None:
+    status = StatusLine(enabled=not quiet)
+    try:
+        probes = api.check_access(
+            repos,
+            profile=profile,
+            fallback=fallback,
+            jobs=jobs or 16,
+            multiplex=True,
+            per_host=per_host,
+            progress=lambda s: status.update(f"Checking access: {format_progress(s)}"),
+        )
+    finally:
+        status.clear()
 
-    if not (profile.git_name and profile.git_email):
+    # Locked keys will prompt for their passphrase while cloning, so they don't count.
+    failed = [p for p in probes if not p.ok and p.status != api.PROBE_LOCKED]
+    if failed:
+        print_report(probes, err=quiet)
         click.echo(
-            f"Warning: your Git name and/or email address are missing for this profile. You need to set them.",
+            f"\nError: {len(failed)} of {len(probes)} repositories can't be reached; "
+            f"nothing was cloned. Use --no-check to clone the others anyway.",
             err=True,
         )
-        exit(1)
-
-    ssh_key = ssh.fully_normalise_path(ssh_key)
-    if not os.path.exists(ssh_key):
-        print(f"Error: can't find your SSH key at '{ssh_key}'.")
         sys.exit(1)
 
-    dest = re.findall(r"^.*/(.*?)(?:\.git)?$", repo)[0]
-    ssh_command = ssh.get_ssh_command(ssh_key)
 
-    do_clone(ssh_command, repo, dest)
-    cwd = os.getcwd()
-
-    try:
-        os.chdir(dest)
-    except FileNotFoundError:
-        print(
-            f"Could not find your cloned repository. Please 'cd' into it and then use 'gitprof profile apply'."
+@root.command("clone", help="Clone one or more Git repositories")
+@click.argument("repos", nargs=-1, required=True)
+@click.option("-p", "--profile", help="Which profile to clone the repo with")
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="How many repositories (and submodules of each repository) to clone at the same time",
+)
+@click.option(
+    "--per-host",
+    type=click.IntRange(min=1),
+    help="How many repositories on the same host to clone at the same time [default: 8]",
+)
+@click.option(
+    "--recurse-submodules",
+    is_flag=True,
+    help="Also clone submodules with the profile's SSH key, and apply the profile to them",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    default=2,
+    show_default=True,
+    help="How many times to retry clones which fail with a network error",
+)
+@click.option(
+    "--retry-delay",
+    type=click.FloatRange(min=0),
+    default=2.0,
+    show_default=True,
+    help="Seconds to wait before the first retry; doubles after each attempt",
+)
+@click.option(
+    "--seed-from",
+    type=click.Path(exists=True),
+    help="A Git bundle, or a directory from 'gitprof bundle create', to copy most objects from",
+)
+@click.option(
+    "--check/--no-check",
+    default=None,
+    help="Check that every repository can be reached before cloning any "
+    "[default: on when cloning several repositories]",
+)
+@output.format_option
+def clone(
+    repos: Tuple[str],
+    profile: str,
+    jobs: int,
+    per_host: int,
+    recurse_submodules: bool,
+    retries: int,
+    retry_delay: float,
+    seed_from: str,
+    check: bool,
+    output_format: str,
+):
+    config = Config()
+    writer = output.RecordWriter(output_format, RECORD_FIELDS)
+    fallback = None
+
+    if not profile and len(repos) == 1:
+        profile = command_utils.choose_profile_interactive(
+            profile, title="Choose a profile to clone with", url=repos[0]
         )
+    elif not profile and not all(config.resolve_profile(r) for r in repos):
+        fallback = command_utils.choose_profile_interactive(
+            None, title="Choose a profile for repositories without a matching rule"
+        )
+
+    if not writer.enabled:
+        for repo in repos:
+            chosen = profile or getattr(config.resolve_profile(repo), "name", fallback)
+            click.echo(f"Cloning '{repo}' with profile: {chosen}")
+
+    if check is None:
+        check = len(repos) > 1
+
+    # Git's own progress output can't be mixed into machine-readable output.
+    stream = (jobs or 1) <= 1 and not writer.enabled
+    progress = StatusLine(enabled=not stream and not writer.enabled)
 
-    command_utils.set_git_configs(profile)
+    def on_result(result: CloneResult) -> None:
+        if writer.enabled:
+            writer.write(output.to_record(result, RECORD_FIELDS))
+        else:
+            _print_result(result, progress.echo)
 
-    print(f"Finished setting up your Git repository.")
-    os.chdir(cwd)
+    try:
+        if check:
+            _preflight(repos, profile, fallback, jobs, per_host, quiet=writer.enabled)
+
+        with writer:
+            results = api.clone(
+                repos,
+                profile=profile,
+                fallback=fallback,
+                jobs=jobs or 1,
+                stream=stream,
+                callback=on_result,
+                recurse_submodules=recurse_submodules,
+                submodule_jobs=jobs,
+                retry=api.RetryPolicy(attempts=retries + 1, backoff=retry_delay),
+                seed=seed_from,
+                multiplex=check,
+                per_host=per_host,
+                progress=lambda s: progress.update(format_progress(s)),
+            )
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    finally:
+        progress.clear()
+
+    retried = [r for r in results if r.attempts > 1 or r.resumed]
+    if retried and len(results) > 1 and not writer.enabled:
+        click.echo(f"\nRetried {len(retried)} of {len(results)} repositories:")
+        for r in retried:
+            status = "ok" if r.ok else "failed"
+            resumed = ", resumed" if r.resumed else ""
+            click.echo(f"  {r.url}: {r.attempts} attempts{resumed}, {status}")
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        click.echo(f"\n{len(failed)} of {len(results)} repositories failed to clone.", err=True)
+        sys.exit(1)
@@ -20,14 +20,17 @@
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
 import os
+import shlex
 import sys
 
 import click
 
 from gitprof import os_utils
+from gitprof import process
 from gitprof import ux
 from gitprof import files
 from gitprof.cli import root
+from gitprof.exceptions import GitProfError
 
 
 @root.group("config", help="Work with the config file")
@@ -42,16 +45,25 @@ def edit_config(editor: str):
         print(f"Config file does not exist.")
         sys.exit(0)
 
-    if editor:
-        return os.system(fr'"{editor}" {files.config_file}')
+    if not editor and os_utils.is_windows():
+        return os.startfile(files.config_file)
 
-    if os_utils.is_windows():
-        return os.system(f'start "" "{files.config_file}"')
+    if not editor:
+        editor = ux.get_simple_input(
+            question="Please enter the command for your text editor (e.g. 'vi')"
+        )
 
-    editor = ux.get_simple_input(
-        question="Please enter the command for your text editor (e.g. 'vi')"
-    )
-    return os.system(f'"{editor}" "{files.config_file}"')
+    command = [editor] if os.path.exists(editor) else shlex.split(editor)
+    try:
+        process.run(
+            command + [files.config_file],
+            stdin=process.INHERIT,
+            stdout=process.INHERIT,
+            stderr=process.INHERIT,
+        )
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
 
 
 @config.command("rm", help="Delete the config file")
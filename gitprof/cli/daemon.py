@@ -0,0 +1,100 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import json
+import os
+import signal
+import sys
+
+import click
+
+from gitprof import daemon as profile_daemon
+from gitprof import routing
+from gitprof.cli import root
+from gitprof.exceptions import GitProfError
+
+
+@root.group("daemon", help="Answer profile queries from editors and hooks without restarting GitProf")
+def daemon():
+    pass
+
+
+@daemon.command("start", help="Run the daemon in the foreground until stopped")
+def start():
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    try:
+        profile_daemon.serve(on_ready=lambda path: click.echo(f"Listening on '{path}'."))
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+@daemon.command("stop", help="Stop the running daemon")
+def stop():
+    response = profile_daemon.query({"op": "ping"})
+    if not response["ok"]:
+        return click.echo("The GitProf daemon is not running.")
+
+    os.kill(response["result"]["pid"], signal.SIGTERM)
+    click.echo("Stopped the GitProf daemon.")
+
+
+@daemon.command("status", help="Show whether the daemon is running")
+def status():
+    response = profile_daemon.query({"op": "ping"})
+    if response["ok"]:
+        click.echo(
+            f"Running (pid {response['result']['pid']}), listening on '{profile_daemon.daemon_socket}'."
+        )
+    else:
+        click.echo("The GitProf daemon is not running.")
+
+
+@root.command(
+    "query",
+    help="Ask the daemon (or GitProf directly, if it isn't running) for a profile, "
+    "e.g. 'gitprof query resolve [URL|PATH]', 'query env PROFILE', 'query profiles' "
+    "or 'query keys'. Prints JSON.",
+)
+@click.argument("op", type=click.Choice(["resolve", "env", "profiles", "keys"]))
+@click.argument("arg", required=False)
+def query(op: str, arg: str):
+    request = {"op": op}
+    if op == "env":
+        if not arg:
+            click.echo("Error: 'query env' needs a profile name.", err=True)
+            sys.exit(1)
+        request["profile"] = arg
+    elif op == "resolve":
+        arg = arg or os.getcwd()
+        url = routing.parse_url(arg) and not os.path.exists(arg)
+        # The daemon runs in another directory, so send it an absolute path.
+        request["url" if url else "path"] = arg if url else os.path.abspath(arg)
+
+    response = profile_daemon.query(request)
+    if not response["ok"]:
+        click.echo(f"Error: {response['error']}", err=True)
+        sys.exit(1)
+
+    click.echo(json.dumps(response["result"], indent=2))
@@ -0,0 +1,57 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import sys
+from typing import Tuple
+
+import click
+
+from gitprof import env
+from gitprof.cli import root
+from gitprof.exceptions import GitProfError
+
+# These commands are normally run by `gitprof.env.main` without loading the CLI; they're
+# defined here for `--help` and for unusual arguments.
+
+
+@root.command("env", help="Print shell exports which make Git use a profile, e.g. eval $(gitprof env work)")
+@click.argument("profile")
+def print_env(profile: str):
+    try:
+        click.echo(env.format_exports(env.load_profile_env(profile)), nl=False)
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
+@root.command(
+    "exec",
+    help="Run a command with Git using a profile, without changing any repository's config",
+    context_settings={"ignore_unknown_options": True, "allow_interspersed_args": False},
+)
+@click.argument("profile")
+@click.argument("command", nargs=-1, required=True, type=click.UNPROCESSED)
+def exec_command(profile: str, command: Tuple[str]):
+    try:
+        env.exec_with_env(env.load_profile_env(profile), list(command))
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
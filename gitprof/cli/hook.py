@@ -0,0 +1,68 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import sys
+
+import click
+
+from gitprof import hooks
+from gitprof.cli import root
+from gitprof.exceptions import GitProfError
+
+
+@root.group("hook", help="Stop commits and pushes made with the wrong profile")
+def hook():
+    pass
+
+
+@hook.command("install", help="Install pre-commit and pre-push hooks in the current repository")
+@click.option("--global", "is_global", is_flag=True, help="Install the hooks for all repositories")
+@click.option("--force", is_flag=True, help="Replace existing hooks")
+def install(is_global: bool, force: bool):
+    try:
+        written = hooks.install(is_global=is_global, force=force)
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    for path in written:
+        click.echo(f"Installed '{path}'.")
+
+    if is_global:
+        click.echo(
+            f"Set Git's global core.hooksPath to '{hooks.global_hooks_dir}'. "
+            f"Each repository's own hooks still run after GitProf's."
+        )
+
+
+@hook.command("uninstall", help="Remove GitProf's hooks from the current repository")
+@click.option("--global", "is_global", is_flag=True, help="Remove the hooks installed with --global")
+def uninstall(is_global: bool):
+    try:
+        removed = hooks.uninstall(is_global=is_global)
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    for path in removed:
+        click.echo(f"Removed '{path}'.")
+    if not removed:
+        click.echo("No GitProf hooks are installed.")
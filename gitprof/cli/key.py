@@ -0,0 +1,151 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import os
+import sys
+from typing import List
+
+import click
+
+from gitprof import api
+from gitprof.cli import output
+from gitprof.cli import root
+from gitprof.exceptions import GitProfError
+from gitprof.ssh import create_ssh_key
+
+
+@root.group("key", help="Manage SSH keys")
+def key():
+    pass
+
+
+def _read_batch(batch) -> List[str]:
+    names = (line.split("#", 1)[0].strip() for line in batch)
+    return [n for n in names if n]
+
+
+def _read_passphrase(env: str, fd: int) -> str:
+    if env and fd is not None:
+        click.echo("Error: use only one of --passphrase-env and --passphrase-fd.", err=True)
+        sys.exit(1)
+
+    if env:
+        if env not in os.environ:
+            click.echo(f"Error: the environment variable '{env}' isn't set.", err=True)
+            sys.exit(1)
+        return os.environ[env]
+
+    if fd is not None:
+        with os.fdopen(fd, "r") as f:
+            return f.read().rstrip("\r\n")
+
+    return ""
+
+
+RECORD_FIELDS = ("name", "path", "ok", "duration", "public_key", "profile", "error")
+
+
+def _print_result(result: api.KeyResult):
+    if result.ok:
+        click.echo(f"Created '{result.path}' ({result.duration:.1f}s)")
+    else:
+        click.echo(f"Failed to create '{result.path}':\n{result.output.strip()}", err=True)
+
+
+@key.command("create", help="Create an SSH key, or many keys at once with --batch")
+@click.argument("name", required=False)
+@click.option(
+    "--batch",
+    type=click.File("r"),
+    help="File with one key name per line ('-' for stdin). Keys are created without prompting.",
+)
+@click.option(
+    "-j", "--jobs", type=click.IntRange(min=1), help="Keys to generate at once (default: CPU count)"
+)
+@click.option("--passphrase-env", metavar="VAR", help="Read the passphrase from an environment variable")
+@click.option(
+    "--passphrase-fd", type=int, metavar="FD", help="Read the passphrase from a file descriptor"
+)
+@click.option(
+    "--bundle",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write all the new public keys to this file, e.g. for uploading",
+)
+@click.option("--profiles", is_flag=True, help="Also create a profile named after each key")
+@click.option("--service", help="Service for the profiles created with --profiles")
+@output.format_option
+def create(
+    name, batch, jobs, passphrase_env, passphrase_fd, bundle, profiles, service, output_format
+):
+    if bool(name) == bool(batch):
+        click.echo("Error: give either a key name or --batch.", err=True)
+        sys.exit(1)
+
+    writer = output.RecordWriter(output_format, RECORD_FIELDS)
+    if name and writer.enabled:
+        click.echo(f"Error: --format {output_format} only works with --batch.", err=True)
+        sys.exit(1)
+
+    if name:
+        return click.echo(f"Created '{create_ssh_key(name)}'")
+
+    names = _read_batch(batch)
+    if not names and not writer.enabled:
+        return click.echo("No key names given.")
+
+    passphrase = _read_passphrase(passphrase_env, passphrase_fd)
+
+    def on_result(result: api.KeyResult) -> None:
+        if not writer.enabled:
+            return _print_result(result)
+
+        record = output.to_record(result, RECORD_FIELDS)
+        record["profile"] = result.profile.name if result.profile else None
+        writer.write(record)
+
+    try:
+        with writer:
+            results = api.create_ssh_keys(
+                names,
+                passphrase=passphrase,
+                jobs=jobs,
+                create_profiles=profiles,
+                service=service,
+                callback=on_result,
+            )
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    created = [r for r in results if r.ok]
+    if bundle:
+        with open(bundle, "w") as f:
+            f.write("".join(f"{r.public_key}\n" for r in created))
+
+    if not writer.enabled:
+        click.echo(f"\nCreated {len(created)} of {len(results)} keys.")
+        if profiles and created:
+            click.echo(
+                f"Created {len(created)} profiles. Set their Git name and email with 'gitprof profile edit'."
+            )
+
+    if len(created) < len(results):
+        sys.exit(1)
@@ -0,0 +1,166 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import sys
+from typing import Tuple
+
+import click
+
+from gitprof import api
+from gitprof import maintenance
+from gitprof.api import MaintainResult
+from gitprof.cli import output
+from gitprof.cli import root
+from gitprof.cli.stats import format_size
+from gitprof.exceptions import GitProfError
+from gitprof.repos import DEFAULT_DEPTH
+
+
+RECORD_FIELDS = (
+    "repo",
+    "ok",
+    "skipped",
+    "duration",
+    "size_before",
+    "size_after",
+    "reclaimed",
+    "error",
+)
+
+
+def _format_change(result: MaintainResult) -> str:
+    if result.reclaimed >= 0:
+        return f"{format_size(result.reclaimed)} reclaimed"
+    return f"{format_size(-result.reclaimed)} added"
+
+
+def _print_result(result: MaintainResult) -> None:
+    if result.ok:
+        click.echo(
+            f"{result.repo}: {format_size(result.size_before)} -> "
+            f"{format_size(result.size_after)} ({_format_change(result)}) "
+            f"in {result.duration:.1f}s"
+        )
+        return
+
+    if result.output:
+        click.echo(result.output.rstrip(), err=True)
+    click.echo(f"Error: failed to maintain '{result.repo}'.", err=True)
+
+
+@root.command("maintain", help="Run Git's maintenance tasks in your repositories")
+@click.argument("roots", nargs=-1)
+@click.option(
+    "--depth",
+    default=DEFAULT_DEPTH,
+    show_default=True,
+    help="How many levels below each root to look for repositories",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="How many repositories to maintain at the same time [default: half the CPUs]",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0),
+    default=maintenance.DEFAULT_INTERVAL / 3600,
+    show_default=True,
+    help="Skip repositories maintained less than this many hours ago",
+)
+@click.option("-f", "--force", is_flag=True, help="Maintain every repository, however recently")
+@click.option("--gc", is_flag=True, help="Run 'git gc --auto' instead of 'git maintenance'")
+@click.option(
+    "--nice",
+    type=click.IntRange(min=0, max=19),
+    default=maintenance.DEFAULT_NICE,
+    show_default=True,
+    help="CPU niceness to run Git with",
+)
+@click.option(
+    "--idle-io/--no-idle-io",
+    default=True,
+    show_default=True,
+    help="Only use the disk when nothing else needs it (Linux)",
+)
+@output.format_option
+def maintain(
+    roots: Tuple[str],
+    depth: int,
+    jobs: int,
+    interval: float,
+    force: bool,
+    gc: bool,
+    nice: int,
+    idle_io: bool,
+    output_format: str,
+):
+    writer = output.RecordWriter(output_format, RECORD_FIELDS)
+
+    if roots:
+        paths = api.find_repos(roots, depth)
+    else:
+        paths = [e.path for e in api.list_repos(refresh=True)]
+    if not paths and not writer.enabled:
+        click.echo("No repositories found. Give a directory, or use 'gitprof repos add <dir>'.")
+        return
+
+    def on_result(result: MaintainResult) -> None:
+        if writer.enabled:
+            writer.write(output.to_record(result, RECORD_FIELDS))
+        else:
+            _print_result(result)
+
+    try:
+        with writer:
+            results = api.maintain(
+                paths,
+                jobs=jobs,
+                interval=interval * 3600,
+                force=force,
+                gc=gc,
+                nice=nice,
+                idle_io=idle_io,
+                callback=on_result,
+            )
+            # Skipped repositories don't go through the callback.
+            for r in results:
+                if r.skipped:
+                    writer.write(output.to_record(r, RECORD_FIELDS))
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    done = [r for r in results if not r.skipped]
+    skipped = len(results) - len(done)
+    failed = [r for r in done if not r.ok]
+    reclaimed = sum(r.reclaimed for r in done if r.ok)
+
+    if not writer.enabled:
+        summary = f"\nMaintained {len(done) - len(failed)} repositories"
+        if skipped:
+            summary += f" ({skipped} skipped, maintained in the last {interval:g} hours)"
+        click.echo(f"{summary}; {format_size(max(reclaimed, 0))} reclaimed in total.")
+
+    if failed:
+        click.echo(f"{len(failed)} repositories failed.", err=True)
+        sys.exit(1)
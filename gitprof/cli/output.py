@@ -0,0 +1,136 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Machine-readable output for listing and bulk commands.
+
+Commands take `--format text|json|ndjson|tsv` (see `format_option`) and write each
+result through a `RecordWriter` as soon as it's available, so tools can consume long
+runs incrementally. Every format is streamed: NDJSON and TSV write one flushed line
+per record, and JSON writes a single array one element at a time.
+"""
+import json
+import sys
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+import click
+
+TEXT, JSON, NDJSON, TSV = "text", "json", "ndjson", "tsv"
+FORMATS = (TEXT, JSON, NDJSON, TSV)
+
+format_option = click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(FORMATS),
+    default=TEXT,
+    show_default=True,
+    help="Output format; json, ndjson and tsv write one record per result as it finishes",
+)
+
+
+def _tsv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        value = ",".join(str(v) for v in value)
+
+    text = str(value)
+    for char, escaped in (("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r")):
+        text = text.replace(char, escaped)
+
+    return text
+
+
+def error_line(text: Optional[str]) -> Optional[str]:
+    """
+    Picks the error message out of a failed command's output: the first 'fatal:' or
+    'error:' line, or else the last line.
+    """
+    lines = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    for line in lines:
+        if line.lower().startswith(("fatal:", "error:")):
+            return line
+
+    return lines[-1] if lines else None
+
+
+def to_record(result: Any, fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Builds a record from the attributes of an API result. The `error` field is taken
+    from the result's output when it failed.
+    """
+    record = {}
+    for f in fields:
+        if f == "error":
+            value = None if result.ok else error_line(result.output)
+        else:
+            value = getattr(result, f)
+        record[f] = round(value, 3) if isinstance(value, float) else value
+
+    return record
+
+
+class RecordWriter:
+    """
+    Writes records (dicts with the given `fields`, in that order) in a machine-readable
+    format. Use as a context manager, so a JSON array is closed even if the command
+    fails part way through. Does nothing for the text format, where commands print their
+    own output.
+    """
+
+    def __init__(self, output_format: str, fields: Iterable[str], out: Optional[TextIO] = None):
+        self.format = output_format
+        self.fields = list(fields)
+        self.out = out or sys.stdout
+        self.count = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.format != TEXT
+
+    def __enter__(self) -> "RecordWriter":
+        if self.format == TSV:
+            self._write("\t".join(self.fields) + "\n")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.format == JSON:
+            self._write("]\n" if self.count else "[]\n")
+
+    def _write(self, text: str) -> None:
+        self.out.write(text)
+        self.out.flush()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+
+        if self.format == TSV:
+            line = "\t".join(_tsv_value(record.get(f)) for f in self.fields)
+        else:
+            line = json.dumps({f: record.get(f) for f in self.fields}, separators=(",", ":"))
+            if self.format == JSON:
+                line = ("[" if not self.count else ",") + line
+
+        self.count += 1
+        self._write(line + "\n")
@@ -25,10 +25,14 @@ from typing import List
 
 import click
 
+from gitprof import api
 from gitprof import command_utils
+from gitprof import routing
 from gitprof import ssh
 from gitprof import ux
+from gitprof.cli import output
 from gitprof.cli import root
+from gitprof.exceptions import GitProfError, ProfileNotFoundError
 from gitprof.files import Config, Profile
 from gitprof.ssh import get_key_options, get_ssh_key_path, create_ssh_key
 from gitprof.vcs import github_utils, services
@@ -42,7 +46,12 @@ def profile():
 @profile.command("create", help="Add a new profile")
 @click.argument("name", required=False)
 @click.option("--username", help="Your username for the service (e.g. GitHub)")
-def create_profile(name: str, username: str = None):
+@click.option(
+    "--match",
+    multiple=True,
+    help="Rule selecting this profile automatically, e.g. 'github.com/my-org*' or 're:<regex>'",
+)
+def create_profile(name: str, username: str = None, match: tuple = ()):
     name = name or ux.get_simple_input(
         question="Enter a name for your profile (e.g. 'github')",
         validator=lambda i: i,
@@ -58,6 +67,8 @@ def create_profile(name: str, username: str = None):
         )
         sys.exit(1)
 
+    _validate_rules(match)
+
     keys: List[str] = get_key_options()
     chosen = ux.get_input_from_list(
         title="Choose an SSH key",
@@ -85,7 +96,7 @@ def create_profile(name: str, username: str = None):
         fallback_enter_manually=True,
     ).value
 
-    profile: Profile = Profile(name, key_path, service=service)
+    profile: Profile = Profile(name, key_path, service=service, match=match)
 
     if not username and service.lower() == "github":
         username = ux.get_simple_input(
@@ -134,21 +145,44 @@ def create_profile(name: str, username: str = None):
         ):
             webbrowser.open_new_tab(url)
 
-    config.add_profile(profile)
-    config.save()
+    try:
+        api.create_profile(
+            profile.name,
+            profile.ssh_key,
+            git_name=profile.git_name,
+            git_email=profile.git_email,
+            service=profile.service,
+            match=profile.match,
+            config=config,
+        )
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
 
     click.echo(f"Saved profile: {profile.name}")
 
 
 @profile.command("apply", help="Apply profile to current repository")
 @click.option("-p", "--profile", help="The profile to apply")
-def apply_profile(profile: str):
+@click.option(
+    "--recursive-submodules",
+    is_flag=True,
+    help="Also apply the profile to each checked-out submodule",
+)
+def apply_profile(profile: str, recursive_submodules: bool):
     profile = command_utils.choose_profile_interactive(
-        profile, title="Choose a profile to apply"
+        profile,
+        title="Choose a profile to apply",
+        url=None if profile else command_utils.get_remote_url(),
     )
 
-    profile: Profile = Config().get_profile(name=profile)
-    command_utils.set_git_configs(profile)
+    try:
+        command_utils.set_git_configs(
+            api.get_profile(profile), submodules=recursive_submodules
+        )
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
 
 
 @profile.command("rm", help="Delete one or more profiles")
@@ -162,10 +196,9 @@ def do_delete(name: str):
     click.echo(f"Deleting profile '{name}'...")
     config = Config()
 
-    if config.get_profile(name):
-        config.delete_profile(profile_name=name)
-        config.save()
-    else:
+    try:
+        api.delete_profile(name, config=config)
+    except ProfileNotFoundError:
         print("Profile does not exist.")
         sys.exit(0)
 
@@ -177,24 +210,39 @@ def do_delete(name: str):
 
 @profile.command("ls", help="List your profiles")
 @click.option("-q", "--quiet", is_flag=True, help="List profile names only")
-def list_profiles(quiet: bool):
-    profiles = Config().get_profiles()
+@output.format_option
+def list_profiles(quiet: bool, output_format: str):
+    config = Config()
 
-    if not profiles:
+    if output_format != output.TEXT:
+        with output.RecordWriter(output_format, Profile.__slots__) as writer:
+            for p in config.iter_profiles():
+                writer.write(dict(p.items()))
+        return
+
+    if not config.get_profile_names():
         return click.echo("No profiles exist.")
 
-    for p in profiles:
-        if quiet:
-            print(p.name)
-        else:
-            print(p)
+    if quiet:
+        for name in config.get_profile_names():
+            print(name)
+        return
+
+    for p in config.iter_profiles():
+        print(p)
 
 
 @profile.command("edit", help="Edit an existing profile")
 @click.argument("name")
 @click.option("--git-name", help="Your committer name to use for this profile.")
 @click.option("--git-email", help="Your committer email to use for this profile.")
-def edit_profile(name: str, git_name: str, git_email: str):
+@click.option("--ssh-key", help="The SSH key to use for this profile.")
+@click.option(
+    "--match",
+    multiple=True,
+    help="Replace the rules which select this profile automatically.",
+)
+def edit_profile(name: str, git_name: str, git_email: str, ssh_key: str, match: tuple):
     config = Config()
     profile: Profile = config.get_profile(name)
 
@@ -206,12 +254,54 @@ def edit_profile(name: str, git_name: str, git_email: str):
         profile.git_name = git_name
     if git_email:
         profile.git_email = git_email
+    if ssh_key:
+        profile.ssh_key = get_ssh_key_path(ssh_key)
+    if match:
+        _validate_rules(match)
+        profile.match = list(match)
+
+    for field, value in profile.items():
+        if field == "match":
+            value = ux.get_simple_input(
+                question=f"Enter new value for '{field}' (comma-separated rules)",
+                default=", ".join(value),
+                optional=True,
+            )
+            rules = [r.strip() for r in value.split(",") if r.strip()]
+            _validate_rules(rules)
+            setattr(profile, field, rules)
+            continue
 
-    for field, value in profile.__dict__.items():
         value = ux.get_simple_input(
             question=f"Enter new value for '{field}'", default=value
         )
         setattr(profile, field, value)
 
-    config.set_profile(profile)
+    try:
+        config.set_profile(profile, name=name)
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
     config.save()
+
+
+@profile.command("which", help="Show which profile is selected for a remote URL")
+@click.argument("url")
+def which_profile(url: str):
+    match = Config().get_rule_index().resolve(url)
+
+    if not match:
+        click.echo(f"No profile rule matches '{url}'.")
+        sys.exit(1)
+
+    profile, rule = match
+    click.echo(f"{profile}\t(matched rule '{rule}')")
+
+
+def _validate_rules(rules):
+    for rule in rules:
+        try:
+            routing.validate_rule(rule)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
@@ -0,0 +1,94 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import click
+
+from gitprof import api
+from gitprof.cli import output
+from gitprof.cli import root
+from gitprof.repos import DEFAULT_DEPTH, RepoIndex
+
+
+@root.group("repos", help="Work with the index of your repositories")
+def repos():
+    pass
+
+
+@repos.command("ls", help="List indexed repositories")
+@click.option("-p", "--profile", help="Only list repositories using this profile")
+@click.option("--refresh", is_flag=True, help="Bring the index up to date first")
+@click.option("-q", "--quiet", is_flag=True, help="List repository paths only")
+@output.format_option
+def list_repos(profile: str, refresh: bool, quiet: bool, output_format: str):
+    entries = api.list_repos(profile=profile, refresh=refresh)
+
+    if output_format != output.TEXT:
+        with output.RecordWriter(output_format, ("path", "remote", "profile")) as writer:
+            for e in entries:
+                writer.write({"path": e.path, "remote": e.remote, "profile": e.profile})
+        return
+
+    if not entries:
+        return click.echo("No repositories found. Use 'gitprof repos add <dir>' to index a directory.")
+
+    width = max(len(e.path) for e in entries)
+    for e in entries:
+        if quiet:
+            click.echo(e.path)
+        else:
+            click.echo(f"{e.path:<{width}}  {e.profile or '-':<15}  {e.remote or '-'}")
+
+
+@repos.command("add", help="Index the repositories under a directory")
+@click.argument("directories", nargs=-1, required=True)
+@click.option(
+    "--depth",
+    default=DEFAULT_DEPTH,
+    help="How many levels below the directory to look for repositories",
+)
+def add_directories(directories: tuple, depth: int):
+    index = RepoIndex()
+    before = len(index.repos)
+
+    for d in directories:
+        index.add_root(d, depth)
+    index.refresh(directories)
+    index.save()
+
+    click.echo(f"Indexed {len(index.repos) - before} new repositories ({len(index.repos)} in total).")
+
+
+@repos.command("rm", help="Stop indexing a directory")
+@click.argument("directories", nargs=-1, required=True)
+def remove_directories(directories: tuple):
+    index = RepoIndex()
+    for d in directories:
+        index.remove_root(d)
+    index.save()
+
+
+@repos.command("refresh", help="Bring the index up to date")
+def refresh():
+    index = RepoIndex()
+    index.refresh()
+    index.save()
+
+    click.echo(f"{len(index.repos)} repositories indexed.")
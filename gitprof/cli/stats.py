@@ -0,0 +1,74 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import time
+
+import click
+
+from gitprof import metrics
+from gitprof.cli import root
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _print_table(title: str, summaries) -> None:
+    if not summaries:
+        return
+
+    width = max([len(s.key) for s in summaries] + [len(title)])
+    click.echo(
+        f"\n{title:<{width}}  {'ops':>6}  {'failed':>7}  {'p50 s':>8}  {'p95 s':>8}  {'repo size':>12}"
+    )
+
+    for s in summaries:
+        click.echo(
+            f"{s.key:<{width}}  {s.count:>6}  {s.failure_rate:>7.0%}  "
+            f"{s.p50():>8.2f}  {s.p95():>8.2f}  {format_size(s.repo_size):>12}"
+        )
+
+
+@root.command("stats", help="Show statistics for past clones and other operations")
+@click.option("--op", default="clone", help="Which operation to report on, e.g. 'clone' or 'apply'")
+@click.option("--days", type=float, help="Only include operations from the last N days")
+@click.option("--slowest", default=5, help="How many of the slowest repositories to show")
+def stats(op: str, days: float, slowest: int):
+    since = time.time() - days * 86400 if days else 0
+    entries = [
+        e for e in metrics.load() if e.get("op") == op and e.get("t", 0) >= since
+    ]
+
+    if not entries:
+        return click.echo(f"No '{op}' operations have been recorded yet.")
+
+    click.echo(f"{len(entries)} '{op}' operations recorded.")
+    _print_table("host", metrics.summarise(entries, "h"))
+    _print_table("profile", metrics.summarise(entries, "p"))
+
+    if slowest:
+        click.echo("\nSlowest repositories:")
+        for e in sorted(entries, key=lambda e: e.get("d", 0), reverse=True)[:slowest]:
+            status = "" if e.get("s") == 0 else f"  (failed, exit code {e.get('s')})"
+            click.echo(f"{e.get('d', 0):>8.2f} s  {e.get('r')}{status}")
@@ -0,0 +1,86 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import os
+import sys
+from typing import Tuple
+
+import click
+
+from gitprof import api
+from gitprof.cli import root
+from gitprof.exceptions import GitProfError
+from gitprof.watch import Watcher
+
+
+@root.command(
+    "watch",
+    help="Apply profiles to repositories created under directories, e.g. 'gitprof watch ~/work=work'",
+)
+@click.argument("targets", nargs=-1, required=True, metavar="DIR=PROFILE...")
+@click.option(
+    "--depth", default=2, help="How many levels below each directory to look for repositories"
+)
+@click.option(
+    "--debounce",
+    default=2.0,
+    help="Seconds a new repository must be quiet before the profile is applied",
+)
+@click.option("--poll", is_flag=True, help="Poll for changes instead of using inotify")
+@click.option(
+    "--poll-interval", default=5.0, help="Seconds between scans when polling"
+)
+def watch(targets: Tuple[str], depth: int, debounce: float, poll: bool, poll_interval: float):
+    roots = {}
+    config = api.load_config()
+
+    for target in targets:
+        directory, sep, profile = target.rpartition("=")
+        if not sep or not directory or not profile:
+            click.echo(f"Error: '{target}' should be in the form DIR=PROFILE.", err=True)
+            sys.exit(1)
+
+        try:
+            api.get_profile(profile, config)
+        except GitProfError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+
+        roots[os.path.expanduser(directory)] = profile
+
+    watcher = Watcher(
+        roots,
+        depth=depth,
+        debounce=debounce,
+        poll_interval=poll_interval,
+        use_inotify=not poll,
+        on_apply=lambda r: click.echo(f"Applied profile '{r.profile}' to '{r.repo_path}'."),
+        on_error=lambda path, e: click.echo(f"Warning: {path}: {e}", err=True),
+    )
+
+    mode = "inotify" if watcher.uses_inotify() else f"polling every {poll_interval}s"
+    for directory, profile in roots.items():
+        click.echo(f"Watching '{directory}' for new repositories (profile '{profile}', {mode}).")
+
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,68 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import sys
+
+import click
+
+from gitprof import api
+from gitprof import command_utils
+from gitprof.cli import root
+from gitprof.exceptions import GitCommandError, GitProfError
+
+
+@root.group("worktree", help="Check out a repository again under another profile")
+def worktree():
+    pass
+
+
+@worktree.command(
+    "add",
+    help="Create a worktree of the current repository that uses a different profile",
+)
+@click.argument("path")
+@click.argument("commit", required=False)
+@click.option("-p", "--profile", help="The profile to use in the new worktree")
+@click.option("-b", "new_branch", help="Create a new branch for the worktree")
+@click.option(
+    "-C",
+    "--repo",
+    default=".",
+    show_default=True,
+    help="The repository to create the worktree from",
+)
+def add_worktree(path: str, commit: str, profile: str, new_branch: str, repo: str):
+    profile = command_utils.choose_profile_interactive(
+        profile, title="Choose a profile for the new worktree"
+    )
+
+    try:
+        result = api.add_worktree(repo, path, profile, commit=commit, new_branch=new_branch)
+    except GitCommandError as e:
+        if e.output:
+            click.echo(e.output.rstrip(), err=True)
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    except GitProfError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    click.echo(f"Created worktree '{result.repo_path}' with profile '{result.profile}'.")
@@ -0,0 +1,386 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Cloning repositories with their profiles: retrying, resuming interrupted clones and
+seeding them from bundles.
+"""
+import asyncio
+import os
+import re
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional, Union
+
+from gitprof import agent
+from gitprof import gitconfig
+from gitprof import metrics
+from gitprof import process
+from gitprof import routing
+from gitprof import scheduler
+from gitprof import ssh
+from gitprof.exceptions import CloneError, GitProfError
+from gitprof.files import Config
+from gitprof.profiles import ApplyResult, ProfileLike, apply_profile, choose_profiles
+from gitprof.repos import record_repos
+from gitprof.retry import RetryPolicy, is_transient_failure
+
+
+@dataclass
+class CloneResult:
+    url: str
+    dest: str
+    profile: str
+    returncode: int
+    duration: float
+    output: str = ""
+    applied: Optional[ApplyResult] = field(default=None, repr=False)
+    attempts: int = 1
+    resumed: bool = False
+    seeded: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and self.applied is not None
+
+
+def get_clone_dest(url: str) -> str:
+    """
+    Returns the directory name which `git clone` would use for the URL.
+    """
+    # Like Git, 'src/.git' and 'src/' are cloned into 'src'.
+    path = re.sub(r"/\.git$", "", url.rstrip("/"))
+    matches = re.findall(r"^.*[/:](.*?)(?:\.git)?$", path)
+    if not matches or not matches[0]:
+        raise CloneError(f"Can't work out a directory name for '{url}'.", command=url)
+
+    return matches[0]
+
+
+def run_clone(
+    ssh_command: str,
+    url: str,
+    dest: str,
+    stream: bool = False,
+    recurse_submodules: bool = False,
+    submodule_jobs: int = None,
+) -> CloneResult:
+    """
+    Runs `git clone` with the given SSH command. Git's output is captured in the result,
+    and also shown on the console if `stream` is True.
+
+    With `recurse_submodules`, submodules are cloned too, up to `submodule_jobs` at once.
+    """
+    return process.run_sync(
+        run_clone_async(ssh_command, url, dest, stream, recurse_submodules, submodule_jobs)
+    )
+
+
+async def run_clone_async(
+    ssh_command: str,
+    url: str,
+    dest: str,
+    stream: bool = False,
+    recurse_submodules: bool = False,
+    submodule_jobs: int = None,
+) -> CloneResult:
+    """
+    Asynchronous version of `run_clone`.
+    """
+    command = ["git", "-c", f"core.sshCommand={ssh_command}", "clone"]
+    env = None
+
+    if recurse_submodules:
+        command += ["--recurse-submodules", f"--jobs={submodule_jobs or os.cpu_count() or 1}"]
+        # Submodules may be cloned by separate Git processes, which always see this.
+        env = dict(os.environ, GIT_SSH_COMMAND=ssh_command)
+
+    # Output is captured even when it's shown, so failures can be classified for retries.
+    if stream and sys.stderr.isatty():
+        command.append("--progress")
+    command += [url, dest]
+
+    git = await process.run_async(command, env=env, stderr=process.STDOUT, echo=stream)
+
+    return CloneResult(
+        url,
+        os.path.abspath(dest),
+        profile="",
+        returncode=git.returncode,
+        duration=git.duration,
+        output=git.stdout,
+    )
+
+
+def is_partial_clone(dest: str, url: str) -> bool:
+    """
+    Returns True if `dest` holds an interrupted clone of `url`: the remote is set up but
+    the branch hasn't been checked out yet.
+    """
+    git_dir = os.path.join(dest, ".git")
+    config = gitconfig.read_config(os.path.join(git_dir, "config"))
+    if config.get("remote.origin.url") != url:
+        return False
+
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+    except OSError:
+        return True
+
+    if not head.startswith("ref: "):
+        return False
+
+    ref = head[len("ref: ") :]
+    if os.path.exists(os.path.join(git_dir, ref)):
+        return False
+
+    try:
+        with open(os.path.join(git_dir, "packed-refs"), "r") as f:
+            return not any(line.rstrip().endswith(f" {ref}") for line in f)
+    except OSError:
+        return True
+
+
+async def resume_clone_async(
+    ssh_command: str,
+    url: str,
+    dest: str,
+    stream: bool = False,
+    recurse_submodules: bool = False,
+    submodule_jobs: int = None,
+) -> CloneResult:
+    """
+    Finishes an interrupted clone (see `is_partial_clone`) by fetching into it, so objects
+    which were already downloaded aren't fetched again, then checking out the default
+    branch.
+    """
+    git = ["git", "-C", dest, "-c", f"core.sshCommand={ssh_command}"]
+    env = dict(os.environ, GIT_SSH_COMMAND=ssh_command)
+    result = CloneResult(url, os.path.abspath(dest), profile="", returncode=0, duration=0.0)
+
+    async def step(*args: str) -> bool:
+        done = await process.run_async(
+            git + list(args), env=env, stderr=process.STDOUT, echo=stream
+        )
+        result.returncode = done.returncode
+        result.duration += done.duration
+        result.output += done.stdout
+        return done.ok
+
+    if not (await step("fetch", "origin") and await step("remote", "set-head", "origin", "--auto")):
+        return result
+
+    head = await process.run_async(git + ["symbolic-ref", "--short", "refs/remotes/origin/HEAD"])
+    remote_branch = head.stdout.strip()
+    if not head.ok or "/" not in remote_branch:
+        result.returncode = head.returncode or 1
+        result.output += head.stderr or f"Can't find the default branch of '{url}'.\n"
+        return result
+
+    branch = remote_branch.split("/", 1)[1]
+    if await step("checkout", "-B", branch, "--track", remote_branch) and recurse_submodules:
+        jobs = submodule_jobs or os.cpu_count() or 1
+        await step("submodule", "update", "--init", "--recursive", f"--jobs={jobs}")
+
+    return result
+
+
+def get_seed_path(seed_dir: str, url: str) -> str:
+    """
+    Returns where a directory of seed bundles keeps the bundle for `url`: by host and
+    repository path, e.g. '<seed_dir>/github.com/acme/api.bundle'.
+    """
+    parsed = routing.parse_url(url)
+    if not parsed or not parsed[1]:
+        return os.path.join(seed_dir, get_clone_dest(url) + ".bundle")
+
+    host, path = parsed
+    return os.path.join(seed_dir, host.replace(":", "_"), *path.split("/")) + ".bundle"
+
+
+def find_seed_bundle(seed: str, url: str) -> Optional[str]:
+    """
+    Returns the bundle to seed a clone of `url` from, given either a bundle file or a
+    directory of bundles (see `get_seed_path`), or None if there isn't one.
+    """
+    if os.path.isfile(seed):
+        return os.path.abspath(seed)
+
+    path = get_seed_path(seed, url)
+    return os.path.abspath(path) if os.path.isfile(path) else None
+
+
+async def seed_from_bundle_async(bundle: str, url: str, dest: str, stream: bool = False) -> bool:
+    """
+    Sets `dest` up as an interrupted clone of `url` (see `is_partial_clone`) holding the
+    bundle's branches and tags, so that `resume_clone_async` only fetches what the bundle
+    doesn't have. Returns False, leaving nothing behind, if the bundle can't be used.
+    """
+    refspecs = ["+refs/heads/*:refs/remotes/origin/*", "+refs/tags/*:refs/tags/*"]
+    commands = [
+        ["git", "init", "-q", dest],
+        ["git", "-C", dest, "remote", "add", "origin", url],
+        ["git", "-C", dest, "fetch", "--no-tags", bundle] + refspecs,
+    ]
+
+    for command in commands:
+        done = await process.run_async(command, stderr=process.STDOUT, echo=stream)
+        if not done.ok:
+            shutil.rmtree(dest, ignore_errors=True)
+            return False
+
+    return True
+
+
+def clone(
+    urls: Union[str, Iterable[str]],
+    profile: ProfileLike = None,
+    fallback: ProfileLike = None,
+    jobs: int = 1,
+    dest_dir: str = None,
+    stream: bool = False,
+    callback: Callable[[CloneResult], None] = None,
+    config: Config = None,
+    recurse_submodules: bool = False,
+    submodule_jobs: int = None,
+    retry: RetryPolicy = None,
+    seed: str = None,
+    multiplex: bool = False,
+    per_host: int = None,
+    progress: Callable[[scheduler.Scheduler], None] = None,
+) -> List[CloneResult]:
+    """
+    Clones each URL and applies the profile to it, running up to `jobs` clones at once
+    and taking turns between hosts (see `scheduler.run_scheduled` for `per_host` and
+    `progress`). With `recurse_submodules`, submodules are cloned in parallel with the
+    profile's SSH command, and the profile is applied to each of them too.
+
+    Clones which fail with a transient error are retried as `retry` allows. A clone that
+    was interrupted after fetching (now or by an earlier run) is resumed in place rather
+    than started over; other directories left behind by clones which still fail are
+    removed.
+
+    `seed` is a bundle file, or a directory of bundles made by `bundles.create_bundles`, to take
+    most of each repository's objects from; only what's newer is fetched from the URL.
+    With `multiplex`, SSH connections are shared with `probes.check_access` probes run
+    just before (see `ssh.get_ssh_command`).
+
+    If no profile is given, each URL's profile is chosen by the profiles' match rules,
+    using `fallback` for URLs which no rule matches.
+    Per-repository failures are reported in the results rather than raised; `callback`
+    is called with each result as soon as it's available.
+    """
+    dest_dir = dest_dir or os.getcwd()
+    retry = retry or RetryPolicy()
+
+    plan = [
+        (url, p, os.path.join(dest_dir, get_clone_dest(url)))
+        for url, p in choose_profiles(urls, profile, fallback, config)
+    ]
+    ssh_commands = {
+        p.name: ssh.get_ssh_command(p.ssh_key, agent.get_socket_for(p.ssh_key), multiplex)
+        for _, p, _ in plan
+    }
+
+    async def do_one(item) -> CloneResult:
+        url, p, dest = item
+        existed = os.path.exists(dest)
+        bundle = find_seed_bundle(seed, url) if seed else None
+        duration = 0.0
+        resumed = seeded = False
+
+        for attempt in range(1, retry.attempts + 1):
+            if bundle and not seeded and not os.path.exists(dest):
+                start = time.perf_counter()
+                seeded = await seed_from_bundle_async(bundle, url, dest, stream=stream)
+                duration += time.perf_counter() - start
+
+            if is_partial_clone(dest, url):
+                run = resume_clone_async
+                resumed = resumed or attempt > 1 or not seeded
+            else:
+                run = run_clone_async
+
+            result = await run(
+                ssh_commands[p.name],
+                url,
+                dest,
+                stream=stream,
+                recurse_submodules=recurse_submodules,
+                submodule_jobs=submodule_jobs,
+            )
+            duration += result.duration
+
+            if (
+                result.returncode == 0
+                or attempt == retry.attempts
+                or not is_transient_failure(result.output)
+            ):
+                break
+
+            await asyncio.sleep(retry.delay(attempt))
+
+        result.profile = p.name
+        result.attempts = attempt
+        result.resumed = resumed
+        result.seeded = seeded
+        result.duration = duration
+        if stream:
+            # Already shown on the console.
+            result.output = ""
+
+        failed = result.returncode != 0 and not existed and os.path.isdir(dest)
+        if failed and not is_partial_clone(dest, url):
+            shutil.rmtree(dest, ignore_errors=True)
+
+        if result.returncode == 0:
+            try:
+                result.applied = apply_profile(
+                    dest, p, record=False, submodules=recurse_submodules
+                )
+            except GitProfError as e:
+                result.output += str(e)
+
+        size = metrics.dir_size(os.path.join(dest, ".git", "objects")) if result.ok else None
+        metrics.record("clone", p.name, url, result.duration, result.returncode, repo_size=size)
+
+        if callback:
+            callback(result)
+
+        return result
+
+    results = scheduler.run_scheduled(
+        do_one,
+        plan,
+        key=lambda item: (routing.get_host(item[0]), item[1].name),
+        failed=lambda r: r.attempts > 1 or (r.returncode != 0 and is_transient_failure(r.output)),
+        jobs=jobs,
+        per_host=per_host,
+        progress=progress,
+    )
+
+    if any(r.ok for r in results):
+        record_repos(r.dest for r in results if r.ok)
+
+    return results
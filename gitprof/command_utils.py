@@ -21,71 +21,87 @@
 #  SOFTWARE.
 import os
 import re
-import subprocess
+import sys
+from typing import List, Optional
 
+from gitprof import api
+from gitprof import process
+from gitprof import timings
 from gitprof import ux
-from gitprof import ssh
 from gitprof.files import Profile, Config
 
 
-def run_command(args: str):
-    raw = subprocess.check_output(
-        args,
-        stdin=None,
-        stderr=None,
-        shell=True,
-        universal_newlines=False,
-    ).decode("utf-8")
-    return "".join(raw).strip().replace("\r\n", "")
+def run_command(args: List[str]) -> str:
+    return process.output(args).replace("\r\n", "")
 
 
-def set_git_configs(profile: Profile):
-    print(f"\nSetting local Git config values for '{os.getcwd()}'...")
-    ssh_command = ssh.get_ssh_command(profile.ssh_key)
+def get_remote_url(remote: str = "origin") -> Optional[str]:
+    result = process.run(["git", "config", "--get", f"remote.{remote}.url"])
+    if not result.ok:
+        return None
 
-    print(f"Setting your Git name to '{profile.git_name}'...")
-    run_command(f'git config --local user.name "{profile.git_name}"')
+    return result.stdout.strip() or None
 
-    print(f"Setting your Git email to '{profile.git_email}'...")
-    run_command(f'git config --local user.email "{profile.git_email}"')
 
-    print(f"Setting your Git SSH command to '{ssh_command}'...")
-    run_command(f'git config --local core.sshCommand "{ssh_command}"')
+def set_git_configs(profile: Profile, repo_path: str = ".", submodules: bool = False):
+    print(f"\nSetting local Git config values for '{os.path.abspath(repo_path)}'...")
+    values = api.get_git_config_values(profile)
 
+    print(f"Setting your Git name to '{values['user.name']}'...")
+    print(f"Setting your Git email to '{values['user.email']}'...")
+    print(f"Setting your Git SSH command to '{values['core.sshCommand']}'...")
+    result = api.apply_profile(repo_path, profile, submodules=submodules)
 
-def choose_profile_interactive(profile: str, title: str) -> str:
+    if result.submodules:
+        print(f"Set the same values in {len(result.submodules)} submodules.")
+
+
+def choose_profile_interactive(profile: str, title: str, url: str = None) -> str:
     config = Config()
 
+    if not profile and url:
+        match = config.get_rule_index().resolve(url)
+        if match:
+            profile, rule = match
+            print(f"Using profile '{profile}' (matched rule '{rule}').")
+            return profile
+
     while not profile:
         config.reload()
 
         if not profile:
-            options = config.get_profiles()
-            for index, profile in enumerate(options):
-                options[index] = profile.name
-
-                if profile.service:
-                    whitespace = " " * (35 - len(profile.name))
-                    options[index] = f"{options[index]}{whitespace}({profile.service})"
-
-            chosen = ux.get_input_from_list(
-                title=title,
-                options=options,
-                fallback="create new profile",
-                fallback_index=-1,
-            )
+            options = []
+            for p in config.iter_profiles():
+                if p.service:
+                    whitespace = " " * (35 - len(p.name))
+                    options.append(f"{p.name}{whitespace}({p.service})")
+                else:
+                    options.append(p.name)
+
+            with timings.span("choose profile (interactive)"):
+                chosen = ux.get_input_from_list(
+                    title=title,
+                    options=options,
+                    fallback="create new profile",
+                    fallback_index=-1,
+                )
 
             matches = re.findall(r"^(.*?)\s*\(.*\)\s*$", chosen.value)
             if matches:
                 chosen.value = matches[0]
 
-            if not config.get_profiles() or chosen.is_fallback():
+            if not config.get_profile_names() or chosen.is_fallback():
                 name = ux.get_simple_input(
                     question="Enter a name for your new profile (e.g. 'github')",
                     validator=lambda n: len(n.split(" ")) == 1,
                 )
                 profile = name
-                os.system(f"gitprof profile create {name}")
+                process.run(
+                    [sys.executable, "-m", "gitprof", "profile", "create", name],
+                    stdin=process.INHERIT,
+                    stdout=process.INHERIT,
+                    stderr=process.INHERIT,
+                )
                 continue
 
             profile = chosen.value
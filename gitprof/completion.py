@@ -0,0 +1,206 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Shell completion for commands, profiles, SSH keys and services.
+
+Completion runs on every Tab press, so `main` is reached without loading the CLI and only
+imports built-in modules. Profile, key and service names are read from a small text file
+which is rewritten when the config is saved, or when the config or ~/.ssh have changed
+since it was written.
+"""
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Same as `files.cache_dir` and `files.config_file`, without importing `files`.
+if os.name == "nt":
+    _config_dir = os.path.expanduser(r"~\AppData\Local\gitprof")
+    _cache_dir = os.path.join(_config_dir, "cache")
+else:
+    _config_dir = os.path.expanduser("~/.config/gitprof")
+    _cache_dir = os.path.expanduser("~/.cache/gitprof")
+
+completion_file = os.path.join(_cache_dir, "completions")
+_config_file = os.path.join(_config_dir, "config.json")
+_ssh_dir = os.path.expanduser("~/.ssh")
+
+PROFILE, KEY, SERVICE = "profile", "key", "service"
+
+COMMANDS: Dict[str, List[str]] = {
+    "agent": ["load", "ls", "stop"],
+    "bundle": ["create"],
+    "check": [],
+    "clone": [],
+    "config": ["edit", "rm"],
+    "completion": ["bash", "zsh", "fish"],
+    "daemon": ["start", "status", "stop"],
+    "env": [],
+    "exec": [],
+    "hook": ["install", "uninstall"],
+    "key": ["create"],
+    "maintain": [],
+    "profile": ["apply", "create", "edit", "ls", "rm", "which"],
+    "query": ["env", "keys", "profiles", "resolve"],
+    "repos": ["add", "ls", "refresh", "rm"],
+    "stats": [],
+    "version": [],
+    "watch": [],
+    "worktree": ["add"],
+}
+
+# Positional arguments which take a name: (command path, index or None for all).
+ARGUMENTS: Dict[Tuple[str, ...], Tuple[str, Optional[int]]] = {
+    ("agent", "load"): (PROFILE, 0),
+    ("env",): (PROFILE, 0),
+    ("exec",): (PROFILE, 0),
+    ("profile", "edit"): (PROFILE, 0),
+    ("profile", "rm"): (PROFILE, None),
+    ("query", "env"): (PROFILE, 0),
+}
+
+OPTIONS = {"-p": PROFILE, "--profile": PROFILE, "--ssh-key": KEY, "--service": SERVICE}
+
+# Other options which take a value, so the word after them isn't an argument.
+_VALUE_OPTIONS = {
+    "--batch", "--bundle", "--days", "--debounce", "--depth", "--format", "--from-file",
+    "--git-email", "--git-name", "--interval", "--jobs", "--lifetime", "--match",
+    "--nice", "--op", "--output-dir", "--passphrase-env", "--passphrase-fd",
+    "--per-host", "--poll-interval", "--repo", "--retries", "--retry-delay",
+    "--seed-from", "--slowest", "--timeout", "--username", "-C", "-b", "-f", "-j", "-o",
+    "-t",
+}
+
+
+def _stamp(path: str) -> str:
+    try:
+        return str(os.stat(path).st_mtime_ns)
+    except OSError:
+        return "-"
+
+
+def write(config=None) -> None:
+    """
+    Rewrites the completion file from the config and ~/.ssh.
+    """
+    from gitprof import ssh
+    from gitprof.files import Config
+    from gitprof.vcs import services
+
+    config = config or Config()
+    lines = [f"{_stamp(_config_file)} {_stamp(_ssh_dir)}"]
+    lines += [f"{PROFILE}\t{name}" for name in config.get_profile_names()]
+    lines += [f"{KEY}\t{name}" for name in ssh.get_key_options()]
+    lines += [f"{SERVICE}\t{name}" for name in services.get_services(config)]
+
+    os.makedirs(_cache_dir, exist_ok=True)
+    temp = f"{completion_file}.tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp, completion_file)
+
+
+def _load(kind: str, refresh: bool = True) -> List[str]:
+    try:
+        with open(completion_file, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        lines = []
+
+    if refresh and (not lines or lines[0] != f"{_stamp(_config_file)} {_stamp(_ssh_dir)}"):
+        write()
+        return _load(kind, refresh=False)
+
+    prefix = f"{kind}\t"
+    return [line[len(prefix) :] for line in lines[1:] if line.startswith(prefix)]
+
+
+def complete(words: List[str]) -> List[str]:
+    """
+    Returns the completions for the last word, given the words typed after 'gitprof'.
+    """
+    *before, current = words or [""]
+
+    if before and before[-1] in OPTIONS:
+        kind = OPTIONS[before[-1]]
+    elif current.startswith("-"):
+        return []
+    else:
+        positional, skip = [], False
+        for word in before:
+            if skip:
+                skip = False
+            elif word in _VALUE_OPTIONS or word in OPTIONS:
+                skip = True
+            elif not word.startswith("-"):
+                positional.append(word)
+
+        if not positional:
+            return [c for c in COMMANDS if c.startswith(current)]
+
+        command = positional[0]
+        if COMMANDS.get(command) and len(positional) == 1:
+            return [c for c in COMMANDS[command] if c.startswith(current)]
+
+        depth = 2 if COMMANDS.get(command) else 1
+        kind, index = ARGUMENTS.get(tuple(positional[:depth]), (None, None))
+        if not kind or (index is not None and len(positional) - depth != index):
+            return []
+
+    return [name for name in _load(kind) if name.startswith(current)]
+
+
+def main(args: List[str]) -> int:
+    """
+    Prints the completions for `gitprof __complete WORD...`, one per line.
+    """
+    sys.stdout.write("".join(f"{c}\n" for c in complete(args[1:])))
+    return 0
+
+
+BASH = """_gitprof_complete() {
+    local IFS=$'\\n'
+    COMPREPLY=($(gitprof __complete "${COMP_WORDS[@]:1:COMP_CWORD}" 2>/dev/null))
+}
+complete -o default -F _gitprof_complete gitprof
+"""
+
+ZSH = """#compdef gitprof
+_gitprof() {
+    local -a candidates
+    candidates=("${(@f)$(gitprof __complete "${(@)words[2,CURRENT]}" 2>/dev/null)}")
+    if [[ -n ${candidates[1]} ]]; then
+        compadd -a candidates
+    else
+        _files
+    fi
+}
+compdef _gitprof gitprof
+"""
+
+FISH = """function __gitprof_complete
+    set -l tokens (commandline -opc) (commandline -ct)
+    gitprof __complete $tokens[2..-1] 2>/dev/null
+end
+complete -c gitprof -f -a '(__gitprof_complete)'
+"""
+
+SCRIPTS = {"bash": BASH, "zsh": ZSH, "fish": FISH}
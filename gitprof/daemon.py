@@ -0,0 +1,289 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+A long-running process which answers profile queries over a Unix socket.
+
+Editor integrations and Git hooks ask which profile applies many times a minute; the
+daemon keeps the config, match rules and SSH key list in memory, so each answer costs a
+round trip instead of starting Python and parsing the config. Requests and responses are
+JSON objects, one per line:
+
+    {"op": "resolve", "url": "git@github.com:acme/api.git"}
+    {"op": "resolve", "path": "/home/me/work/api"}
+    {"op": "env", "profile": "work"}
+    {"op": "profiles"}
+    {"op": "keys"}
+    {"op": "ping"}
+
+Responses are {"ok": true, "result": ...} or {"ok": false, "error": "..."}. `query`
+answers in-process when the daemon isn't running, so clients don't need to care.
+"""
+import json
+import os
+import socket
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gitprof import env
+from gitprof import files
+from gitprof import gitconfig
+from gitprof import routing
+from gitprof import ssh
+from gitprof.exceptions import GitProfError, NotARepositoryError, ProfileNotFoundError
+
+daemon_socket = os.path.join(files.cache_dir, "daemon.sock")
+
+
+class DaemonError(GitProfError):
+    pass
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+class State:
+    """
+    The config and SSH key list, reloaded when their files change.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config: Optional[files.Config] = None
+        self._config_stamp = None
+        self._identities: Dict[Tuple[str, str], str] = {}
+        self._keys: List[str] = []
+        self._keys_stamp = None
+
+    def config(self) -> files.Config:
+        stamp = _stamp(files.config_file)
+
+        with self._lock:
+            if self._config is None or stamp != self._config_stamp:
+                config = files.Config()
+                config.get_rule_index()
+                self._identities = {
+                    (p.git_email, ssh.get_ssh_command(p.ssh_key)): p.name
+                    for p in config.iter_profiles()
+                    if p.ssh_key
+                }
+                self._config, self._config_stamp = config, stamp
+
+            return self._config
+
+    def identities(self) -> Dict[Tuple[str, str], str]:
+        self.config()
+        return self._identities
+
+    def keys(self) -> List[str]:
+        stamp = _stamp(ssh.ssh_dir)
+
+        with self._lock:
+            if stamp != self._keys_stamp:
+                self._keys, self._keys_stamp = ssh.get_key_options(), stamp
+
+            return self._keys
+
+
+def _resolve_url(state: State, url: str) -> Dict[str, Any]:
+    match = state.config().get_rule_index().resolve(url)
+    if match:
+        return {"url": url, "profile": match[0], "rule": match[1], "source": "rule"}
+
+    return {"url": url, "profile": None}
+
+
+def _resolve_path(state: State, path: str) -> Dict[str, Any]:
+    """
+    Resolves the profile for a repository from its remote URL, or failing that, from the
+    profile which has been applied to it.
+    """
+    repo = gitconfig.find_repo_root(path)
+    if not (repo and gitconfig.get_config_path(path)):
+        raise NotARepositoryError(path)
+
+    values = gitconfig.read_repo_config(path)
+    url = values.get("remote.origin.url")
+
+    result = _resolve_url(state, url) if url else {"url": None, "profile": None}
+    result["repo"] = repo
+
+    if not result["profile"]:
+        applied = state.identities().get(
+            (values.get("user.email"), values.get("core.sshcommand"))
+        )
+        if applied:
+            result.update(profile=applied, source="config")
+
+    return result
+
+
+def _get_env(state: State, name: str) -> Dict[str, str]:
+    profile = state.config().get_profile(name)
+    if not profile:
+        raise ProfileNotFoundError(name)
+
+    return env.get_profile_env(profile)
+
+
+_OPS: Dict[str, Callable[[State, Dict[str, Any]], Any]] = {
+    "ping": lambda state, request: {"pid": os.getpid()},
+    "profiles": lambda state, request: [p.to_dict() for p in state.config().iter_profiles()],
+    "keys": lambda state, request: state.keys(),
+    "env": lambda state, request: _get_env(state, request["profile"]),
+    "resolve": lambda state, request: (
+        _resolve_url(state, request["url"])
+        if request.get("url")
+        else _resolve_path(state, request.get("path") or os.getcwd())
+    ),
+}
+
+
+def handle(state: State, request: Dict[str, Any]) -> Dict[str, Any]:
+    op = _OPS.get(request.get("op"))
+    if not op:
+        return {"ok": False, "error": f"Unknown operation '{request.get('op')}'."}
+
+    try:
+        return {"ok": True, "result": op(state, request)}
+    except KeyError as e:
+        return {"ok": False, "error": f"Missing field {e} in request."}
+    except GitProfError as e:
+        return {"ok": False, "error": str(e)}
+
+
+def _send(request: Dict[str, Any], path: str) -> Dict[str, Any]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+
+        with sock.makefile("rb") as f:
+            line = f.readline()
+
+    if not line:
+        raise ConnectionError("The daemon closed the connection.")
+
+    return json.loads(line)
+
+
+def query(request: Dict[str, Any], path: str = None) -> Dict[str, Any]:
+    """
+    Sends a request to the daemon, or handles it in-process if the daemon isn't running.
+    """
+    if hasattr(socket, "AF_UNIX"):
+        try:
+            return _send(request, path or daemon_socket)
+        except OSError:
+            pass
+
+    if request.get("op") == "ping":
+        return {"ok": False, "error": "The daemon is not running."}
+
+    return handle(State(), request)
+
+
+def is_running(path: str = None) -> bool:
+    return query({"op": "ping"}, path)["ok"]
+
+
+def serve(path: str = None, on_ready: Callable[[str], None] = None) -> None:
+    """
+    Answers requests until interrupted. Raises DaemonError if a daemon is already running.
+    """
+    import socketserver
+
+    path = path or daemon_socket
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("The GitProf daemon needs Unix domain sockets.")
+    if is_running(path):
+        raise DaemonError(f"A GitProf daemon is already listening at '{path}'.")
+    if os.path.exists(path):
+        os.remove(path)
+
+    state = State()
+    state.config()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    response = handle(state, request) if isinstance(request, dict) else None
+                except ValueError:
+                    response = None
+
+                response = response or {"ok": False, "error": "Requests must be JSON objects."}
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    old_umask = os.umask(0o077)
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(old_umask)
+
+    try:
+        if on_ready:
+            on_ready(path)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main(args: List[str]) -> Optional[int]:
+    """
+    Runs `gitprof query OP [ARG]` without loading the CLI, printing the result as JSON.
+    Returns None if `args` isn't a query the fast path understands.
+    """
+    if len(args) < 2 or args[0] != "query" or any(a.startswith("-") for a in args[1:]):
+        return None
+
+    op, rest = args[1], args[2:]
+    if op in ("profiles", "keys") and not rest:
+        request = {"op": op}
+    elif op == "env" and len(rest) == 1:
+        request = {"op": op, "profile": rest[0]}
+    elif op == "resolve" and len(rest) <= 1:
+        target = rest[0] if rest else os.getcwd()
+        key = "url" if routing.parse_url(target) and not os.path.exists(target) else "path"
+        request = {"op": op, key: os.path.abspath(target) if key == "path" else target}
+    else:
+        return None
+
+    response = query(request)
+    if not response["ok"]:
+        print(f"Error: {response['error']}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(response["result"], indent=2))
+    return 0
@@ -0,0 +1,107 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Using a profile for a single command, through environment variables, without writing
+anything to a repository's config.
+
+`gitprof env` and `gitprof exec` run on every step of some CI pipelines, so `main` handles
+them before the CLI (and its dependencies) are imported.
+"""
+import os
+import shlex
+import sys
+from typing import Dict, List, Optional
+
+from gitprof.exceptions import GitProfError, InvalidProfileError, ProfileNotFoundError
+from gitprof.files import Config, Profile
+from gitprof.ssh import get_ssh_command
+
+
+def get_profile_env(profile: Profile) -> Dict[str, str]:
+    """
+    Returns the environment variables which make Git use the profile.
+    """
+    if not profile.ssh_key:
+        raise InvalidProfileError(f"Profile '{profile.name}' has no SSH key.")
+
+    env = {"GIT_SSH_COMMAND": get_ssh_command(profile.ssh_key)}
+
+    for role in ("AUTHOR", "COMMITTER"):
+        if profile.git_name:
+            env[f"GIT_{role}_NAME"] = profile.git_name
+        if profile.git_email:
+            env[f"GIT_{role}_EMAIL"] = profile.git_email
+
+    return env
+
+
+def load_profile_env(name: str) -> Dict[str, str]:
+    profile = Config().get_profile(name)
+    if not profile:
+        raise ProfileNotFoundError(name)
+
+    return get_profile_env(profile)
+
+
+def format_exports(env: Dict[str, str]) -> str:
+    return "".join(f"export {key}={shlex.quote(value)}\n" for key, value in env.items())
+
+
+def exec_with_env(env: Dict[str, str], command: List[str]):
+    """
+    Replaces the current process with the command, so no extra process is left behind.
+    """
+    os.environ.update(env)
+    sys.stdout.flush()
+
+    try:
+        os.execvp(command[0], command)
+    except OSError as e:
+        raise GitProfError(f"Can't run '{command[0]}': {e.strerror}.")
+
+
+def main(args: List[str]) -> Optional[int]:
+    """
+    Runs `gitprof env PROFILE` or `gitprof exec PROFILE [--] COMMAND...` without loading
+    the CLI. Returns None if `args` isn't one of these (including requests for help),
+    so the CLI should handle them instead; otherwise returns the exit code.
+    """
+    if len(args) < 2 or args[0] not in ("env", "exec") or args[1].startswith("-"):
+        return None
+
+    command, name, rest = args[0], args[1], args[2:]
+    if rest[:1] == ["--"]:
+        rest = rest[1:]
+
+    if (command == "env" and rest) or (command == "exec" and not rest):
+        return None
+
+    try:
+        env = load_profile_env(name)
+        if command == "env":
+            sys.stdout.write(format_exports(env))
+            return 0
+
+        exec_with_env(env, rest)
+    except GitProfError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
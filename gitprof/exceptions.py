@@ -0,0 +1,67 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+class GitProfError(Exception):
+    """
+    Base class for errors raised by GitProf.
+    """
+
+
+class ProfileError(GitProfError):
+    pass
+
+
+class ProfileNotFoundError(ProfileError):
+    def __init__(self, name: str, message: str = None):
+        super().__init__(message or f"Profile '{name}' does not exist.")
+        self.name = name
+
+
+class ProfileExistsError(ProfileError):
+    def __init__(self, name: str):
+        super().__init__(f"A profile called '{name}' already exists.")
+        self.name = name
+
+
+class InvalidProfileError(ProfileError):
+    pass
+
+
+class NotARepositoryError(GitProfError):
+    def __init__(self, path: str):
+        super().__init__(f"'{path}' is not inside a Git repository.")
+        self.path = path
+
+
+class GitCommandError(GitProfError):
+    def __init__(self, message: str, command=None, returncode: int = None, output: str = ""):
+        super().__init__(message)
+        self.command = command
+        self.returncode = returncode
+        self.output = output
+
+
+class CloneError(GitCommandError):
+    pass
+
+
+class SSHKeyError(GitProfError):
+    pass
@@ -21,44 +21,51 @@
 #  SOFTWARE.
 import json
 import os
-import sys
 import traceback
 from dataclasses import dataclass
 from json import JSONEncoder
 from os.path import join
-from typing import List, Any, Dict, Optional
+from typing import List, Any, Dict, Iterator, Optional, Tuple
 
 from gitprof import os_utils
+from gitprof import timings
+from gitprof.exceptions import ProfileExistsError
+from gitprof.routing import RuleIndex
 
 if os_utils.is_windows():
     config_dir = os.path.expanduser(r"~\AppData\Local\gitprof")
+    cache_dir = os.path.expanduser(r"~\AppData\Local\gitprof\cache")
 else:
     config_dir = os.path.expanduser(r"~/.config/gitprof")
+    cache_dir = os.path.expanduser(r"~/.cache/gitprof")
 
 os.makedirs(config_dir, exist_ok=True)
+os.makedirs(cache_dir, exist_ok=True)
 config_file = join(config_dir, "config.json")
 
 
 class ProfileEncoder(JSONEncoder):
     def default(self, o: Any) -> Any:
-        out = o.__dict__
+        if isinstance(o, ProfileTable):
+            return [p.to_dict() for p in o]
 
-        return out
+        return o.to_dict()
 
-    def decode(self, item: Dict) -> "Profile":
+    def decode(self, item: str) -> "ProfileTable":
         _dict = json.loads(item)
-        out = []
+        out = ProfileTable()
 
-        profiles = _dict.get("profiles")
+        profiles = _dict.get("profiles") or []
         for p in profiles:
             try:
-                out.append(
-                    Profile(
+                out.append_record(
+                    (
                         p["name"],
                         p["ssh_key"],
-                        git_name=p.get("git_name"),
-                        git_email=p.get("git_email"),
-                        service=p.get("service"),
+                        p.get("git_name"),
+                        p.get("git_email"),
+                        p.get("service"),
+                        tuple(p.get("match") or ()),
                     )
                 )
             except:
@@ -69,26 +76,59 @@ class ProfileEncoder(JSONEncoder):
 
 @dataclass
 class Profile:
+    __slots__ = ("name", "ssh_key", "git_name", "git_email", "service", "match")
+
     name: str
     ssh_key: str
     git_name: str
     git_email: str
     service: str
+    match: List[str]
 
     def __init__(
-        self, name=None, ssh_key=None, git_name=None, git_email=None, service=None
+        self,
+        name=None,
+        ssh_key=None,
+        git_name=None,
+        git_email=None,
+        service=None,
+        match=None,
     ):
         self.name = name
         self.ssh_key = ssh_key
         self.git_name = git_name
         self.git_email = git_email
         self.service = service
+        self.match = list(match or [])
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = dict(self.items())
+
+        if not out.get("match"):
+            out.pop("match", None)
+
+        return out
+
+    def to_record(self) -> Tuple:
+        return (
+            self.name,
+            self.ssh_key,
+            self.git_name,
+            self.git_email,
+            self.service,
+            tuple(self.match),
+        )
 
     def __str__(self):
         out = []
-        for key, value in self.__dict__.items():
-            if key == "name":
+        for key, value in self.items():
+            if key == "name" or (key == "match" and not value):
                 continue
+            if isinstance(value, list):
+                value = ", ".join(value)
 
             out.append(f"{key}='{value}'")
 
@@ -96,74 +136,149 @@ class Profile:
         return f"\n{self.name} {{\n{lines}\n}}"
 
 
+class ProfileTable:
+    """
+    Compact storage for the profiles in the config file.
+
+    Each profile is kept as a plain tuple and indexed by name; a full `Profile` is
+    only created when it is requested, and iteration yields profiles one at a time.
+    Changes to a returned `Profile` must be written back with `set()`.
+    """
+
+    __slots__ = ("_records", "_index")
+
+    def __init__(self):
+        self._records: List[Tuple] = []
+        self._index: Dict[str, int] = {}
+
+    def append_record(self, record: Tuple) -> None:
+        self._index[record[0]] = len(self._records)
+        self._records.append(record)
+
+    def append(self, profile: Profile) -> None:
+        self.append_record(profile.to_record())
+
+    def get(self, name: str) -> Optional[Profile]:
+        index = self._index.get(name)
+        if index is not None:
+            return Profile(*self._records[index])
+
+    def set(self, profile: Profile, name: str = None) -> None:
+        if name and profile.name != name and profile.name in self._index:
+            raise ProfileExistsError(profile.name)
+
+        index = self._index.pop(name or profile.name, None)
+        if index is not None:
+            self._records[index] = profile.to_record()
+            self._index[profile.name] = index
+
+    def remove(self, name: str) -> None:
+        if name not in self._index:
+            return
+
+        del self._records[self._index[name]]
+        self._index = {r[0]: i for i, r in enumerate(self._records)}
+
+    def names(self) -> List[str]:
+        return [r[0] for r in self._records]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Profile]:
+        for record in self._records:
+            yield Profile(*record)
+
+
 @dataclass
 class Config:
-    profiles: List[Profile] = None
+    profiles: ProfileTable = None
 
     def __init__(self):
+        self._rule_index = None
+        self.profiles = ProfileTable()
         self.load()
 
     def load(self):
         if not os.path.exists(config_file):
             return
 
-        with open(config_file, "r") as loaded:
-            text = loaded.read()
+        with timings.span("config load"):
+            with open(config_file, "r") as loaded:
+                text = loaded.read()
 
-        try:
-            loaded = json.loads(text, cls=ProfileEncoder)
-        except:
-            traceback.print_exc()
-            return
+            try:
+                loaded = json.loads(text, cls=ProfileEncoder)
+            except:
+                traceback.print_exc()
+                return
 
         self.profiles = loaded
+        self._rule_index = None
 
     def reload(self):
         self.load()
 
     def save(self) -> None:
         fields = self.get_fields()
-        with open(config_file, "w") as f:
+        with timings.span("config save"), open(config_file, "w") as f:
             json.dump(fields, f, indent=4, cls=ProfileEncoder)
 
+        from gitprof import completion
+        from gitprof import hooks
+
+        hooks.refresh_snapshot(self)
+        completion.write(self)
+
     def get_fields(self):
-        return self.__dict__
+        return {"profiles": self.profiles}
 
     def add_profile(self, profile: Profile):
-        if not self.profiles:
-            self.profiles = []
-
-        if profile.name in map(lambda i: i.name, self.profiles):
-            print(
-                f"Cannot create profile '{profile.name}'; a profile with that name already exists."
-            )
-            return sys.exit(0)
+        if profile.name in self.profiles:
+            raise ProfileExistsError(profile.name)
 
         self.profiles.append(profile)
+        self._rule_index = None
 
     def __str__(self):
-        out = ""
-
-        for p in self.profiles:
-            out += f"{p}\n"
-
-        return out
+        return "".join(f"{p}\n" for p in self.profiles)
 
-    def set_profile(self, profile: Profile) -> None:
-        for index, p in enumerate(self.profiles):
-            if p.name == profile.name:
-                self.profiles[index] = p
+    def set_profile(self, profile: Profile, name: str = None) -> None:
+        """
+        Stores the profile, replacing the one called `name` (defaults to `profile.name`).
+        """
+        self.profiles.set(profile, name=name)
+        self._rule_index = None
 
     def get_profile(self, name: str) -> Optional[Profile]:
-        for p in self.profiles or []:
-            if p.name == name:
-                return p
+        return self.profiles.get(name)
 
     def delete_profile(self, profile_name: str) -> None:
-        self.profiles = list(filter(lambda p: p.name != profile_name, self.profiles))
+        self.profiles.remove(profile_name)
+        self._rule_index = None
+
+    def iter_profiles(self) -> Iterator[Profile]:
+        return iter(self.profiles)
 
     def get_profiles(self) -> List[Profile]:
-        return self.profiles or []
+        return list(self.profiles)
+
+    def get_profile_names(self) -> List[str]:
+        return self.profiles.names()
+
+    def get_rule_index(self) -> RuleIndex:
+        if self._rule_index is None:
+            self._rule_index = RuleIndex.build(self.iter_profiles())
+
+        return self._rule_index
 
-    def get_profile_names(self) -> List[Profile]:
-        return list(map(lambda i: i.name, self.get_profiles()))
+    def resolve_profile(self, url: str) -> Optional[Profile]:
+        """
+        Returns the profile whose match rules select the given remote URL.
+        """
+        match = self.get_rule_index().resolve(url)
+        if match:
+            return self.get_profile(match[0])
@@ -0,0 +1,311 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Reading and writing repository config files directly.
+
+Setting a profile's values with `git config` costs one process per value; writing
+`.git/config` in one pass is much cheaper when many repositories are configured.
+Writes take git's own `config.lock` file, so they are safe to run alongside Git.
+"""
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+_SECTION_RE = re.compile(r'^\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+_KEY_RE = re.compile(r"^\s*([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*?))?\s*$")
+
+
+class ConfigLockedError(OSError):
+    pass
+
+
+def find_repo_root(path: str) -> Optional[str]:
+    """
+    Returns the top-level directory of the repository containing `path`, or None.
+    """
+    path = os.path.abspath(path)
+
+    while not os.path.exists(os.path.join(path, ".git")):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+    return path
+
+
+def find_git_dir(path: str) -> Optional[str]:
+    """
+    Returns the Git directory of the repository containing `path`, or None.
+
+    Follows '.git' files, as used by worktrees and submodules.
+    """
+    root = find_repo_root(path)
+    if not root:
+        return None
+
+    dot_git = os.path.join(root, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+
+    with open(dot_git, "r") as f:
+        match = re.match(r"^gitdir:\s*(.*?)\s*$", f.read())
+
+    return os.path.normpath(os.path.join(root, match.group(1))) if match else None
+
+
+def get_common_dir(git_dir: str) -> str:
+    """
+    Returns the directory holding the repository's shared config (which differs from
+    the Git directory for linked worktrees).
+    """
+    commondir = os.path.join(git_dir, "commondir")
+    if not os.path.isfile(commondir):
+        return git_dir
+
+    with open(commondir, "r") as f:
+        return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+
+
+def get_config_path(repo_path: str) -> Optional[str]:
+    git_dir = find_git_dir(repo_path)
+    if git_dir:
+        return os.path.join(get_common_dir(git_dir), "config")
+
+
+def get_worktree_config_path(repo_path: str) -> Optional[str]:
+    """
+    Returns the per-worktree config file ('config.worktree') for the worktree containing
+    `repo_path`, or None if the repository doesn't have `extensions.worktreeConfig` set.
+    """
+    git_dir = find_git_dir(repo_path)
+    if not git_dir:
+        return None
+
+    common = read_config(os.path.join(get_common_dir(git_dir), "config"))
+    if not _is_true(common.get("extensions.worktreeconfig")):
+        return None
+
+    return os.path.join(git_dir, "config.worktree")
+
+
+def enable_worktree_config(repo_path: str) -> str:
+    """
+    Turns on `extensions.worktreeConfig` for the repository containing `repo_path`, so
+    each worktree can have its own config, and returns the worktree's config file.
+
+    Like `git sparse-checkout`, this moves `core.bare` and `core.worktree` into the main
+    worktree's config, since they'd otherwise apply to every worktree.
+    """
+    git_dir = find_git_dir(repo_path)
+    if not git_dir:
+        raise FileNotFoundError(f"'{repo_path}' is not in a Git repository.")
+
+    common_dir = get_common_dir(git_dir)
+    common_path = os.path.join(common_dir, "config")
+    common = read_config(common_path)
+
+    if not _is_true(common.get("extensions.worktreeconfig")):
+        main_values = {}
+        if _is_true(common.get("core.bare")):
+            main_values["core.bare"] = "true"
+        if "core.worktree" in common:
+            main_values["core.worktree"] = common["core.worktree"]
+        if main_values:
+            write_values(os.path.join(common_dir, "config.worktree"), main_values)
+
+        values = {key: None for key in main_values}
+        values["extensions.worktreeConfig"] = "true"
+        if common.get("core.repositoryformatversion", "0") == "0":
+            values["core.repositoryformatversion"] = "1"
+        write_values(common_path, values)
+
+    return os.path.join(git_dir, "config.worktree")
+
+
+def read_repo_config(repo_path: str) -> Dict[str, str]:
+    """
+    Reads the local config of the repository containing `repo_path`, with the
+    worktree's own config (if enabled) taking precedence, as it does in Git.
+    """
+    config_path = get_config_path(repo_path)
+    if not config_path:
+        return {}
+
+    values = read_config(config_path)
+    worktree_path = get_worktree_config_path(repo_path)
+    if worktree_path:
+        values.update(read_config(worktree_path))
+
+    return values
+
+
+def find_submodules(repo_root: str) -> List[str]:
+    """
+    Returns the working directories of the repository's checked-out submodules,
+    including nested submodules, parents first.
+    """
+    out = []
+    gitmodules = read_config(os.path.join(repo_root, ".gitmodules"))
+
+    for key, path in gitmodules.items():
+        if not (key.startswith("submodule.") and key.endswith(".path")):
+            continue
+
+        path = os.path.normpath(os.path.join(repo_root, path))
+        if os.path.exists(os.path.join(path, ".git")):
+            out.append(path)
+            out += find_submodules(path)
+
+    return out
+
+
+def _split_key(key: str) -> Tuple[str, Optional[str], str]:
+    section, _, name = key.rpartition(".")
+    section, _, subsection = section.partition(".")
+    return section.lower(), subsection or None, name.lower()
+
+
+def _is_true(value: Optional[str]) -> bool:
+    return (value or "").lower() in ("true", "yes", "on", "1")
+
+
+def _unquote(value: str) -> str:
+    out, quoted, i = [], False, 0
+
+    while i < len(value):
+        c = value[i]
+        if c == '"':
+            quoted = not quoted
+        elif c == "\\" and i + 1 < len(value):
+            i += 1
+            out.append({"n": "\n", "t": "\t", "b": "\b"}.get(value[i], value[i]))
+        elif c in "#;" and not quoted:
+            break
+        else:
+            out.append(c)
+        i += 1
+
+    return "".join(out).strip() if not quoted else "".join(out)
+
+
+def _quote(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    if escaped != escaped.strip() or any(c in escaped for c in "#;"):
+        return f'"{escaped}"'
+
+    return escaped
+
+
+def read_config(path: str) -> Dict[str, str]:
+    """
+    Parses a Git config file into a dict of 'section[.subsection].key' -> value.
+    Section and key names are lowercased; the last value of a multi-valued key wins.
+    """
+    out = {}
+    prefix = None
+
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return out
+
+    for line in lines:
+        section = _SECTION_RE.match(line)
+        if section:
+            name, subsection = section.group(1).lower(), section.group(2)
+            prefix = f"{name}.{subsection}" if subsection is not None else name
+            continue
+
+        key = _KEY_RE.match(line)
+        if key and prefix:
+            value = key.group(2)
+            out[f"{prefix}.{key.group(1).lower()}"] = "true" if value is None else _unquote(value)
+
+    return out
+
+
+def _set_lines(lines: List[str], values: Dict[str, Optional[str]]) -> None:
+    for key, value in values.items():
+        section, subsection, name = _split_key(key)
+
+        current, section_end, key_line = False, None, None
+        for index, line in enumerate(lines):
+            header = _SECTION_RE.match(line)
+            if header:
+                current = (
+                    header.group(1).lower() == section and header.group(2) == subsection
+                )
+                if current:
+                    section_end = index
+                continue
+
+            if current:
+                section_end = index
+                match = _KEY_RE.match(line)
+                if match and match.group(1).lower() == name:
+                    key_line = index
+
+        if value is None:
+            if key_line is not None:
+                del lines[key_line]
+            continue
+
+        entry = f"\t{key.rpartition('.')[2]} = {_quote(value)}"
+        if key_line is not None:
+            lines[key_line] = entry
+        elif section_end is not None:
+            lines.insert(section_end + 1, entry)
+        else:
+            header = f'[{section} "{subsection}"]' if subsection else f"[{section}]"
+            lines += [header, entry]
+
+
+def write_values(path: str, values: Dict[str, Optional[str]]) -> None:
+    """
+    Sets the given 'section.key' values in a Git config file, keeping everything else
+    (including comments and formatting) as it is. Keys whose value is None are removed.
+
+    Like Git, the lock is taken before the file is read, so a concurrent `git config`
+    either finishes first or fails; its change is never lost.
+    """
+    lock = f"{path}.lock"
+    try:
+        fd = os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        raise ConfigLockedError(f"'{lock}' exists; is another Git process running?")
+
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            try:
+                with open(path, "r", encoding="utf-8") as current:
+                    lines: List[str] = current.read().splitlines()
+            except FileNotFoundError:
+                lines = []
+
+            _set_lines(lines, values)
+            f.write("\n".join(lines) + "\n")
+        os.replace(lock, path)
+    except BaseException:
+        os.remove(lock)
+        raise
@@ -0,0 +1,226 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+The identity check run by GitProf's Git hooks.
+
+This file runs as a standalone script (`python -SIB hook_check.py ...`) on every commit
+and push, so it only uses built-in modules: the match rules are read from a snapshot
+written by `gitprof.hooks.write_snapshot`, and Git's values are passed in by the hook.
+If the config file has changed since the snapshot was written, GitProf is imported to
+rewrite it first.
+
+Exits with 1 if the repository's identity doesn't match the profile selected by the
+match rules, and 0 otherwise (including when no rule matches or there's no snapshot).
+"""
+import marshal
+import os
+import sys
+
+
+def _parse_url(url):
+    """
+    Same as `gitprof.routing.parse_url`, without regular expressions.
+    """
+    url = url.strip()
+
+    scheme, sep, rest = url.partition("://")
+    if sep and scheme[:1].isalpha() and all(c.isalnum() or c in "+.-" for c in scheme):
+        authority, _, path = rest.partition("/")
+        host = authority.rpartition("@")[2].partition(":")[0]
+    else:
+        authority, sep, path = url.partition(":")
+        host = authority.rpartition("@")[2]
+        if not sep or len(host) < 2 or "/" in authority or "\\" in authority:
+            return None
+        if path.startswith("//"):
+            return None
+
+    if not host:
+        return None
+
+    path = path.strip("/")
+    while path.endswith("/"):
+        path = path[:-1]
+    if path.endswith(".git"):
+        path = path[:-4]
+
+    return host.lower(), path
+
+
+def _glob(pattern, text):
+    """
+    Same as `fnmatch.fnmatchcase`, for '*', '?' and '[...]'.
+    """
+    if not pattern:
+        return not text
+
+    char = pattern[0]
+    if char == "*":
+        return any(_glob(pattern[1:], text[i:]) for i in range(len(text) + 1))
+    if not text:
+        return False
+    if char == "?":
+        return _glob(pattern[1:], text[1:])
+    if char == "[":
+        end = pattern.find("]", 2)
+        if end > 0:
+            chars = pattern[1:end]
+            negate = chars.startswith("!")
+            chars = chars[1:] if negate else chars
+            found, i = False, 0
+            while i < len(chars):
+                if i + 2 < len(chars) and chars[i + 1] == "-":
+                    found = found or chars[i] <= text[0] <= chars[i + 2]
+                    i += 3
+                else:
+                    found = found or chars[i] == text[0]
+                    i += 1
+            return found != negate and _glob(pattern[end + 1 :], text[1:])
+
+    return char == text[0] and _glob(pattern[1:], text[1:])
+
+
+def _path_matches(owner, path):
+    if not owner:
+        return True
+
+    depth = owner.count("/") + 1
+    segments = path.split("/")
+    return len(segments) >= depth and _glob(owner, "/".join(segments[:depth]))
+
+
+def resolve(snapshot, url):
+    """
+    Returns the (profile name, rule) pair which matches the URL, or None, like
+    `gitprof.routing.RuleIndex.resolve`.
+    """
+    parsed = _parse_url(url)
+
+    if parsed:
+        host, path = parsed
+        for owner, rule, profile in snapshot["hosts"].get(host, ()):
+            if _path_matches(owner, path):
+                return profile, rule
+
+        for host_glob, owner, rule, profile in snapshot["host_globs"]:
+            if _glob(host_glob, host) and _path_matches(owner, path):
+                return profile, rule
+
+    if snapshot["regexes"]:
+        import re
+
+        for pattern, rule, profile in snapshot["regexes"]:
+            if re.search(pattern, url):
+                return profile, rule
+
+    return None
+
+
+def check(snapshot, ident, ssh_command, url):
+    """
+    Returns the profile selected for the URL (or None) and a list of the ways the
+    identity Git will use differs from it.
+    """
+    match = resolve(snapshot, url) if url else None
+    if not match or match[0] not in snapshot["profiles"]:
+        return None, []
+
+    name, rule = match
+    email, expected_ssh = snapshot["profiles"][name]
+    actual_email = ident.rpartition("<")[2].partition(">")[0] if "<" in ident else ident
+    problems = []
+
+    if email and actual_email != email:
+        problems.append(f"user.email is '{actual_email}' instead of '{email}'")
+
+    if expected_ssh and not (
+        ssh_command == expected_ssh or ssh_command.startswith(expected_ssh + " ")
+    ):
+        problems.append(
+            f"the SSH command is '{ssh_command}' instead of '{expected_ssh}'"
+        )
+
+    return match, problems
+
+
+def _load(snapshot_path):
+    try:
+        with open(snapshot_path, "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _is_stale(snapshot):
+    config_file, stamp = snapshot.get("config", ("", None))
+    try:
+        return os.stat(config_file).st_mtime_ns != stamp
+    except OSError:
+        return stamp != 0
+
+
+def _refresh():
+    """
+    Rewrites the snapshot from the config. The snapshot is only rewritten by GitProf
+    when it saves the config, so this catches edits made with `gitprof config edit` or
+    by hand.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        from gitprof import hooks
+
+        hooks.write_snapshot()
+    except Exception as e:
+        sys.stderr.write(f"gitprof: failed to update the match rules, using the old ones: {e}\n")
+
+
+def main(argv):
+    """
+    Arguments: HOOK SNAPSHOT IDENT SSH_COMMAND URL, where IDENT is the output of
+    `git var GIT_AUTHOR_IDENT`.
+    """
+    hook, snapshot_path, ident, ssh_command, url = argv
+
+    snapshot = _load(snapshot_path)
+    if snapshot and _is_stale(snapshot):
+        _refresh()
+        snapshot = _load(snapshot_path)
+
+    if not snapshot:
+        return 0
+
+    match, problems = check(snapshot, ident, ssh_command, url)
+    if not problems:
+        return 0
+
+    name, rule = match
+    sys.stderr.write(
+        f"gitprof: stopping {hook}: '{url}' matches rule '{rule}' of profile '{name}', but\n"
+        + "".join(f"  - {p}\n" for p in problems)
+        + f"Run 'gitprof profile apply -p {name}' to fix this repository, "
+        f"or use --no-verify to skip this check.\n"
+    )
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,207 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Git hooks which stop commits and pushes made with the wrong identity.
+
+The hooks are small shell scripts which pass Git's values to `gitprof/hook_check.py`.
+That script runs without site-packages and reads the match rules from a marshal
+snapshot, so the check costs milliseconds rather than a full GitProf start. The snapshot
+is rewritten whenever the config is saved, and by the hook itself if the config file has
+changed since, e.g. after `gitprof config edit`.
+"""
+import marshal
+import os
+import shlex
+import stat
+import sys
+from typing import List
+
+from gitprof import files
+from gitprof import gitconfig
+from gitprof import process
+from gitprof import ssh
+from gitprof.exceptions import GitProfError, NotARepositoryError
+
+HOOKS = ("pre-commit", "pre-push")
+MARKER = "# Installed by GitProf"
+
+snapshot_file = os.path.join(files.cache_dir, "hook-rules.marshal")
+global_hooks_dir = os.path.join(files.config_dir, "hooks")
+check_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hook_check.py")
+
+_TEMPLATE = """#!/bin/sh
+{marker}: checks that this repository uses the profile selected by
+# GitProf's match rules. Remove with 'gitprof hook uninstall{flag}'.
+url={url}
+{python} -SIB {script} {hook} {snapshot} \\
+    "$(git var GIT_AUTHOR_IDENT 2>/dev/null)" \\
+    "${{GIT_SSH_COMMAND:-$(git config core.sshCommand)}}" "$url"
+[ $? -eq 1 ] && exit 1
+{chain}exit 0
+"""
+
+# Global hooks replace each repository's own hooks, so they run them afterwards.
+_CHAIN = """hook="$(git rev-parse --git-common-dir)/hooks/{hook}"
+if [ -x "$hook" ]; then exec "$hook" "$@"; fi
+"""
+
+
+class HookError(GitProfError):
+    pass
+
+
+def _stamp(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def write_snapshot(config: files.Config = None) -> None:
+    """
+    Writes the match rules and each profile's identity in the form read by
+    `hook_check.py`.
+    """
+    config = config or files.Config()
+    snapshot = config.get_rule_index().serialise()
+    snapshot["config"] = (files.config_file, _stamp(files.config_file))
+    snapshot["profiles"] = {
+        p.name: (p.git_email or "", ssh.get_ssh_command(p.ssh_key) if p.ssh_key else "")
+        for p in config.iter_profiles()
+    }
+
+    os.makedirs(os.path.dirname(snapshot_file), exist_ok=True)
+    temp = f"{snapshot_file}.tmp"
+    with open(temp, "wb") as f:
+        marshal.dump(snapshot, f)
+    os.replace(temp, snapshot_file)
+
+
+def refresh_snapshot(config: files.Config) -> None:
+    """
+    Rewrites the snapshot if hooks have been installed.
+    """
+    if os.path.exists(snapshot_file):
+        write_snapshot(config)
+
+
+def _get_global_hooks_path() -> str:
+    return process.run(["git", "config", "--global", "--get", "core.hooksPath"]).stdout.strip()
+
+
+def get_hooks_dir(repo_path: str) -> str:
+    git_dir = gitconfig.find_git_dir(repo_path)
+    if not git_dir:
+        raise NotARepositoryError(repo_path)
+
+    common_dir = gitconfig.get_common_dir(git_dir)
+    hooks_path = gitconfig.read_config(os.path.join(common_dir, "config")).get("core.hookspath")
+    if hooks_path:
+        return os.path.join(gitconfig.find_repo_root(repo_path), os.path.expanduser(hooks_path))
+
+    return os.path.join(common_dir, "hooks")
+
+
+def _is_ours(path: str) -> bool:
+    try:
+        with open(path, "r", errors="replace") as f:
+            return MARKER in f.read(512)
+    except OSError:
+        return False
+
+
+def _write_hooks(hooks_dir: str, is_global: bool, force: bool) -> List[str]:
+    existing = [
+        h for h in HOOKS
+        if os.path.exists(os.path.join(hooks_dir, h)) and not _is_ours(os.path.join(hooks_dir, h))
+    ]
+    if existing and not force:
+        raise HookError(
+            f"'{hooks_dir}' already has hooks which weren't installed by GitProf "
+            f"({', '.join(existing)}). Use --force to replace them."
+        )
+
+    os.makedirs(hooks_dir, exist_ok=True)
+    written = []
+
+    for hook in HOOKS:
+        path = os.path.join(hooks_dir, hook)
+        with open(path, "w", newline="\n") as f:
+            f.write(
+                _TEMPLATE.format(
+                    marker=MARKER,
+                    flag=" --global" if is_global else "",
+                    url='"$2"' if hook == "pre-push" else '"$(git config remote.origin.url)"',
+                    python=shlex.quote(sys.executable),
+                    script=shlex.quote(check_script),
+                    hook=hook,
+                    snapshot=shlex.quote(snapshot_file),
+                    chain=_CHAIN.format(hook=hook) if is_global else "",
+                )
+            )
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        written.append(path)
+
+    return written
+
+
+def install(repo_path: str = ".", is_global: bool = False, force: bool = False) -> List[str]:
+    """
+    Installs the hooks in a repository, or for all repositories by setting Git's global
+    core.hooksPath. Returns the paths of the hooks written.
+    """
+    if is_global:
+        hooks_path = _get_global_hooks_path()
+        if hooks_path and os.path.abspath(os.path.expanduser(hooks_path)) != global_hooks_dir:
+            if not force:
+                raise HookError(
+                    f"Git's global core.hooksPath is already set to '{hooks_path}'. "
+                    f"Use --force to replace it."
+                )
+
+        written = _write_hooks(global_hooks_dir, True, force)
+        process.run(["git", "config", "--global", "core.hooksPath", global_hooks_dir]).check()
+    else:
+        written = _write_hooks(get_hooks_dir(repo_path), False, force)
+
+    write_snapshot()
+    return written
+
+
+def uninstall(repo_path: str = ".", is_global: bool = False) -> List[str]:
+    """
+    Removes hooks installed by GitProf. Returns the paths of the hooks removed.
+    """
+    hooks_dir = global_hooks_dir if is_global else get_hooks_dir(repo_path)
+    removed = []
+
+    for hook in HOOKS:
+        path = os.path.join(hooks_dir, hook)
+        if _is_ours(path):
+            os.remove(path)
+            removed.append(path)
+
+    hooks_path = _get_global_hooks_path() if is_global else ""
+    if hooks_path and os.path.abspath(os.path.expanduser(hooks_path)) == global_hooks_dir:
+        process.run(["git", "config", "--global", "--unset", "core.hooksPath"]).check()
+
+    return removed
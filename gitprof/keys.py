@@ -0,0 +1,123 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Generating SSH keys in bulk.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+from gitprof import process
+from gitprof import ssh
+from gitprof.exceptions import ProfileExistsError, SSHKeyError
+from gitprof.files import Config, Profile
+from gitprof.profiles import create_profile
+
+
+@dataclass
+class KeyResult:
+    name: str
+    path: str
+    returncode: int
+    duration: float
+    output: str = ""
+    public_key: str = ""
+    profile: Optional[Profile] = field(default=None, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+def create_ssh_keys(
+    names: Iterable[str],
+    passphrase: str = "",
+    jobs: int = None,
+    key_dir: str = None,
+    create_profiles: bool = False,
+    service: str = None,
+    callback: Callable[[KeyResult], None] = None,
+    config: Config = None,
+) -> List[KeyResult]:
+    """
+    Generates an ed25519 key for each name in `key_dir` (default: ~/.ssh), running up
+    to `jobs` ssh-keygen processes at once (default: one per CPU).
+
+    If `create_profiles` is True, a profile with the same name is created for each new
+    key, and the config is saved once at the end. Nothing is generated if any key file
+    or profile already exists; per-key failures are reported in the results.
+    """
+    names = list(names)
+    key_dir = key_dir or ssh.ssh_dir
+    if "\n" in passphrase or "\r" in passphrase:
+        raise SSHKeyError("The passphrase can't contain line breaks.")
+    config = config or (Config() if create_profiles else None)
+
+    seen = set()
+    for name in names:
+        if not name or re.search(r"[\s/\\]", name):
+            raise SSHKeyError(f"'{name}' isn't a valid key name.")
+        if name in seen:
+            raise SSHKeyError(f"The key '{name}' is listed more than once.")
+        seen.add(name)
+
+        path = os.path.join(key_dir, name)
+        if os.path.exists(path) or os.path.exists(path + ".pub"):
+            raise SSHKeyError(f"An SSH key already exists at '{path}'.")
+        if create_profiles and config.get_profile(name):
+            raise ProfileExistsError(name)
+
+    os.makedirs(key_dir, exist_ok=True)
+
+    async def do_one(name: str) -> KeyResult:
+        path = os.path.join(key_dir, name)
+        keygen = await process.run_async(
+            ssh.get_keygen_command(path, comment=name),
+            input=ssh.get_keygen_input(passphrase),
+            env=ssh.get_keygen_env(),
+            stderr=process.STDOUT,
+            detach=True,
+        )
+
+        result = KeyResult(
+            name, ssh.fully_normalise_path(path), keygen.returncode, keygen.duration, keygen.stdout
+        )
+        if result.ok:
+            result.public_key = ssh.get_public_key(path).strip()
+
+        if callback:
+            callback(result)
+
+        return result
+
+    results = process.run_all(do_one, names, jobs)
+
+    if create_profiles and any(r.ok for r in results):
+        for result in results:
+            if result.ok:
+                result.profile = create_profile(
+                    result.name, result.path, service=service, config=config, save=False
+                )
+        config.save()
+
+    return results
@@ -0,0 +1,249 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Keeping repositories fast with Git's own maintenance tasks.
+
+The time each repository was last maintained is kept in the cache, so `gitprof
+maintain` can be run often (e.g. from cron) and only does work where it's due.
+Linked worktrees share their repository's objects, so they're maintained once.
+"""
+import json
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from gitprof import files
+from gitprof import gitconfig
+from gitprof import metrics
+from gitprof import process
+from gitprof.exceptions import NotARepositoryError
+
+state_file = os.path.join(files.cache_dir, "maintenance.json")
+
+DEFAULT_INTERVAL = 24 * 3600
+DEFAULT_NICE = 10
+
+# The `git maintenance run` tasks to run, with the Git version which added each one.
+TASKS = {
+    "commit-graph": (2, 29),
+    "loose-objects": (2, 30),
+    "incremental-repack": (2, 30),
+    "pack-refs": (2, 42),
+}
+
+REPACK_TASK = "incremental-repack"
+PACK_HASH = re.compile(r"^[0-9a-f]{40}([0-9a-f]{24})?\s*$")
+
+_git_version: Optional[Tuple[int, ...]] = None
+
+
+def get_git_version() -> Tuple[int, ...]:
+    global _git_version
+
+    if _git_version is None:
+        match = re.search(r"(\d+)\.(\d+)", process.run(["git", "version"]).stdout)
+        _git_version = tuple(int(n) for n in match.groups()) if match else (0, 0)
+
+    return _git_version
+
+
+def get_priority_prefix(nice: int = None, idle_io: bool = False) -> List[str]:
+    """
+    Returns a command prefix which runs a command at a lower CPU and I/O priority,
+    using `nice` and `ionice` where they're available.
+    """
+    prefix = []
+    if idle_io and shutil.which("ionice"):
+        prefix += ["ionice", "-c", "3"]
+    if nice and shutil.which("nice"):
+        prefix += ["nice", "-n", str(nice)]
+
+    return prefix
+
+
+def get_commands(repo: str, gc: bool = False, prefix: List[str] = ()) -> List[List[str]]:
+    """
+    Returns the commands which maintain a repository: the `git maintenance run` tasks
+    this version of Git supports, or `git gc --auto` if `gc` is True or it has none.
+
+    `incremental-repack` fails in a repository without any packs, so it runs last, on
+    its own, after `loose-objects` has packed the loose objects (see `is_repack`).
+    """
+    git = [*prefix, "git", "-C", repo]
+    version = get_git_version()
+    tasks = [task for task, added in TASKS.items() if version >= added]
+
+    if gc or REPACK_TASK not in tasks:
+        return [git + ["gc", "--auto", "--quiet"]]
+
+    tasks.remove(REPACK_TASK)
+    commands = [git + ["maintenance", "run", "--quiet"] + [f"--task={t}" for t in tasks]]
+    if "pack-refs" not in tasks:
+        commands.append(git + ["pack-refs", "--all"])
+    commands.append(git + ["maintenance", "run", "--quiet", f"--task={REPACK_TASK}"])
+
+    return commands
+
+
+def is_repack(command: List[str]) -> bool:
+    """
+    Whether a command from `get_commands` runs `incremental-repack`, which should be
+    skipped unless `has_packs`.
+    """
+    return f"--task={REPACK_TASK}" in command
+
+
+def has_packs(common_dir: str) -> bool:
+    try:
+        names = os.listdir(os.path.join(common_dir, "objects", "pack"))
+    except OSError:
+        return False
+
+    return any(name.endswith(".pack") for name in names)
+
+
+def clean_output(output: str) -> str:
+    """
+    Removes the bare pack hashes which `git pack-objects` prints during maintenance.
+    """
+    return "".join(line for line in output.splitlines(True) if not PACK_HASH.match(line))
+
+
+class MaintenanceState:
+    """
+    When each repository (keyed by its common Git directory) was last maintained.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or state_file
+        self.last_run: Dict[str, float] = {}
+
+        try:
+            with open(self.path, "r") as f:
+                self.last_run = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def is_due(self, git_dir: str, interval: float, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        return now - self.last_run.get(git_dir, 0) >= interval
+
+    def mark(self, git_dir: str, now: float = None) -> None:
+        self.last_run[git_dir] = time.time() if now is None else now
+
+    def save(self) -> None:
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp, "w") as f:
+            json.dump(self.last_run, f, separators=(",", ":"))
+        os.replace(temp, self.path)
+
+
+@dataclass
+class MaintainResult:
+    repo: str
+    returncode: int
+    duration: float
+    size_before: int = 0
+    size_after: int = 0
+    skipped: bool = False
+    output: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+    @property
+    def reclaimed(self) -> int:
+        return self.size_before - self.size_after
+
+
+def maintain(
+    paths: Iterable[str],
+    jobs: int = None,
+    interval: float = DEFAULT_INTERVAL,
+    force: bool = False,
+    gc: bool = False,
+    nice: int = DEFAULT_NICE,
+    idle_io: bool = True,
+    callback: Callable[[MaintainResult], None] = None,
+) -> List[MaintainResult]:
+    """
+    Runs Git's maintenance tasks (see `get_commands`) in each repository,
+    up to `jobs` at once (default: half the CPUs), at a lower CPU and I/O priority.
+
+    Repositories maintained less than `interval` seconds ago are skipped unless `force`
+    is True; they're included in the results with `skipped` set.
+    """
+    state = MaintenanceState()
+    prefix = get_priority_prefix(nice, idle_io)
+
+    results, due, seen = [], [], set()
+    for path in paths:
+        git_dir = gitconfig.find_git_dir(path)
+        if not git_dir:
+            raise NotARepositoryError(path)
+
+        common_dir = gitconfig.get_common_dir(git_dir)
+        if common_dir in seen:
+            continue
+        seen.add(common_dir)
+
+        path = os.path.abspath(path)
+        if force or state.is_due(common_dir, interval):
+            due.append((path, common_dir, get_commands(path, gc, prefix)))
+        else:
+            results.append(MaintainResult(path, 0, 0.0, skipped=True))
+
+    async def do_one(item) -> MaintainResult:
+        repo, common_dir, commands = item
+        objects = os.path.join(common_dir, "objects")
+        result = MaintainResult(repo, 0, 0.0, size_before=metrics.dir_size(objects))
+
+        for command in commands:
+            if is_repack(command) and not has_packs(common_dir):
+                continue
+
+            done = await process.run_async(command, stderr=process.STDOUT)
+            result.returncode = done.returncode
+            result.duration += done.duration
+            result.output += clean_output(done.stdout)
+            if not done.ok:
+                break
+
+        result.size_after = metrics.dir_size(objects)
+        if result.ok:
+            state.mark(common_dir)
+        metrics.record("maintain", None, None, result.duration, result.returncode, repo=repo)
+
+        if callback:
+            callback(result)
+
+        return result
+
+    results += process.run_all(do_one, due, jobs or max((os.cpu_count() or 2) // 2, 1))
+    if due:
+        state.save()
+
+    return results
@@ -0,0 +1,196 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Local log of operation metrics.
+
+One JSON line is appended per clone/apply. The log is rotated once it reaches
+`MAX_BYTES`, keeping `BACKUPS` old files, so its size is bounded. Writers from every
+GitProf process take a lock file, so concurrent runs don't rotate the log twice.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from gitprof import files
+from gitprof import routing
+
+metrics_file = os.path.join(files.cache_dir, "metrics.log")
+lock_file = os.path.join(files.cache_dir, "metrics.lock")
+
+MAX_BYTES = 1024 * 1024
+BACKUPS = 3
+
+_lock = threading.Lock()
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for directory, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_size
+            except OSError:
+                pass
+
+    return total
+
+
+def _rotate() -> None:
+    for i in range(BACKUPS - 1, 0, -1):
+        older = f"{metrics_file}.{i}"
+        if os.path.exists(older):
+            os.replace(older, f"{metrics_file}.{i + 1}")
+
+    os.replace(metrics_file, f"{metrics_file}.1")
+
+
+@contextmanager
+def _locked():
+    """
+    Holds the log's lock, shared between threads and, where fcntl exists, processes.
+    """
+    with _lock:
+        if not fcntl:
+            yield
+            return
+
+        with open(lock_file, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+
+def record(
+    op: str,
+    profile: Optional[str],
+    url: Optional[str],
+    duration: float,
+    status: int,
+    repo_size: int = None,
+    repo: str = None,
+) -> None:
+    """
+    Appends a record to the metrics log. `repo_size` is the size of the repository's
+    objects afterwards. Failing to write metrics is never an error.
+    """
+    entry = {
+        "t": round(time.time(), 3),
+        "op": op,
+        "p": profile,
+        "h": routing.get_host(url) if url else None,
+        "r": repo or url,
+        "d": round(duration, 4),
+        "s": status,
+    }
+    if repo_size is not None:
+        entry["rs"] = repo_size
+
+    line = json.dumps(entry, separators=(",", ":")) + "\n"
+
+    try:
+        with _locked():
+            if os.path.exists(metrics_file) and os.path.getsize(metrics_file) >= MAX_BYTES:
+                _rotate()
+
+            with open(metrics_file, "a") as f:
+                f.write(line)
+    except OSError:
+        pass
+
+
+def load() -> Iterator[Dict]:
+    """
+    Yields every record in the log, oldest first.
+    """
+    paths = [f"{metrics_file}.{i}" for i in range(BACKUPS, 0, -1)] + [metrics_file]
+
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of `values`, which must be sorted.
+    """
+    if not values:
+        return 0.0
+
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class Summary:
+    __slots__ = ("key", "count", "failures", "durations", "repo_size")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.count = 0
+        self.failures = 0
+        self.durations: List[float] = []
+        self.repo_size = 0
+
+    def add(self, entry: Dict) -> None:
+        self.count += 1
+        self.failures += entry.get("s") != 0
+        self.durations.append(entry.get("d", 0.0))
+        self.repo_size += entry.get("rs") or 0
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.count if self.count else 0.0
+
+    def p50(self) -> float:
+        return percentile(sorted(self.durations), 0.5)
+
+    def p95(self) -> float:
+        return percentile(sorted(self.durations), 0.95)
+
+
+def summarise(entries, field: str, op: str = None) -> List[Summary]:
+    """
+    Groups records by `field` ('h' for host, 'p' for profile, 'r' for repository).
+    """
+    groups: Dict[str, Summary] = {}
+
+    for entry in entries:
+        if op and entry.get("op") != op:
+            continue
+
+        key = entry.get(field) or "-"
+        groups.setdefault(key, Summary(key)).add(entry)
+
+    return sorted(groups.values(), key=lambda s: s.p95(), reverse=True)
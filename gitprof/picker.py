@@ -0,0 +1,212 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Interactive "filter as you type" picker for long lists of options.
+"""
+import os
+import re
+import select
+import string
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from gitprof import os_utils
+
+MAX_VISIBLE = 10
+
+_WORD_START = "\x01"
+_ALNUM_NEWLINE = set(string.ascii_lowercase + string.digits + "\n")
+
+
+def _mark(text: str) -> str:
+    """
+    Inserts a marker after each non-alphanumeric character, so that "the query starts
+    a word" becomes a plain substring test: 'my-work' -> 'my-\x01work'.
+    """
+    for char in set(text) - _ALNUM_NEWLINE:
+        text = text.replace(char, char + _WORD_START)
+
+    return text
+
+
+class FuzzyIndex:
+    """
+    Index of options for fast, incremental filtering.
+
+    Lowercased copies of the options are computed up front, along with copies marked
+    at word boundaries so ranking is done with plain substring tests. Results are kept
+    for each prefix of the current query, so typing another character (or deleting
+    one) only checks the options which matched before. If no option contains the
+    query, options are matched as subsequences (e.g. 'gwk' matches 'github-work').
+    """
+
+    def __init__(self, options: List[str]):
+        self.options = options
+        self.lowered = [o.lower().replace("\n", " ") for o in options]
+
+        marked = _mark("\n".join(self.lowered)).split("\n")
+        self.bounded = [_WORD_START + o for o in marked]
+
+        self._results: Dict[str, List[int]] = {}
+        self._subsequences: Dict[str, List[int]] = {}
+
+    def _candidates(self, results: Dict[str, List[int]], query: str) -> Iterable[int]:
+        for length in range(len(query) - 1, 0, -1):
+            previous = results.get(query[:length])
+            if previous is not None:
+                return previous
+
+        return range(len(self.options))
+
+    def _rank(self, matches: List[int], query: str, limit: int) -> List[int]:
+        """
+        Orders matches: options starting with the query, then options where it starts
+        a word, then the rest, stopping once `limit` options have been found.
+        """
+        marked, bounded = _mark(query), self.bounded
+        starts_word = _WORD_START + marked
+
+        ranked = [i for i in matches if bounded[i].startswith(starts_word)][:limit]
+        if len(ranked) < limit:
+            chosen = set(ranked)
+            ranked += [
+                i for i in matches if i not in chosen and starts_word in bounded[i]
+            ][: limit - len(ranked)]
+        if len(ranked) < limit:
+            chosen = set(ranked)
+            ranked += [i for i in matches if i not in chosen][: limit - len(ranked)]
+
+        return ranked
+
+    def search(self, query: str, limit: int = None) -> List[int]:
+        """
+        Returns the indices of matching options, best first.
+        """
+        query = query.lower()
+        limit = limit or len(self.options)
+
+        if not query:
+            return list(range(min(limit, len(self.options))))
+
+        self._results = {q: r for q, r in self._results.items() if query.startswith(q)}
+        self._subsequences = {
+            q: r for q, r in self._subsequences.items() if query.startswith(q)
+        }
+        lowered = self.lowered
+
+        matches = self._results.get(query)
+        if matches is None:
+            candidates = self._candidates(self._results, query)
+            matches = [i for i in candidates if query in lowered[i]]
+            self._results[query] = matches
+
+        if matches:
+            return self._rank(matches, query, limit)
+
+        matches = self._subsequences.get(query)
+        if matches is None:
+            parts = [re.escape(query[0])]
+            parts += [f"[^{re.escape(c)}]*{re.escape(c)}" for c in query[1:]]
+            search = re.compile("".join(parts)).search
+            candidates = self._candidates(self._subsequences, query)
+            matches = [i for i in candidates if search(lowered[i])]
+            self._subsequences[query] = matches
+
+        return matches[:limit]
+
+
+def is_supported() -> bool:
+    return not os_utils.is_windows() and sys.stdin.isatty() and sys.stdout.isatty()
+
+
+def _read_key(fd: int) -> str:
+    key = os.read(fd, 1).decode(errors="ignore")
+
+    if key == "\x1b":
+        if not select.select([fd], [], [], 0.05)[0]:
+            return "escape"
+        sequence = os.read(fd, 2).decode(errors="ignore")
+        return {"[A": "up", "[B": "down"}.get(sequence, "escape")
+
+    return key
+
+
+def pick(title: str, options: List[str], pinned: int = None, default: int = None) -> Optional[int]:
+    """
+    Shows the picker and returns the index of the chosen option, or None if cancelled.
+    The `pinned` option (e.g. a fallback) is always shown below the matches, and the
+    `default` option is selected (and shown) until something is typed.
+    """
+    import termios
+    import tty
+
+    index = FuzzyIndex(options)
+    fd = sys.stdin.fileno()
+    saved = termios.tcgetattr(fd)
+
+    query, selected, drawn = "", None, 0
+    out = sys.stdout
+
+    try:
+        tty.setcbreak(fd)
+        out.write(f"\n### {title} ###  (type to filter, arrows to move, Enter to choose)\n")
+
+        while True:
+            matches = [i for i in index.search(query, MAX_VISIBLE + 1) if i != pinned]
+            if not query and default not in (None, pinned) and default not in matches:
+                matches.insert(0, default)
+            matches = matches[:MAX_VISIBLE]
+            if pinned is not None:
+                matches.append(pinned)
+            if selected is None:
+                selected = matches.index(default) if default in matches else 0
+            selected = min(selected, max(len(matches) - 1, 0))
+
+            lines = [f"> {query}"] + [
+                f"{'>' if row == selected else ' '} {options[i]}"
+                for row, i in enumerate(matches)
+            ]
+            if drawn:
+                out.write(f"\x1b[{drawn}F")
+            out.write("".join(f"\x1b[2K{line}\n" for line in lines))
+            out.write("\x1b[J")
+            out.flush()
+            drawn = len(lines)
+
+            key = _read_key(fd)
+            if key in ("\r", "\n"):
+                return matches[selected] if matches else None
+            elif key in ("\x03", "\x04", "escape"):
+                return None
+            elif key == "up":
+                selected = max(selected - 1, 0)
+            elif key == "down":
+                selected = min(selected + 1, len(matches) - 1)
+            elif key in ("\x7f", "\b"):
+                query, selected = query[:-1], 0
+            elif key == "\x15":
+                query, selected = "", 0
+            elif key.isprintable():
+                query, selected = query + key, 0
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+        out.write("\n")
@@ -0,0 +1,170 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Checking that remotes can be read with their profiles, without cloning them.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Union
+
+from gitprof import agent
+from gitprof import process
+from gitprof import routing
+from gitprof import scheduler
+from gitprof import ssh
+from gitprof.files import Config
+from gitprof.profiles import ProfileLike, choose_profiles
+from gitprof.retry import is_transient_failure
+
+
+PROBE_OK = "ok"
+
+
+PROBE_DENIED = "denied"
+
+
+PROBE_NOT_FOUND = "not found"
+
+
+PROBE_UNREACHABLE = "unreachable"
+
+
+PROBE_TIMEOUT = "timed out"
+
+
+PROBE_LOCKED = "key locked"
+
+
+PROBE_ERROR = "error"
+
+
+# Messages from git, ssh and Git hosts for probes which failed for good.
+PROBE_DENIED_ERRORS = re.compile(
+    r"permission denied|authentication failed|access denied|could not read (username|password)"
+    r"|returned error: 40[13]",
+    re.IGNORECASE,
+)
+
+
+PROBE_NOT_FOUND_ERRORS = re.compile(
+    r"not found|does not appear to be a git repository|does not exist|no such file"
+    r"|returned error: 404",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class ProbeResult:
+    url: str
+    profile: str
+    status: str
+    duration: float
+    output: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status == PROBE_OK
+
+    @property
+    def host(self) -> str:
+        return routing.get_host(self.url)
+
+
+def classify_probe(returncode: int, output: str, timed_out: bool = False) -> str:
+    """
+    Returns a probe's status (one of the PROBE_* values) from `git ls-remote`'s exit
+    code and error output.
+    """
+    if timed_out:
+        return PROBE_TIMEOUT
+    if returncode == 0:
+        return PROBE_OK
+    if PROBE_DENIED_ERRORS.search(output):
+        return PROBE_DENIED
+    if PROBE_NOT_FOUND_ERRORS.search(output):
+        return PROBE_NOT_FOUND
+    if is_transient_failure(output):
+        return PROBE_UNREACHABLE
+
+    return PROBE_ERROR
+
+
+def check_access(
+    urls: Union[str, Iterable[str]],
+    profile: ProfileLike = None,
+    fallback: ProfileLike = None,
+    jobs: int = 16,
+    timeout: float = 30.0,
+    multiplex: bool = False,
+    callback: Callable[[ProbeResult], None] = None,
+    config: Config = None,
+    per_host: int = None,
+    progress: Callable[[scheduler.Scheduler], None] = None,
+) -> List[ProbeResult]:
+    """
+    Checks that each URL can be read with its profile (chosen as in `cloning.clone`),
+    running up to `jobs` `git ls-remote` probes at once (see `scheduler.run_scheduled`
+    for `per_host` and `progress`). Probes never prompt: a key which needs a passphrase
+    and isn't in GitProf's agent is reported as locked rather than denied.
+
+    With `multiplex`, the probes leave shared SSH connections open for a following
+    `cloning.clone(multiplex=True)` to reuse.
+    """
+    plan = choose_profiles(urls, profile, fallback, config)
+    ssh_commands = {
+        p.name: ssh.get_ssh_command(p.ssh_key, agent.get_socket_for(p.ssh_key), multiplex)
+        + " -o BatchMode=yes"
+        for _, p in plan
+    }
+    locked = {
+        p.name
+        for p in {p.name: p for _, p in plan}.values()
+        if not agent.get_socket_for(p.ssh_key) and ssh.needs_passphrase(p.ssh_key)
+    }
+
+    async def do_one(item) -> ProbeResult:
+        url, p = item
+        env = dict(os.environ, GIT_SSH_COMMAND=ssh_commands[p.name], GIT_TERMINAL_PROMPT="0")
+        probe = await process.run_async(
+            ["git", "ls-remote", url, "HEAD"], env=env, stdout=process.DEVNULL, timeout=timeout
+        )
+
+        status = classify_probe(probe.returncode, probe.stderr, probe.timed_out)
+        if status == PROBE_DENIED and p.name in locked:
+            status = PROBE_LOCKED
+
+        result = ProbeResult(url, p.name, status, probe.duration, probe.stderr)
+        if callback:
+            callback(result)
+
+        return result
+
+    return scheduler.run_scheduled(
+        do_one,
+        plan,
+        key=lambda item: (routing.get_host(item[0]), item[1].name),
+        failed=lambda r: r.status in (PROBE_UNREACHABLE, PROBE_TIMEOUT),
+        jobs=jobs,
+        per_host=per_host,
+        progress=progress,
+    )
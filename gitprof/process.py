@@ -0,0 +1,299 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Running external commands.
+
+Commands are argv lists run without a shell, on asyncio subprocesses, with optional
+timeouts and bounded concurrency. Each call is timed (see `gitprof.timings`). Use `run`
+from ordinary code, and `run_async` with `map_bounded`/`run_all` to run many commands
+at once, or `run_sync` to run any coroutine from synchronous code.
+"""
+import asyncio
+import atexit
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+from gitprof import timings
+from gitprof.exceptions import GitCommandError
+
+PIPE = asyncio.subprocess.PIPE
+STDOUT = asyncio.subprocess.STDOUT
+DEVNULL = asyncio.subprocess.DEVNULL
+# Pass INHERIT as stdin/stdout/stderr to use GitProf's own, e.g. for interactive commands.
+INHERIT = None
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_setup_done = False
+
+
+@dataclass
+class ProcessResult:
+    args: List[str]
+    returncode: Optional[int]
+    stdout: str = ""
+    stderr: str = ""
+    duration: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def check(self) -> "ProcessResult":
+        """
+        Raises GitCommandError unless the command succeeded.
+        """
+        if self.timed_out:
+            message = f"'{' '.join(self.args)}' timed out after {self.duration:.1f}s."
+        elif self.returncode != 0:
+            message = f"'{' '.join(self.args)}' failed with exit code {self.returncode}."
+        else:
+            return self
+
+        raise GitCommandError(message, self.args, self.returncode, self.stderr or self.stdout)
+
+
+def _decode(data: Optional[bytes]) -> str:
+    return data.decode("utf-8", errors="replace") if data else ""
+
+
+def _kill(process: asyncio.subprocess.Process) -> None:
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def _read(stream: Optional[asyncio.StreamReader], echo) -> bytes:
+    if stream is None:
+        return b""
+
+    chunks = []
+    while True:
+        chunk = await stream.read(4096)
+        if not chunk:
+            return b"".join(chunks)
+
+        chunks.append(chunk)
+        if echo:
+            echo.write(chunk)
+            echo.flush()
+
+
+async def _communicate_echo(process: asyncio.subprocess.Process, input: Optional[bytes]):
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    if input is not None:
+        process.stdin.write(input)
+        await process.stdin.drain()
+        process.stdin.close()
+
+    out, err = await asyncio.gather(
+        _read(process.stdout, sys.stdout.buffer), _read(process.stderr, sys.stderr.buffer)
+    )
+    await process.wait()
+    return out, err
+
+
+async def run_async(
+    args: Sequence[str],
+    input: str = None,
+    stdin=DEVNULL,
+    stdout=PIPE,
+    stderr=PIPE,
+    env: Dict[str, str] = None,
+    cwd: str = None,
+    timeout: float = None,
+    echo: bool = False,
+    detach: bool = False,
+) -> ProcessResult:
+    """
+    Runs a command, returning its exit code and any captured output. The process is
+    killed if it takes longer than `timeout` seconds or the calling task is cancelled.
+    Raises GitCommandError if the command can't be started.
+
+    With `echo`, captured output is also shown on GitProf's stdout/stderr as it arrives.
+    With `detach`, the command runs in a new session without a controlling terminal
+    (on POSIX), so it can't prompt on the terminal.
+    """
+    args = [str(a) for a in args]
+    start = time.perf_counter()
+
+    with timings.span(os.path.basename(args[0]), category="subprocess", command=" ".join(args)):
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=PIPE if input is not None else stdin,
+                stdout=stdout,
+                stderr=stderr,
+                env=env,
+                cwd=cwd,
+                start_new_session=detach,
+            )
+        except OSError as e:
+            raise GitCommandError(f"Can't run '{args[0]}': {e.strerror}.", args)
+
+        out, err, timed_out = None, None, False
+        try:
+            communicate = _communicate_echo if echo else lambda p, i: p.communicate(i)
+            out, err = await asyncio.wait_for(
+                communicate(process, input.encode() if input is not None else None), timeout
+            )
+        except asyncio.TimeoutError:
+            timed_out = True
+            _kill(process)
+            await process.wait()
+        except asyncio.CancelledError:
+            _kill(process)
+            await process.wait()
+            raise
+
+    return ProcessResult(
+        args, process.returncode, _decode(out), _decode(err), time.perf_counter() - start, timed_out
+    )
+
+
+async def map_bounded(
+    func: Callable[[T], Awaitable[R]], items: Iterable[T], jobs: int = None
+) -> List[R]:
+    """
+    Awaits `func(item)` for each item, at most `jobs` at once (default: one per CPU),
+    returning the results in order. If one call fails, the others are cancelled.
+    """
+    items = list(items)
+    limit = asyncio.Semaphore(max(jobs or os.cpu_count() or 1, 1))
+
+    async def bounded(item: T) -> R:
+        async with limit:
+            return await func(item)
+
+    tasks = [asyncio.ensure_future(bounded(item)) for item in items]
+    try:
+        return list(await asyncio.gather(*tasks))
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class _ThreadedChildWatcher(asyncio.AbstractChildWatcher):
+    """
+    Waits for each child process in its own thread, so subprocesses work on event loops
+    in any thread. A backport of Python 3.8's `asyncio.ThreadedChildWatcher`.
+    """
+
+    def add_child_handler(self, pid, callback, *args):
+        loop = asyncio.get_event_loop()
+        thread = threading.Thread(target=self._wait, args=(loop, pid, callback, args), daemon=True)
+        thread.start()
+
+    @staticmethod
+    def _wait(loop, pid, callback, args):
+        try:
+            _, status = os.waitpid(pid, 0)
+            returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        except ChildProcessError:
+            returncode = 255
+
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(callback, pid, returncode, *args)
+
+    def remove_child_handler(self, pid):
+        return True
+
+    def attach_loop(self, loop):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def _setup_asyncio() -> None:
+    """
+    Makes Python 3.7 run subprocesses like 3.8 does by default: Windows needs the
+    proactor loop, and elsewhere the default child watcher only works once it's
+    attached to a loop in the main thread.
+    """
+    global _setup_done
+
+    if _setup_done or sys.version_info >= (3, 8):
+        return
+    _setup_done = True
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    else:
+        asyncio.set_child_watcher(_ThreadedChildWatcher())
+
+
+def run_sync(coroutine: Awaitable[R]) -> R:
+    """
+    Runs a coroutine from synchronous code.
+    """
+    global _loop
+
+    _setup_asyncio()
+
+    if threading.current_thread() is not threading.main_thread():
+        return asyncio.run(coroutine)
+
+    # Reusing one event loop is much cheaper than asyncio.run() for each call.
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+        atexit.register(_loop.close)
+
+    return _loop.run_until_complete(coroutine)
+
+
+def run_all(func: Callable[[T], Awaitable[R]], items: Iterable[T], jobs: int = None) -> List[R]:
+    """
+    Synchronous version of `map_bounded`.
+    """
+    return run_sync(map_bounded(func, items, jobs))
+
+
+def run(args: Sequence[str], **kwargs) -> ProcessResult:
+    """
+    Synchronous version of `run_async`.
+    """
+    return run_sync(run_async(args, **kwargs))
+
+
+def output(args: Sequence[str], **kwargs) -> str:
+    """
+    Runs a command and returns its stripped output, raising GitCommandError if it fails.
+    """
+    return run(args, **kwargs).check().stdout.strip()
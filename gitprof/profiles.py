@@ -0,0 +1,224 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Creating, validating and applying profiles.
+"""
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from gitprof import gitconfig
+from gitprof import metrics
+from gitprof import routing
+from gitprof import ssh
+from gitprof import timings
+from gitprof.exceptions import (
+    GitProfError,
+    InvalidProfileError,
+    NotARepositoryError,
+    ProfileExistsError,
+    ProfileNotFoundError,
+)
+from gitprof.files import Config, Profile
+from gitprof.repos import record_repos
+
+ProfileLike = Union[str, Profile]
+
+
+@dataclass
+class ApplyResult:
+    repo_path: str
+    profile: str
+    values: Dict[str, str]
+    submodules: List[str] = field(default_factory=list)
+
+
+def get_profile(profile: ProfileLike, config: Config = None) -> Profile:
+    if isinstance(profile, Profile):
+        return profile
+
+    found = (config or Config()).get_profile(profile)
+    if not found:
+        raise ProfileNotFoundError(profile)
+
+    return found
+
+
+def resolve_profile(url: str, config: Config = None) -> Optional[Profile]:
+    """
+    Returns the profile whose match rules select the URL, or None.
+    """
+    return (config or Config()).resolve_profile(url)
+
+
+def create_profile(
+    name: str,
+    ssh_key: str,
+    git_name: str = None,
+    git_email: str = None,
+    service: str = None,
+    match: Iterable[str] = (),
+    config: Config = None,
+    save: bool = True,
+) -> Profile:
+    config = config or Config()
+
+    if config.get_profile(name):
+        raise ProfileExistsError(name)
+
+    for rule in match:
+        try:
+            routing.validate_rule(rule)
+        except ValueError as e:
+            raise InvalidProfileError(str(e))
+
+    profile = Profile(
+        name,
+        ssh.get_ssh_key_path(ssh_key),
+        git_name=git_name,
+        git_email=git_email,
+        service=service,
+        match=match,
+    )
+    config.add_profile(profile)
+
+    if save:
+        config.save()
+
+    return profile
+
+
+def delete_profile(name: str, config: Config = None, save: bool = True) -> None:
+    config = config or Config()
+
+    if not config.get_profile(name):
+        raise ProfileNotFoundError(name)
+
+    config.delete_profile(name)
+
+    if save:
+        config.save()
+
+
+def validate_profile(profile: Profile) -> None:
+    """
+    Raises InvalidProfileError if the profile can't be used to clone or apply.
+    """
+    if not profile.ssh_key:
+        raise InvalidProfileError(f"Profile '{profile.name}' has no SSH key.")
+
+    if not (profile.git_name and profile.git_email):
+        raise InvalidProfileError(
+            f"Your Git name and/or email address are missing for profile '{profile.name}'."
+        )
+
+    key = ssh.fully_normalise_path(profile.ssh_key)
+    if not os.path.exists(key):
+        raise InvalidProfileError(f"Can't find the SSH key for profile '{profile.name}' at '{key}'.")
+
+
+def get_git_config_values(profile: Profile) -> Dict[str, str]:
+    return {
+        "user.name": profile.git_name,
+        "user.email": profile.git_email,
+        "core.sshCommand": ssh.get_ssh_command(profile.ssh_key),
+    }
+
+
+def apply_profile(
+    repo_path: str,
+    profile: ProfileLike,
+    config: Config = None,
+    record: bool = True,
+    submodules: bool = False,
+    worktree: bool = False,
+) -> ApplyResult:
+    """
+    Sets the profile's Git name, email and SSH command in the repository's local config,
+    and in the config of each checked-out submodule if `submodules` is True.
+
+    With `worktree`, the values are written to the worktree's own config instead, so
+    other worktrees of the repository keep their identity. Worktrees which already have
+    their own config always get the values there.
+
+    Unless `record` is False, the repository is also added to the repository index
+    and the operation is logged in the metrics log.
+    """
+    start = time.perf_counter()
+    profile = get_profile(profile, config)
+    values = get_git_config_values(profile)
+
+    repo_root = gitconfig.find_repo_root(repo_path)
+    config_path = gitconfig.get_config_path(repo_path)
+    if not config_path:
+        raise NotARepositoryError(repo_path)
+
+    worktree_path = gitconfig.get_worktree_config_path(repo_path)
+    if worktree and not worktree_path:
+        try:
+            worktree_path = gitconfig.enable_worktree_config(repo_path)
+        except OSError as e:
+            raise GitProfError(f"Failed to enable per-worktree config: {e}")
+    if worktree_path and (worktree or os.path.exists(worktree_path)):
+        config_path = worktree_path
+
+    submodule_paths = gitconfig.find_submodules(repo_root) if submodules else []
+    config_paths = [config_path] + [gitconfig.get_config_path(p) for p in submodule_paths]
+
+    for path in config_paths:
+        with timings.span("write git config", path=path):
+            try:
+                gitconfig.write_values(path, values)
+            except OSError as e:
+                raise GitProfError(f"Failed to write '{path}': {e}")
+
+    if record:
+        record_repos([repo_root], profile.name)
+        metrics.record(
+            "apply", profile.name, None, time.perf_counter() - start, 0, repo=repo_root
+        )
+
+    return ApplyResult(repo_root, profile.name, values, submodule_paths)
+
+
+def choose_profiles(
+    urls: Union[str, Iterable[str]],
+    profile: ProfileLike,
+    fallback: ProfileLike,
+    config: Config = None,
+) -> List[Tuple[str, Profile]]:
+    config = config or Config()
+    urls = [urls] if isinstance(urls, str) else list(urls)
+
+    out = []
+    for url in urls:
+        p = get_profile(profile, config) if profile else config.resolve_profile(url)
+        if not p and fallback:
+            p = get_profile(fallback, config)
+        if not p:
+            raise ProfileNotFoundError(None, f"No profile rule matches '{url}'.")
+
+        validate_profile(p)
+        out.append((url, p))
+
+    return out
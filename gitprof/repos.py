@@ -0,0 +1,211 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Persistent index of the repositories in a workspace.
+
+The index records each repository's remote URL, the profile applied to it and the
+modification time of its config file. Refreshing only lists directories whose mtime
+has changed since the last scan and only re-reads configs which have changed, so
+keeping it up to date costs a few `stat` calls per directory.
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from gitprof import files
+from gitprof import gitconfig
+from gitprof import ssh
+from gitprof import timings
+
+index_file = os.path.join(files.cache_dir, "repos.json")
+
+DEFAULT_DEPTH = 4
+
+
+@dataclass
+class RepoEntry:
+    path: str
+    remote: Optional[str]
+    profile: Optional[str]
+    config_mtime: int
+
+
+def _within(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class RepoIndex:
+    def __init__(self, path: str = None):
+        self.path = path or index_file
+        self.roots: Dict[str, int] = {}
+        self.dirs: Dict[str, Tuple[int, List[str]]] = {}
+        self.repos: Dict[str, RepoEntry] = {}
+        self._identities: Optional[Dict[Tuple[str, str], str]] = None
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        self.roots = data.get("roots", {})
+        self.dirs = {p: (m, c) for p, (m, c) in data.get("dirs", {}).items()}
+        self.repos = {p: RepoEntry(p, *values) for p, values in data.get("repos", {}).items()}
+
+    def save(self) -> None:
+        data = {
+            "version": 1,
+            "roots": self.roots,
+            "dirs": self.dirs,
+            "repos": {
+                p: [e.remote, e.profile, e.config_mtime] for p, e in self.repos.items()
+            },
+        }
+
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        with timings.span("repo index save"), open(temp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp, self.path)
+
+    def _identity_map(self) -> Dict[Tuple[str, str], str]:
+        if self._identities is None:
+            self._identities = {
+                (p.git_email, ssh.get_ssh_command(p.ssh_key)): p.name
+                for p in files.Config().iter_profiles()
+                if p.ssh_key
+            }
+
+        return self._identities
+
+    def _update_repo(self, path: str, force: bool = False) -> None:
+        config_path = gitconfig.get_config_path(path)
+
+        try:
+            mtime = os.stat(config_path).st_mtime_ns
+        except (OSError, TypeError):
+            self.repos.pop(path, None)
+            return
+
+        worktree_path = gitconfig.get_worktree_config_path(path)
+        if worktree_path and os.path.exists(worktree_path):
+            mtime = max(mtime, os.stat(worktree_path).st_mtime_ns)
+
+        entry = self.repos.get(path)
+        if entry and entry.config_mtime == mtime and not force:
+            return
+
+        values = gitconfig.read_repo_config(path)
+        profile = self._identity_map().get(
+            (values.get("user.email"), values.get("core.sshcommand"))
+        )
+        self.repos[path] = RepoEntry(path, values.get("remote.origin.url"), profile, mtime)
+
+    def _refresh_dir(self, path: str, level: int, depth: int, seen: Set[str]) -> None:
+        seen.add(path)
+
+        if os.path.exists(os.path.join(path, ".git")):
+            self._update_repo(path)
+            return
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+
+        cached = self.dirs.get(path)
+        if cached and cached[0] == mtime:
+            children = cached[1]
+        else:
+            try:
+                children = sorted(
+                    e.name
+                    for e in os.scandir(path)
+                    if e.is_dir(follow_symlinks=False) and not e.name.startswith(".")
+                )
+            except OSError:
+                children = []
+            self.dirs[path] = (mtime, children)
+
+        if level < depth:
+            for child in children:
+                self._refresh_dir(os.path.join(path, child), level + 1, depth, seen)
+
+    def add_root(self, root: str, depth: int = DEFAULT_DEPTH) -> None:
+        self.roots[os.path.abspath(root)] = depth
+
+    def remove_root(self, root: str) -> None:
+        root = os.path.abspath(root)
+        self.roots.pop(root, None)
+        self._prune(root, set())
+
+    def _prune(self, root: str, seen: Set[str]) -> None:
+        for mapping in (self.dirs, self.repos):
+            for path in [p for p in mapping if _within(p, root) and p not in seen]:
+                del mapping[path]
+
+    def refresh(self, roots: Iterable[str] = None) -> None:
+        """
+        Brings the index up to date for the given roots (by default, all known roots).
+        """
+        roots = [os.path.abspath(r) for r in roots] if roots else list(self.roots)
+
+        with timings.span("repo index refresh"):
+            for root in roots:
+                seen = set()
+                self._refresh_dir(root, 0, self.roots.get(root, DEFAULT_DEPTH), seen)
+                self._prune(root, seen)
+
+            for path in [p for p in self.repos if not any(_within(p, r) for r in self.roots)]:
+                self._update_repo(path)
+
+    def record(self, path: str, profile: str = None) -> RepoEntry:
+        """
+        Adds or updates a single repository, e.g. after a profile has been applied.
+        """
+        path = os.path.abspath(path)
+        self._update_repo(path, force=True)
+
+        entry = self.repos.get(path)
+        if entry and profile:
+            entry.profile = profile
+
+        return entry
+
+    def find(self, profile: str = None) -> List[RepoEntry]:
+        entries = self.repos.values()
+        if profile is not None:
+            entries = [e for e in entries if e.profile == profile]
+
+        return sorted(entries, key=lambda e: e.path)
+
+
+def record_repos(paths: Iterable[str], profile: str = None) -> None:
+    """
+    Adds repositories to the repository index.
+    """
+    index = RepoIndex()
+    for path in paths:
+        index.record(path, profile)
+    index.save()
@@ -0,0 +1,75 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Deciding which failed network operations are worth retrying, and when.
+"""
+import random
+import re
+from dataclasses import dataclass
+
+
+# Messages from git and ssh for failures which are worth retrying.
+TRANSIENT_ERRORS = re.compile(
+    "|".join(
+        [
+            r"could not resolve host",
+            r"temporary failure in name resolution",
+            r"connection (timed out|reset|refused|closed)",
+            r"operation timed out",
+            r"the remote end hung up unexpectedly",
+            r"early eof",
+            r"unexpected disconnect",
+            r"rpc failed",
+            r"index-pack failed",
+            r"transfer closed",
+            r"(kex|ssh)_exchange_identification",
+            r"returned error: 5\d\d",
+            r"gnutls|ssl_read|curl \d+",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    How often to retry clones which fail with a transient error (see `TRANSIENT_ERRORS`),
+    and how long to wait in between: `backoff` seconds, doubling after each attempt up to
+    `max_backoff`, less a random fraction (up to `jitter`) so parallel clones spread out.
+    """
+
+    attempts: int = 1
+    backoff: float = 2.0
+    max_backoff: float = 60.0
+    jitter: float = 0.5
+
+    def delay(self, attempt: int) -> float:
+        """
+        Returns how long to wait after the given (1-based) failed attempt.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+
+def is_transient_failure(output: str) -> bool:
+    return bool(TRANSIENT_ERRORS.search(output))
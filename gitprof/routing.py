@@ -0,0 +1,203 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import fnmatch
+import re
+from typing import Dict, List, Optional, Tuple
+
+_GLOB_CHARS = "*?["
+_REGEX_PREFIX = "re:"
+
+
+def parse_url(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Splits a Git remote URL into its host and repository path.
+
+    Handles 'scheme://[user@]host[:port]/path' and scp-like 'user@host:path' URLs.
+    Returns None for local paths.
+    """
+    url = url.strip()
+
+    match = re.match(r"^[a-z][a-z0-9+.-]*://(?:[^@/]*@)?([^/:]*)(?::\d*)?(/.*)?$", url, re.I)
+    if not match:
+        match = re.match(r"^(?:[^@/]+@)?([^:/\\]{2,}):(?!//)(.*)$", url)
+
+    if not match or not match.group(1):
+        return None
+
+    host, path = match.group(1), match.group(2) or ""
+    path = re.sub(r"\.git/*$", "", path.strip("/"))
+
+    return host.lower(), path
+
+
+def get_host(url: str) -> str:
+    """
+    Returns the URL's host, or 'local' for local paths, for grouping operations by host.
+    """
+    parsed = parse_url(url)
+    return parsed[0] if parsed else "local"
+
+
+def validate_rule(rule: str) -> None:
+    """
+    Raises ValueError if the rule cannot be used for matching.
+    """
+    if rule.startswith(_REGEX_PREFIX):
+        try:
+            re.compile(rule[len(_REGEX_PREFIX) :])
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression in rule '{rule}': {e}")
+        return
+
+    host = rule.split("/", 1)[0]
+    if not host:
+        raise ValueError(f"Rule '{rule}' must start with a host, e.g. 'github.com/my-org'.")
+
+
+def _literal_prefix(pattern: str) -> str:
+    for index, char in enumerate(pattern):
+        if char in _GLOB_CHARS:
+            return pattern[:index]
+
+    return pattern
+
+
+def _path_matches(pattern: str, path: str) -> bool:
+    if not pattern:
+        return True
+
+    depth = pattern.count("/") + 1
+    segments = path.split("/")
+
+    if len(segments) < depth:
+        return False
+
+    return fnmatch.fnmatchcase("/".join(segments[:depth]), pattern)
+
+
+class RuleIndex:
+    """
+    Lookup structure which maps a remote URL to the profile whose rule matches it.
+
+    Rules have the form 'host/owner-glob' (e.g. 'github.com/acme*') or 're:<regex>'.
+    Rules with an exact host are stored in a prefix trie of owner paths per host, so a
+    lookup walks the URL once regardless of how many profiles exist. Longer owner
+    prefixes win; ties go to whichever rule was added first.
+    """
+
+    def __init__(self):
+        self.hosts: Dict[str, Dict] = {}
+        self.host_globs: List[Tuple] = []
+        self.regexes: List[Tuple] = []
+        self.size = 0
+
+    @staticmethod
+    def build(profiles) -> "RuleIndex":
+        index = RuleIndex()
+        for p in profiles:
+            for rule in p.match or []:
+                try:
+                    index.add(rule, p.name)
+                except ValueError as e:
+                    print(f"Warning: ignoring rule for profile '{p.name}'. {e}")
+
+        return index
+
+    def add(self, rule: str, profile: str) -> None:
+        validate_rule(rule)
+        order = self.size
+        self.size += 1
+
+        if rule.startswith(_REGEX_PREFIX):
+            pattern = re.compile(rule[len(_REGEX_PREFIX) :])
+            self.regexes.append((order, pattern, rule, profile))
+            return
+
+        host, _, owner = rule.partition("/")
+        host, owner = host.lower(), owner.strip("/")
+
+        if any(c in host for c in _GLOB_CHARS):
+            self.host_globs.append((order, host, owner, rule, profile))
+            return
+
+        node = self.hosts.setdefault(host, {"c": {}, "r": []})
+        for char in _literal_prefix(owner):
+            node = node["c"].setdefault(char, {"c": {}, "r": []})
+
+        node["r"].append((order, owner, rule, profile))
+
+    def serialise(self) -> Dict:
+        """
+        Returns the rules as plain lists in the order `resolve` tries them, for lookups
+        which can't import this module (see `gitprof/hook_check.py`).
+        """
+        hosts = {}
+        for host, node in self.hosts.items():
+            rules, stack = [], [(node, 0)]
+            while stack:
+                node, depth = stack.pop()
+                rules += [(depth, *r) for r in node["r"]]
+                stack += [(child, depth + 1) for child in node["c"].values()]
+
+            # Rules with longer literal owner prefixes are tried first.
+            rules.sort(key=lambda r: (-r[0], r[1]))
+            hosts[host] = [(owner, rule, profile) for _, _, owner, rule, profile in rules]
+
+        return {
+            "hosts": hosts,
+            "host_globs": [(h, owner, rule, p) for _, h, owner, rule, p in self.host_globs],
+            "regexes": [(p.pattern, rule, profile) for _, p, rule, profile in self.regexes],
+        }
+
+    def resolve(self, url: str) -> Optional[Tuple[str, str]]:
+        """
+        Returns the (profile name, rule) pair which matches the URL, or None.
+        """
+        parsed = parse_url(url)
+
+        if parsed:
+            host, path = parsed
+            node = self.hosts.get(host)
+            candidates = []
+
+            if node:
+                candidates.append(node["r"])
+                for char in path:
+                    node = node["c"].get(char)
+                    if not node:
+                        break
+                    candidates.append(node["r"])
+
+            for rules in reversed(candidates):
+                for order, owner, rule, profile in rules:
+                    if _path_matches(owner, path):
+                        return profile, rule
+
+            for order, host_glob, owner, rule, profile in self.host_globs:
+                if fnmatch.fnmatchcase(host, host_glob) and _path_matches(owner, path):
+                    return profile, rule
+
+        for order, pattern, rule, profile in self.regexes:
+            if pattern.search(url):
+                return profile, rule
+
+        return None
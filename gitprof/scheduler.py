@@ -0,0 +1,263 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Fair scheduling of network jobs across Git hosts.
+
+`Scheduler.map` works like `process.map_bounded`, but queues jobs by (host, profile)
+and takes turns between hosts, then between profiles on each host, so a long list of
+repositories on one host (or with one profile) doesn't hold up the others. Each host
+has its own concurrency limit, which is halved (and the host rested for a while) when
+its jobs fail and reduced when they get much slower than usual, then raised again one
+job at a time as they succeed.
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Iterable, List, Optional
+from typing import Tuple, TypeVar
+
+from gitprof import process
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_PER_HOST = 8
+
+# How much each finished job counts towards a host's average job duration.
+_SMOOTHING = 0.3
+# Finished jobs needed before a host's average is trusted to detect slow-downs.
+_MIN_SAMPLES = 3
+
+
+@dataclass
+class HostStats:
+    limit: int
+    queued: int = 0
+    in_flight: int = 0
+    done: int = 0
+    failed: int = 0
+    average: Optional[float] = None
+    samples: int = 0
+    failures_in_a_row: int = 0
+    resting_until: float = 0.0
+
+
+class Scheduler:
+    """
+    Runs jobs at most `jobs` at once overall and `per_host` at once per host.
+
+    A host whose job fails is rested for `backoff` seconds, doubling with each failure
+    in a row up to `max_backoff`; a job taking more than `slow_factor` times the host's
+    average lowers its limit by one. `on_change` is called whenever jobs are queued,
+    started or finished, e.g. to update a progress display. `clock` must be the event
+    loop's clock, since waits use the loop's timers; tests pass the `time` method of a
+    loop with a simulated clock.
+    """
+
+    def __init__(
+        self,
+        jobs: int = 1,
+        per_host: int = None,
+        backoff: float = 5.0,
+        max_backoff: float = 120.0,
+        slow_factor: float = 4.0,
+        on_change: Callable[["Scheduler"], None] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.jobs = max(jobs, 1)
+        self.per_host = max(min(per_host or DEFAULT_PER_HOST, self.jobs), 1)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.slow_factor = slow_factor
+        self.on_change = on_change
+        self.clock = clock
+
+        self.hosts: Dict[str, HostStats] = {}
+        self._queues: Dict[Tuple[str, Hashable], Deque[int]] = {}
+        # Hosts take turns, and so do the groups of each host.
+        self._turns: Deque[str] = deque()
+        self._groups: Dict[str, Deque[Hashable]] = {}
+
+    @property
+    def queued(self) -> int:
+        return sum(h.queued for h in self.hosts.values())
+
+    @property
+    def in_flight(self) -> int:
+        return sum(h.in_flight for h in self.hosts.values())
+
+    @property
+    def done(self) -> int:
+        return sum(h.done for h in self.hosts.values())
+
+    def is_resting(self, host: str) -> bool:
+        return self.hosts[host].resting_until > self.clock()
+
+    def _changed(self) -> None:
+        if self.on_change:
+            self.on_change(self)
+
+    def _add(self, index: int, host: str, group: Hashable) -> None:
+        stats = self.hosts.setdefault(host, HostStats(limit=self.per_host))
+        stats.queued += 1
+
+        if host not in self._groups:
+            self._groups[host] = deque()
+            self._turns.append(host)
+
+        key = (host, group)
+        if key not in self._queues:
+            self._queues[key] = deque()
+            self._groups[host].append(group)
+        self._queues[key].append(index)
+
+    def _next(self, now: float) -> Optional[Tuple[str, int]]:
+        """
+        Takes the next job from the next host (in turn) which has room for it, from that
+        host's next group (in turn) with jobs queued.
+        """
+        for _ in range(len(self._turns)):
+            host = self._turns[0]
+            self._turns.rotate(-1)
+
+            stats = self.hosts[host]
+            full = stats.in_flight >= stats.limit
+            if not stats.queued or full or now < stats.resting_until:
+                continue
+
+            groups = self._groups[host]
+            for _ in range(len(groups)):
+                queue = self._queues[(host, groups[0])]
+                groups.rotate(-1)
+                if queue:
+                    stats.queued -= 1
+                    stats.in_flight += 1
+                    return host, queue.popleft()
+
+        return None
+
+    def _finished(self, host: str, duration: float, failed: bool, now: float) -> None:
+        stats = self.hosts[host]
+        stats.in_flight -= 1
+        stats.done += 1
+
+        if failed:
+            stats.failed += 1
+            stats.failures_in_a_row += 1
+            stats.limit = max(stats.limit // 2, 1)
+            rest = self.backoff * 2 ** (stats.failures_in_a_row - 1)
+            stats.resting_until = now + min(rest, self.max_backoff)
+            return
+
+        stats.failures_in_a_row = 0
+        slow = (
+            stats.samples >= _MIN_SAMPLES
+            and duration > self.slow_factor * stats.average
+        )
+        if slow:
+            stats.limit = max(stats.limit - 1, 1)
+        elif stats.limit < self.per_host:
+            stats.limit += 1
+
+        stats.samples += 1
+        if stats.average is None:
+            stats.average = duration
+        else:
+            stats.average += _SMOOTHING * (duration - stats.average)
+
+    async def map(
+        self,
+        func: Callable[[T], Awaitable[R]],
+        items: Iterable[T],
+        key: Callable[[T], Tuple[str, Hashable]],
+        failed: Callable[[R], bool] = lambda result: False,
+    ) -> List[R]:
+        """
+        Awaits `func(item)` for each item, returning the results in order. `key` gives
+        each item's (host, group), e.g. (host, profile name); `failed` tells whether a
+        result means the host is struggling. If one call raises, the others are
+        cancelled.
+        """
+        items = list(items)
+        results: List[Optional[R]] = [None] * len(items)
+        for index, item in enumerate(items):
+            self._add(index, *key(item))
+        self._changed()
+
+        running: Dict[asyncio.Future, Tuple[str, int, float]] = {}
+        try:
+            while running or self.queued:
+                now = self.clock()
+                while len(running) < self.jobs:
+                    job = self._next(now)
+                    if not job:
+                        break
+                    host, index = job
+                    task = asyncio.ensure_future(func(items[index]))
+                    running[task] = (host, index, now)
+                    self._changed()
+
+                # Wake up when a job finishes, or when a resting host can take more.
+                resting = [
+                    h.resting_until - now
+                    for h in self.hosts.values()
+                    if h.queued and h.resting_until > now
+                ]
+                timeout = max(min(resting), 0) if resting else None
+                if not running:
+                    await asyncio.sleep(timeout or 0)
+                    continue
+
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    host, index, started = running.pop(task)
+                    results[index] = task.result()
+                    now = self.clock()
+                    self._finished(host, now - started, failed(results[index]), now)
+                    self._changed()
+        finally:
+            for task in running:
+                task.cancel()
+
+        return results
+
+
+def run_scheduled(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    key: Callable[[T], Tuple[str, Hashable]],
+    failed: Callable[[R], bool],
+    jobs: int,
+    per_host: int = None,
+    progress: Callable[[Scheduler], None] = None,
+) -> List[R]:
+    """
+    Runs network jobs through a `Scheduler`, at most `jobs` at once and `per_host` at
+    once per Git host, from ordinary code. `progress` is called with the scheduler
+    whenever jobs start or finish, for showing queue depth and in-flight counts.
+    """
+    runner = Scheduler(jobs or 1, per_host, on_change=progress)
+    return process.run_sync(runner.map(func, items, key, failed))
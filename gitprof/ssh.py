@@ -19,13 +19,19 @@
 #  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 #  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 #  SOFTWARE.
+import hashlib
 import os
 import re
-from typing import List
+from typing import Dict, List
+
+from gitprof import timings
+from gitprof.files import cache_dir
 
 ssh_dir = os.path.expanduser("~/.ssh")
 os.makedirs(ssh_dir, exist_ok=True)
 
+control_dir = os.path.join(cache_dir, "ssh")
+
 
 def create_ssh_key(name: str) -> str:
     print(
@@ -36,14 +42,83 @@ def create_ssh_key(name: str) -> str:
     if not os.path.isabs(name):
         name = os.path.join(ssh_dir, name)
 
-    command = f'ssh-keygen -t ed25519 -a 100 -f "{name}"'
-    os.system(command)
+    from gitprof import process
+
+    process.run(
+        ["ssh-keygen", "-t", "ed25519", "-a", "100", "-f", name],
+        stdin=process.INHERIT,
+        stdout=process.INHERIT,
+        stderr=process.INHERIT,
+    )
 
     return fully_normalise_path(name)
 
 
-def get_ssh_command(ssh_key: str) -> str:
-    return f"ssh -i {fully_normalise_path(ssh_key)}"
+def get_keygen_command(path: str, comment: str = None) -> List[str]:
+    """
+    Returns the command which creates a key like `create_ssh_key`. Run it with
+    `get_keygen_input` and `get_keygen_env` so it doesn't prompt.
+    """
+    command = ["ssh-keygen", "-q", "-t", "ed25519", "-a", "100", "-f", path]
+    if comment is not None:
+        command += ["-C", comment]
+
+    return command
+
+
+def get_keygen_input(passphrase: str = "") -> str:
+    """
+    The passphrase is written to ssh-keygen's stdin (once for each of its prompts)
+    rather than passed with -N, where other users could see it in the process list.
+    ssh-keygen must run without a controlling terminal (`process.run_async(detach=True)`),
+    or it reads the passphrase from the terminal instead.
+    """
+    return f"{passphrase}\n" * 2
+
+
+def get_keygen_env() -> Dict[str, str]:
+    # ssh-keygen reads a piped passphrase from stdin unless it can use an askpass program.
+    env = {k: v for k, v in os.environ.items() if k != "SSH_ASKPASS"}
+    env["SSH_ASKPASS_REQUIRE"] = "never"
+    return env
+
+
+def get_ssh_command(ssh_key: str, agent_socket: str = None, multiplex: bool = False) -> str:
+    """
+    With `multiplex`, connections are shared for a minute (ssh's ControlMaster), so a
+    bulk operation's probes and transfers to a host only authenticate once.
+    """
+    key = fully_normalise_path(ssh_key)
+    command = f"ssh -i {key}"
+
+    if agent_socket:
+        command += f" -o IdentityAgent={fully_normalise_path(agent_socket)}"
+
+    if multiplex and os.name != "nt":
+        os.makedirs(control_dir, mode=0o700, exist_ok=True)
+        # Keyed by SSH key as well as host, so profiles never share a connection.
+        tag = hashlib.sha1(key.encode()).hexdigest()[:10]
+        command += (
+            f" -o ControlMaster=auto -o ControlPath={control_dir}/{tag}-%C"
+            f" -o ControlPersist=60"
+        )
+
+    return command
+
+
+def needs_passphrase(ssh_key: str) -> bool:
+    """
+    Returns True if the private key is encrypted.
+    """
+    from gitprof import process
+
+    result = process.run(
+        ["ssh-keygen", "-y", "-P", "", "-f", get_ssh_key_path(ssh_key)],
+        stdout=process.DEVNULL,
+        stderr=process.DEVNULL,
+        timeout=10,
+    )
+    return not result.ok
 
 
 def get_public_key(name: str) -> str:
@@ -68,7 +143,8 @@ def get_ssh_key_path(key: str) -> str:
 
 
 def get_key_options() -> List[str]:
-    files = os.listdir(ssh_dir)
+    with timings.span("ssh key discovery"):
+        files = os.listdir(ssh_dir)
 
-    keys = [f for f in files if len([i for i in files if f in i]) == 2]
+        keys = [f for f in files if len([i for i in files if f in i]) == 2]
     return keys
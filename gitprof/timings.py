@@ -0,0 +1,176 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Lightweight timing instrumentation.
+
+Modules wrap interesting work in `span(...)`. Unless timing has been enabled (via
+`--timings` or the GITPROF_TRACE environment variable) `span` returns a shared
+no-op context manager, so instrumented code pays only for a function call.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+TRACE_ENV_VAR = "GITPROF_TRACE"
+
+_enabled = False
+_trace_file: Optional[str] = None
+_origin = time.perf_counter()
+_spans: List["Span"] = []
+
+
+class Span:
+    __slots__ = ("name", "category", "args", "start", "duration", "thread")
+
+    def __init__(self, name: str, category: str, args: Dict):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+        self.duration = 0.0
+        self.thread = threading.get_ident()
+
+    def begin(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self.start
+        _spans.append(self)
+
+    def __enter__(self) -> "Span":
+        return self.begin()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.end()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def begin(self) -> "_NullSpan":
+        return self
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_null_span = _NullSpan()
+
+
+def span(name: str, category: str = "gitprof", **args):
+    """
+    Returns a context manager which records how long its body takes.
+    """
+    if not _enabled:
+        return _null_span
+
+    return Span(name, category, args)
+
+
+def enable(trace_file: str = None) -> None:
+    global _enabled, _trace_file
+
+    _enabled = True
+    _trace_file = trace_file or _trace_file
+
+
+def enable_from_env() -> bool:
+    trace_file = os.environ.get(TRACE_ENV_VAR)
+    if trace_file:
+        enable(trace_file)
+
+    return bool(trace_file)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def print_summary(file=None) -> None:
+    file = file or sys.stderr
+    totals: Dict[str, List[float]] = {}
+
+    for s in _spans:
+        calls, total, longest = totals.get(s.name, [0, 0.0, 0.0])
+        totals[s.name] = [calls + 1, total + s.duration, max(longest, s.duration)]
+
+    width = max([len(name) for name in totals] + [4])
+    lines = [f"\n{'span':<{width}}  {'calls':>6}  {'total ms':>10}  {'max ms':>10}"]
+
+    for name, (calls, total, longest) in sorted(
+        totals.items(), key=lambda i: i[1][1], reverse=True
+    ):
+        lines.append(
+            f"{name:<{width}}  {calls:>6}  {total * 1000:>10.1f}  {longest * 1000:>10.1f}"
+        )
+
+    print("\n".join(lines), file=file)
+
+
+def write_trace(path: str) -> None:
+    """
+    Writes the recorded spans in Chrome's trace-event format (viewable in
+    chrome://tracing or https://ui.perfetto.dev).
+    """
+    pid = os.getpid()
+    events = [
+        {
+            "name": s.name,
+            "cat": s.category,
+            "ph": "X",
+            "ts": round((s.start - _origin) * 1e6, 3),
+            "dur": round(s.duration * 1e6, 3),
+            "pid": pid,
+            "tid": s.thread,
+            "args": {k: str(v) for k, v in s.args.items()},
+        }
+        for s in _spans
+    ]
+
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def report(summary: bool = True) -> None:
+    if not _enabled:
+        return
+
+    if summary:
+        print_summary()
+
+    if _trace_file:
+        try:
+            write_trace(_trace_file)
+        except OSError as e:
+            print(f"Warning: could not write trace file '{_trace_file}': {e}", file=sys.stderr)
@@ -26,6 +26,8 @@ from typing import List, Callable
 
 import click
 
+from gitprof import picker
+
 
 class SelectedOption:
     def __init__(self, value, is_fallback):
@@ -129,6 +131,20 @@ def get_input_from_list(
     if default_index == -1:
         default_index = fallback_index if fallback_index >= 0 else 0
 
+    if len(options) > picker.MAX_VISIBLE and picker.is_supported():
+        return _pick_from_list(
+            title,
+            options,
+            fallback,
+            fallback_index,
+            fallback_enter_manually,
+            default_index,
+            attempts,
+            newlines_after,
+            validator,
+            validation_failure_msg,
+        )
+
     out = (
         "\n" * newlines_before
         + f"### {title} ###\n"
@@ -181,6 +197,51 @@ def get_input_from_list(
     return SelectedOption.create(value)
 
 
+def _pick_from_list(
+    title: str,
+    options: List[str],
+    fallback: str,
+    fallback_index: int,
+    fallback_enter_manually: bool,
+    default_index: int,
+    attempts: int,
+    newlines_after: int,
+    validator: Callable,
+    validation_failure_msg: str,
+) -> SelectedOption:
+    """
+    Filter-as-you-type version of `get_input_from_list`, for long lists on a terminal.
+    The default option starts out selected.
+    """
+    pinned = None
+    if fallback:
+        pinned = fallback_index if fallback_index >= 0 else len(options) - 1
+
+    default = default_index if 0 <= default_index < len(options) else None
+
+    for i in range(attempts):
+        chosen = picker.pick(title, options, pinned=pinned, default=default)
+        if chosen is None or chosen == pinned or validator(chosen):
+            break
+        print(validation_failure_msg)
+    else:
+        chosen = None
+
+    if chosen is None:
+        click.echo("Failed to get valid input. Exiting.")
+        sys.exit(1)
+
+    print(newlines_after * "\n", end="")
+
+    if chosen == pinned:
+        if fallback_enter_manually:
+            value = input("You chose to enter a value manually. Enter your value: ").strip()
+            return SelectedOption.fallback(value or fallback)
+        return SelectedOption.fallback(fallback)
+
+    return SelectedOption.create(options[chosen])
+
+
 def print_header(text: str, hashes=15, newlines: int = 2, newlines_before=0):
     hashes = "#" * hashes
     print(newlines_before * "\n" + f"{hashes} {text} {hashes}", end=newlines * "\n")
@@ -188,3 +249,38 @@ def print_header(text: str, hashes=15, newlines: int = 2, newlines_before=0):
 
 def sleep(seconds: int):
     time.sleep(seconds)
+
+
+class StatusLine:
+    """
+    A progress line at the bottom of the terminal, redrawn in place on stderr. Other
+    output should go through `echo` so the line doesn't get mixed into it. Does nothing
+    unless `enabled` and stderr is a terminal.
+    """
+
+    def __init__(self, enabled: bool = True, interval: float = 0.1):
+        self.enabled = enabled and sys.stderr.isatty()
+        self.interval = interval
+        self.text = ""
+        self._drawn = 0.0
+
+    def update(self, text: str) -> None:
+        self.text = text
+        if self.enabled and time.monotonic() - self._drawn >= self.interval:
+            self._draw()
+
+    def _draw(self) -> None:
+        sys.stderr.write(f"\r\033[K{self.text}")
+        sys.stderr.flush()
+        self._drawn = time.monotonic()
+
+    def clear(self) -> None:
+        if self.enabled and self.text:
+            sys.stderr.write("\r\033[K")
+            sys.stderr.flush()
+
+    def echo(self, message: str, err: bool = False) -> None:
+        self.clear()
+        click.echo(message, err=err)
+        if self.enabled and self.text:
+            self._draw()
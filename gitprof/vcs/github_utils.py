@@ -24,10 +24,17 @@ from typing import List, Optional, Tuple
 from github import Github, GitAuthor, GitCommit
 from github.Repository import Repository
 
+from gitprof import timings
+
 g = Github()
 
 
 def get_name_and_email(username: str) -> Optional[Tuple[str, str]]:
+    with timings.span("GitHub API: find name and email", category="network"):
+        return _get_name_and_email(username)
+
+
+def _get_name_and_email(username: str) -> Optional[Tuple[str, str]]:
     try:
         user = g.get_user(username)
         repos: List[Repository] = user.get_repos()
@@ -24,12 +24,12 @@ from typing import List, Optional
 from gitprof.files import Config
 
 
-def get_services() -> List[str]:
+def get_services(config: Config = None) -> List[str]:
     default = ["GitHub", "GitLab", "Bitbucket", "Self-hosted"]
     others = list(
         filter(
             lambda i: (i and i != "None"),
-            map(lambda i: i.service, Config().get_profiles()),
+            map(lambda i: i.service, (config or Config()).iter_profiles()),
         )
     )
 
@@ -0,0 +1,299 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Watches directories for newly created repositories and applies a profile to them.
+
+On Linux, inotify is used to watch each root and the directories below it down to a
+fixed depth; repositories found are not watched further, so the number of watches
+stays small even in large trees. Elsewhere, or if inotify is unavailable, the same
+levels are polled.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable, Dict, Optional, Set
+
+from gitprof import api
+from gitprof.exceptions import GitProfError
+
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = IN_CREATE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not libc_name:
+            raise OSError("inotify is not available on this platform.")
+
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add(self, path: str) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Can't watch '{path}': {os.strerror(errno)}")
+
+        return wd
+
+    def remove(self, wd: int) -> None:
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: Optional[float]):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            yield wd, mask, os.fsdecode(name)
+
+
+class Watcher:
+    """
+    Applies profiles to repositories created under the given roots.
+
+    `roots` maps directories to profile names; for nested roots, the deepest wins.
+    Repositories are looked for up to `depth` levels below each root, and a profile is
+    applied once the repository has been quiet for `debounce` seconds and Git holds no
+    locks or temporary packs in it (i.e. a clone has finished). Repositories which
+    exist when watching starts are left alone.
+    """
+
+    def __init__(
+        self,
+        roots: Dict[str, str],
+        depth: int = 2,
+        debounce: float = 2.0,
+        poll_interval: float = 5.0,
+        use_inotify: bool = True,
+        on_apply: Callable[[api.ApplyResult], None] = None,
+        on_error: Callable[[str, Exception], None] = None,
+    ):
+        self.roots = {os.path.abspath(r): p for r, p in roots.items()}
+        self.depth = depth
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.on_apply = on_apply or (lambda result: None)
+        self.on_error = on_error or (lambda path, error: None)
+
+        self.known: Set[str] = set()
+        self.pending: Dict[str, float] = {}
+        self.watches: Dict[int, str] = {}
+        self.inotify = None
+
+        if use_inotify:
+            try:
+                self.inotify = _Inotify()
+            except OSError:
+                self.inotify = None
+
+    def uses_inotify(self) -> bool:
+        return self.inotify is not None
+
+    def _level(self, path: str) -> Optional[int]:
+        root = self._root_for(path)
+        if root is None:
+            return None
+
+        relative = os.path.relpath(path, root)
+        return 0 if relative == "." else relative.count(os.sep) + 1
+
+    def _root_for(self, path: str) -> Optional[str]:
+        matches = [r for r in self.roots if path == r or path.startswith(r + os.sep)]
+        return max(matches, key=len) if matches else None
+
+    def _scan(self, path: str, level: int, found: Set[str]) -> None:
+        """
+        Records repositories below `path` (watching directories if using inotify).
+        """
+        if os.path.exists(os.path.join(path, ".git")):
+            found.add(path)
+            return
+
+        if self.inotify:
+            try:
+                self.watches[self.inotify.add(path)] = path
+            except OSError as e:
+                # Typically ENOSPC (too many watches); polling still finds repositories.
+                self.on_error(path, e)
+                self.inotify = None
+
+        if level >= self.depth:
+            return
+
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return
+
+        for entry in entries:
+            if entry.name != ".git" and entry.is_dir(follow_symlinks=False):
+                self._scan(entry.path, level + 1, found)
+
+    def _discover(self) -> Set[str]:
+        found = set()
+        for root in self.roots:
+            if os.path.isdir(root):
+                self._scan(root, 0, found)
+
+        return found
+
+    def _add_pending(self, repos: Set[str]) -> None:
+        now = time.monotonic()
+        for repo in repos - self.known:
+            self.pending[repo] = now
+
+    def _handle_event(self, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            self._add_pending(self._discover())
+            return
+
+        directory = self.watches.get(wd)
+        if mask & IN_IGNORED:
+            self.watches.pop(wd, None)
+            return
+        if not directory or not name:
+            return
+
+        repo = os.path.dirname(directory) if os.path.basename(directory) == ".git" else directory
+        if repo in self.pending:
+            self.pending[repo] = time.monotonic()
+            return
+
+        path = os.path.join(directory, name)
+
+        if name == ".git":
+            self._add_pending({directory})
+            if os.path.isdir(path):
+                self._try_watch(path)
+        elif mask & IN_ISDIR:
+            level = self._level(path)
+            if level is not None and level <= self.depth:
+                found = set()
+                self._scan(path, level, found)
+                self._add_pending(found)
+
+    def _try_watch(self, path: str) -> None:
+        # Inotify is dropped if it runs out of watches, even part way through a batch.
+        if not self.inotify:
+            return
+
+        try:
+            self.watches[self.inotify.add(path)] = path
+        except OSError as e:
+            self.on_error(path, e)
+
+    def _unwatch_repo(self, repo: str) -> None:
+        if not self.inotify:
+            return
+
+        paths = {repo, os.path.join(repo, ".git")}
+        for wd, path in list(self.watches.items()):
+            if path in paths:
+                self.inotify.remove(wd)
+
+    @staticmethod
+    def _is_busy(repo: str) -> bool:
+        git_dir = os.path.join(repo, ".git")
+        try:
+            if any(n.endswith(".lock") for n in os.listdir(git_dir)):
+                return True
+
+            pack_dir = os.path.join(git_dir, "objects", "pack")
+            return any(n.startswith("tmp_") for n in os.listdir(pack_dir))
+        except OSError:
+            return False
+
+    def _apply_due(self) -> Optional[float]:
+        """
+        Applies profiles to repositories which have been quiet for long enough, and
+        returns how long to wait until the next one is due (None if none are pending).
+        """
+        now = time.monotonic()
+
+        for repo, last_seen in list(self.pending.items()):
+            if now - last_seen < self.debounce:
+                continue
+
+            if self._is_busy(repo):
+                self.pending[repo] = now
+                continue
+
+            del self.pending[repo]
+            if not os.path.exists(os.path.join(repo, ".git")):
+                continue
+
+            self._unwatch_repo(repo)
+            self.known.add(repo)
+            try:
+                self.on_apply(api.apply_profile(repo, self.roots[self._root_for(repo)]))
+            except GitProfError as e:
+                self.on_error(repo, e)
+
+        if not self.pending:
+            return None
+
+        return max(0.0, min(self.pending.values()) + self.debounce - now)
+
+    def run(self, until: Callable[[], bool] = lambda: False) -> None:
+        self.known = self._discover()
+        last_poll = time.monotonic()
+
+        while not until():
+            wait = self._apply_due()
+
+            if self.inotify:
+                for event in self.inotify.read(wait):
+                    self._handle_event(*event)
+                continue
+
+            time.sleep(self.poll_interval if wait is None else min(wait, self.poll_interval))
+
+            if time.monotonic() - last_poll >= self.poll_interval:
+                self._add_pending(self._discover() - set(self.pending))
+                last_poll = time.monotonic()
@@ -0,0 +1,64 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Linked worktrees, each with its own profile.
+"""
+import os
+
+from gitprof import gitconfig
+from gitprof import process
+from gitprof.exceptions import NotARepositoryError
+from gitprof.files import Config
+from gitprof.profiles import ApplyResult, ProfileLike, apply_profile, get_profile
+from gitprof.profiles import validate_profile
+
+
+def add_worktree(
+    repo_path: str,
+    path: str,
+    profile: ProfileLike,
+    commit: str = None,
+    new_branch: str = None,
+    config: Config = None,
+) -> ApplyResult:
+    """
+    Creates a linked worktree of the repository at `repo_path` with `git worktree add`
+    and applies the profile to that worktree only. The worktree shares the repository's
+    objects, so checking it out under a second identity needs no clone.
+    """
+    profile = get_profile(profile, config)
+    validate_profile(profile)
+
+    repo_root = gitconfig.find_repo_root(repo_path)
+    if not repo_root:
+        raise NotARepositoryError(repo_path)
+
+    command = ["git", "-C", repo_root, "worktree", "add"]
+    if new_branch:
+        command += ["-b", new_branch]
+    command.append(os.path.abspath(path))
+    if commit:
+        command.append(commit)
+
+    process.run(command).check()
+
+    return apply_profile(path, profile, config, worktree=True)
@@ -0,0 +1,155 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Fixtures for the tests.
+
+Like the benchmarks, every test runs against a temporary HOME, so the real GitProf
+config, cache and `~/.ssh` directory are never read or modified.
+"""
+import asyncio
+import os
+import selectors
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+_home = tempfile.mkdtemp(prefix="gitprof-test-home-")
+os.environ["HOME"] = _home
+os.environ["USERPROFILE"] = _home
+os.environ.update(
+    GIT_AUTHOR_NAME="Test",
+    GIT_AUTHOR_EMAIL="test@example.com",
+    GIT_COMMITTER_NAME="Test",
+    GIT_COMMITTER_EMAIL="test@example.com",
+    GIT_CONFIG_NOSYSTEM="1",
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from gitprof import agent, completion, daemon, files, hooks  # noqa: E402
+from gitprof import maintenance, metrics, repos, ssh  # noqa: E402
+
+# Modules which keep paths under GitProf's config and cache directories.
+_PATH_MODULES = [agent, completion, daemon, files, hooks, maintenance, metrics, repos, ssh]
+
+
+def git(*args, cwd=None):
+    subprocess.run(
+        ["git", *args], cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """
+    Points GitProf's config, cache and SSH directories at an empty temporary HOME.
+    """
+    config_dir = tmp_path / "config"
+    cache_dir = tmp_path / "cache"
+    ssh_dir = tmp_path / ".ssh"
+    for path in (config_dir, cache_dir, ssh_dir):
+        path.mkdir()
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(ssh, "ssh_dir", str(ssh_dir))
+    # Modules copy these paths when they're imported, so each copy is redirected.
+    redirect = [(files.cache_dir, str(cache_dir)), (files.config_dir, str(config_dir))]
+    for module in _PATH_MODULES:
+        for name, value in list(vars(module).items()):
+            if not isinstance(value, str):
+                continue
+            for old, new in redirect:
+                if value == old or value.startswith(old + os.sep):
+                    monkeypatch.setattr(module, name, new + value[len(old) :])
+                    break
+
+    return tmp_path
+
+
+@pytest.fixture
+def profile(home):
+    """
+    A profile with a placeholder key, for remotes which don't need a real one.
+    """
+    key = home / ".ssh" / "id_test"
+    key.write_text("key\n")
+    return files.Profile("test", str(key), "Test", "test@example.com", None, [])
+
+
+@pytest.fixture(scope="session")
+def remote_repo(tmp_path_factory) -> str:
+    """
+    A small local repository to clone from, with two commits; returns its path.
+    """
+    repo = tmp_path_factory.mktemp("remote")
+    git("init", "-q", str(repo))
+
+    for commit in range(2):
+        for i in range(5):
+            (repo / f"file-{i}.txt").write_text(f"{commit} {i}\n")
+        git("add", "-A", cwd=repo)
+        git("commit", "-q", "-m", f"Commit {commit}", cwd=repo)
+
+    return str(repo)
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """
+    Never blocks: instead of waiting for the loop's next timer, jumps the clock to it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if not events and timeout is None:
+            raise RuntimeError("The event loop would wait forever.")
+        if not events:
+            self.now += timeout
+
+        return events
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """
+    An event loop whose time only passes while it's idle, so `asyncio.sleep(60)` returns
+    at once, with `loop.time()` 60 seconds later. Only for coroutines which don't do I/O.
+    """
+
+    def __init__(self):
+        self._virtual = _VirtualSelector()
+        super().__init__(self._virtual)
+
+    def time(self) -> float:
+        return self._virtual.now
+
+
+@pytest.fixture
+def virtual_loop():
+    loop = VirtualClockLoop()
+    yield loop
+    loop.close()
@@ -0,0 +1,103 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Checks `gitprof check` against a local remote which exists and a path which doesn't.
+"""
+import asyncio
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from gitprof import api
+from gitprof import probes
+from gitprof.cli import root
+from gitprof.files import Config
+
+
+@pytest.fixture
+def saved_profile(profile):
+    config = Config()
+    config.add_profile(profile)
+    config.save()
+    return profile
+
+
+@pytest.fixture
+def urls(remote_repo, tmp_path):
+    return [f"file://{remote_repo}", str(tmp_path / "missing")]
+
+
+def _check(*args):
+    return CliRunner().invoke(root, ["check", "-p", "test", *args], catch_exceptions=False)
+
+
+def test_report(saved_profile, urls):
+    result = _check(*urls)
+
+    assert result.exit_code == 1
+    assert result.output.splitlines() == [
+        "local: 1 ok, 1 failed",
+        f"  not found    {urls[1]} (profile 'test')",
+    ]
+
+
+def test_ndjson(saved_profile, urls):
+    result = _check("--format", "ndjson", *urls)
+
+    assert result.exit_code == 1
+    records = {r["url"]: r for r in map(json.loads, result.output.splitlines())}
+    assert [(r["profile"], r["host"], r["status"]) for r in map(records.get, urls)] == [
+        ("test", "local", api.PROBE_OK),
+        ("test", "local", api.PROBE_NOT_FOUND),
+    ]
+    assert records[urls[0]]["error"] is None
+    assert "does not appear to be a git repository" in records[urls[1]]["error"]
+
+
+def test_all_reachable(saved_profile, urls):
+    result = _check(urls[0])
+
+    assert result.exit_code == 0
+    assert result.output == "local: 1 ok\n"
+
+
+def test_jobs_limit_concurrent_probes(saved_profile, urls, monkeypatch):
+    running, most = 0, 0
+    run_async = probes.process.run_async
+
+    async def counting_run_async(*args, **kwargs):
+        nonlocal running, most
+        running += 1
+        most = max(most, running)
+        try:
+            # Keeps each probe running long enough for the others to start, if allowed.
+            await asyncio.sleep(0.05)
+            return await run_async(*args, **kwargs)
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(probes.process, "run_async", counting_run_async)
+    result = _check("-j", "2", *[urls[0]] * 6)
+
+    assert result.exit_code == 0, result.output
+    assert most == 2
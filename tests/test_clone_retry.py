@@ -0,0 +1,161 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Checks that clones are retried, resumed and cleaned up, using an `ssh://` remote whose
+connections fail on demand: a fake `ssh` on the PATH refuses the first few
+connections, then runs Git's command locally.
+"""
+import os
+import stat
+import subprocess
+
+import pytest
+
+from gitprof import api
+from gitprof.api import RetryPolicy
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="The fake ssh is a shell script")
+
+FAKE_SSH = """#!/bin/sh
+count=$(cat "{count}")
+echo $((count + 1)) > "{count}"
+if [ "$count" -lt "$(cat "{fail}")" ]; then
+    echo "ssh: connect to host fake port 22: Connection reset by peer" >&2
+    exit 255
+fi
+for command; do :; done
+exec sh -c "$command"
+"""
+
+
+class FlakySSH:
+    def __init__(self, directory):
+        self.count_file = os.path.join(directory, "count")
+        self.fail_file = os.path.join(directory, "fail")
+        self.fail(0)
+
+    def fail(self, connections: int) -> None:
+        """
+        Makes the next `connections` connections fail.
+        """
+        for path, value in ((self.count_file, 0), (self.fail_file, connections)):
+            with open(path, "w") as f:
+                f.write(f"{value}\n")
+
+    @property
+    def connections(self) -> int:
+        with open(self.count_file, "r") as f:
+            return int(f.read())
+
+
+@pytest.fixture
+def flaky_ssh(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    flaky = FlakySSH(str(tmp_path))
+
+    script = bin_dir / "ssh"
+    script.write_text(FAKE_SSH.format(count=flaky.count_file, fail=flaky.fail_file))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    return flaky
+
+
+@pytest.fixture
+def url(remote_repo):
+    return f"ssh://fake{remote_repo}"
+
+
+def _clone(url, profile, dest_dir, attempts):
+    results = api.clone(
+        url, profile=profile, dest_dir=str(dest_dir), retry=RetryPolicy(attempts, backoff=0)
+    )
+    return results[0]
+
+
+def test_retries_transient_failures(flaky_ssh, profile, url, tmp_path):
+    flaky_ssh.fail(2)
+    result = _clone(url, profile, tmp_path / "out", attempts=3)
+
+    assert result.ok, result.output
+    assert (result.attempts, result.resumed) == (3, False)
+    assert flaky_ssh.connections == 3
+    assert os.path.exists(os.path.join(result.dest, "file-0.txt"))
+
+
+def test_gives_up_and_removes_directory(flaky_ssh, profile, url, tmp_path):
+    flaky_ssh.fail(10)
+    result = _clone(url, profile, tmp_path / "out", attempts=2)
+
+    assert not result.ok
+    assert result.attempts == 2
+    assert not os.path.exists(result.dest)
+
+
+def test_does_not_retry_permanent_failures(flaky_ssh, profile, tmp_path):
+    result = _clone("ssh://fake/no/such/repo.git", profile, tmp_path / "out", attempts=3)
+
+    assert not result.ok
+    assert result.attempts == 1
+    assert flaky_ssh.connections == 1
+    assert not os.path.exists(result.dest)
+
+
+def test_resumes_partial_clone(flaky_ssh, profile, url, tmp_path):
+    # A clone interrupted after fetching: the remote is set up, but nothing checked out.
+    dest = tmp_path / "out" / api.get_clone_dest(url)
+    subprocess.run(["git", "init", "-q", str(dest)], check=True)
+    subprocess.run(["git", "-C", str(dest), "remote", "add", "origin", url], check=True)
+    subprocess.run(["git", "-C", str(dest), "fetch", "-q", "origin"], check=True)
+    assert api.is_partial_clone(str(dest), url)
+
+    flaky_ssh.fail(1)
+    result = _clone(url, profile, tmp_path / "out", attempts=3)
+
+    assert result.ok, result.output
+    assert (result.attempts, result.resumed) == (2, True)
+    assert not api.is_partial_clone(str(dest), url)
+    assert os.path.exists(dest / "file-0.txt")
+
+
+@pytest.mark.parametrize(
+    "output, transient",
+    [
+        ("ssh: connect to host fake port 22: Connection reset by peer", True),
+        ("ssh: Could not resolve hostname fake: Temporary failure in name resolution", True),
+        ("fatal: early EOF\nfatal: index-pack failed", True),
+        ("error: RPC failed; HTTP 502 curl 22 The requested URL returned error: 502", True),
+        ("git@fake: Permission denied (publickey).", False),
+        ("fatal: repository 'https://fake/x.git/' not found", False),
+    ],
+)
+def test_is_transient_failure(output, transient):
+    assert api.is_transient_failure(output) == transient
+
+
+def test_retry_delay():
+    policy = RetryPolicy(attempts=5, backoff=2, max_backoff=5, jitter=0)
+    assert [policy.delay(a) for a in range(1, 5)] == [2, 4, 5, 5]
+
+    policy.jitter = 0.5
+    assert all(1 <= policy.delay(1) <= 2 for _ in range(100))
@@ -0,0 +1,53 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import pytest
+
+from gitprof import api
+from gitprof.exceptions import CloneError
+
+
+@pytest.mark.parametrize(
+    "url, dest",
+    [
+        ("git@github.com:acme/api.git", "api"),
+        ("https://github.com/acme/api", "api"),
+        ("https://github.com/acme/api/", "api"),
+        ("file:///tmp/x/src/.git", "src"),
+        ("/tmp/x/src/.git/", "src"),
+        ("host:repo.git", "repo"),
+    ],
+)
+def test_clone_dest(url, dest):
+    assert api.get_clone_dest(url) == dest
+
+
+@pytest.mark.parametrize("url", ["/", "file:///.git"])
+def test_clone_dest_needs_a_name(url):
+    with pytest.raises(CloneError):
+        api.get_clone_dest(url)
+
+
+def test_clones_into_repository_name(profile, remote_repo, tmp_path):
+    [result] = api.clone(f"file://{remote_repo}/.git", profile=profile, dest_dir=str(tmp_path))
+
+    assert result.ok, result.output
+    assert result.dest == str(tmp_path / remote_repo.rsplit("/", 1)[1])
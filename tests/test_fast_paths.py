@@ -0,0 +1,92 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Checks that the commands run by scripts and editors don't load the CLI or asyncio.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SETUP = """
+from gitprof.files import Config, Profile
+
+config = Config()
+config.add_profile(Profile("work", "id_work", "Test", "test@example.com", "github", []))
+config.save()
+"""
+
+# Runs `gitprof ARGS...`, then reports which of the slow modules were imported. `exec`
+# replaces the process without running atexit handlers, so it reports before exec'ing.
+_RUN = """
+import atexit, os, sys
+
+def report():
+    slow = [m for m in ("asyncio", "click", "gitprof.process") if m in sys.modules]
+    print("SLOW:" + ",".join(slow), file=sys.stderr, flush=True)
+
+def execvp(file, args, execvp=os.execvp):
+    report()
+    execvp(file, args)
+
+atexit.register(report)
+os.execvp = execvp
+sys.argv = ["gitprof"] + sys.argv[1:]
+
+import gitprof
+gitprof.init()
+"""
+
+
+@pytest.fixture(scope="module")
+def env(tmp_path_factory):
+    home = tmp_path_factory.mktemp("home")
+    env = dict(os.environ, HOME=str(home), PYTHONPATH=REPO_ROOT)
+    subprocess.run([sys.executable, "-c", _SETUP], env=env, check=True)
+    return env
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["env", "work"],
+        ["exec", "work", sys.executable, "-c", ""],
+        ["query", "profiles"],
+        ["query", "env", "work"],
+        ["query", "resolve", "https://github.com/example/repo.git"],
+    ],
+)
+def test_fast_path_skips_slow_imports(env, args):
+    result = subprocess.run(
+        [sys.executable, "-c", _RUN, *args],
+        env=env,
+        cwd=REPO_ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "SLOW:\n" in result.stderr
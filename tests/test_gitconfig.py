@@ -0,0 +1,75 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import subprocess
+
+import pytest
+
+from gitprof import gitconfig
+
+
+@pytest.fixture
+def repo(tmp_path):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    return tmp_path
+
+
+def _git_config(repo, *args):
+    return subprocess.run(
+        ["git", "-C", str(repo), "config", *args], capture_output=True, text=True
+    )
+
+
+def test_write_values_matches_git(repo):
+    path = gitconfig.get_config_path(str(repo))
+    gitconfig.write_values(path, {"user.name": "A Name", "remote.origin.url": "x:y.git"})
+    gitconfig.write_values(path, {"user.name": "Another", "remote.origin.url": None})
+
+    assert _git_config(repo, "user.name").stdout.strip() == "Another"
+    assert _git_config(repo, "remote.origin.url").returncode == 1
+
+
+def test_write_values_locks_before_reading(repo, monkeypatch):
+    path = gitconfig.get_config_path(str(repo))
+    set_lines = gitconfig._set_lines
+    concurrent = []
+
+    def set_lines_during_git_config(lines, values):
+        # Git writes between our read and our write; it must wait for our lock.
+        concurrent.append(_git_config(repo, "user.email", "git@example.com"))
+        set_lines(lines, values)
+
+    monkeypatch.setattr(gitconfig, "_set_lines", set_lines_during_git_config)
+    gitconfig.write_values(path, {"user.name": "GitProf"})
+
+    assert concurrent[0].returncode != 0
+    assert "lock" in concurrent[0].stderr
+    assert _git_config(repo, "user.name").stdout.strip() == "GitProf"
+
+
+def test_write_values_fails_when_locked(repo):
+    path = gitconfig.get_config_path(str(repo))
+    with open(f"{path}.lock", "w"):
+        pass
+
+    with pytest.raises(gitconfig.ConfigLockedError):
+        gitconfig.write_values(path, {"user.name": "GitProf"})
+    assert _git_config(repo, "user.name").returncode == 1
@@ -0,0 +1,75 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import json
+import os
+
+from gitprof import files
+from gitprof import hook_check
+from gitprof import hooks
+from gitprof import routing
+from gitprof.files import Config, Profile
+
+RULES = {
+    "work": ["github.com/acme", "github.com/acme/team*", "*.example.com"],
+    "personal": ["github.com", "re:^file://"],
+}
+
+
+def test_snapshot_resolves_like_the_index():
+    index = routing.RuleIndex()
+    for profile, rules in RULES.items():
+        for rule in rules:
+            index.add(rule, profile)
+
+    snapshot = index.serialise()
+    for url in [
+        "git@github.com:acme/team-a/repo.git",
+        "https://github.com/acme/repo",
+        "https://github.com/someone/repo",
+        "ssh://git@git.example.com/acme/repo",
+        "file:///tmp/repo",
+        "https://gitlab.com/acme/repo",
+    ]:
+        assert hook_check.resolve(snapshot, url) == index.resolve(url), url
+
+
+def test_hook_rereads_config_edited_by_hand(home):
+    config = Config()
+    profile = Profile("work", None, "Test", "old@example.com", "github", ["github.com/acme"])
+    config.add_profile(profile)
+    config.save()
+    hooks.write_snapshot()
+
+    url, ident = "git@github.com:acme/repo.git", "Test <new@example.com> 0 +0000"
+    args = ["pre-commit", hooks.snapshot_file, ident, "", url]
+    assert hook_check.main(args) == 1
+
+    # As `gitprof config edit` would, without going through `Config.save`.
+    with open(files.config_file) as f:
+        fields = json.load(f)
+    fields["profiles"][0]["git_email"] = "new@example.com"
+    with open(files.config_file, "w") as f:
+        json.dump(fields, f)
+    stat = os.stat(files.config_file)
+    os.utime(files.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert hook_check.main(args) == 0
@@ -0,0 +1,95 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Checks that keys created in bulk get the requested passphrase, including when GitProf
+runs in a terminal, where ssh-keygen would otherwise ask the terminal for it.
+"""
+import os
+import select
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+pty = pytest.importorskip("pty")
+
+PASSPHRASE = "correct horse battery staple"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_in_terminal(args, env, timeout=30) -> str:
+    """
+    Runs a command with a pseudo-terminal as its controlling terminal, returning what it
+    printed. Nothing is ever typed into the terminal.
+    """
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.chdir(REPO_ROOT)
+        os.execvpe(args[0], args, env)
+
+    output, deadline = b"", time.monotonic() + timeout
+    try:
+        while True:
+            ready, _, _ = select.select([fd], [], [], max(deadline - time.monotonic(), 0))
+            if not ready:
+                os.kill(pid, signal.SIGKILL)
+                pytest.fail(f"Timed out waiting for {args}:\n{output.decode()}")
+            try:
+                chunk = os.read(fd, 4096)
+            except OSError:
+                break
+            if not chunk:
+                break
+            output += chunk
+    finally:
+        _, status = os.waitpid(pid, 0)
+        os.close(fd)
+
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0, output.decode()
+    return output.decode()
+
+
+def _has_passphrase(path: str, passphrase: str) -> bool:
+    result = subprocess.run(
+        ["ssh-keygen", "-y", "-P", passphrase, "-f", path],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        stdin=subprocess.DEVNULL,
+    )
+    return result.returncode == 0
+
+
+def test_batch_passphrase_in_terminal(home):
+    names = home / "names.txt"
+    names.write_text("first\nsecond\nthird\n")
+
+    env = dict(os.environ, HOME=str(home), PP=PASSPHRASE)
+    command = [sys.executable, "-m", "gitprof", "key", "create", "--batch", str(names)]
+    output = _run_in_terminal(command + ["--passphrase-env", "PP"], env)
+
+    assert "Enter passphrase" not in output
+    for name in ("first", "second", "third"):
+        key = home / ".ssh" / name
+        assert _has_passphrase(str(key), PASSPHRASE), output
+        assert not _has_passphrase(str(key), "")
@@ -0,0 +1,62 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import multiprocessing
+
+import pytest
+
+from gitprof import api
+from gitprof import metrics
+
+
+def _write_records(count):
+    for i in range(count):
+        metrics.record("clone", "work", "https://github.com/acme/repo", 0.1, 0, repo_size=i)
+
+
+@pytest.mark.skipif(metrics.fcntl is None, reason="Only processes on Unix share the lock.")
+def test_processes_rotate_the_log_once(home, monkeypatch):
+    # Every process rotates the small log often; without a shared lock, two processes
+    # which see a full log both rotate it and records are lost.
+    monkeypatch.setattr(metrics, "MAX_BYTES", 2000)
+    monkeypatch.setattr(metrics, "BACKUPS", 1000)
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write_records, args=(200,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(list(metrics.load())) == 800
+
+
+def test_repo_size_is_only_recorded_for_clones(home, profile, remote_repo):
+    [result] = api.clone(f"file://{remote_repo}", profile=profile, dest_dir=str(home / "out"))
+    assert result.ok, result.output
+    api.maintain([result.dest], force=True)
+
+    entries = {e["op"]: e for e in metrics.load()}
+    assert entries["clone"]["rs"] > 0
+    assert "rs" not in entries["maintain"]
+
+    [summary] = metrics.summarise([entries["clone"]], "h")
+    assert summary.repo_size == entries["clone"]["rs"]
@@ -0,0 +1,113 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+import os
+import select
+import signal
+import sys
+import time
+
+import pytest
+
+from gitprof import picker
+from gitprof import ux
+
+OPTIONS = [f"profile-{i}" for i in range(picker.MAX_VISIBLE + 5)]
+
+
+@pytest.fixture
+def picks(monkeypatch):
+    """
+    Replaces the terminal picker with one which chooses the given indices in turn.
+    """
+    calls, chosen = [], []
+
+    def pick(title, options, pinned=None, default=None):
+        calls.append(default)
+        return chosen.pop(0)
+
+    monkeypatch.setattr(picker, "is_supported", lambda: True)
+    monkeypatch.setattr(picker, "pick", pick)
+    return calls, chosen
+
+
+def test_picker_starts_on_default(picks):
+    calls, chosen = picks
+    chosen += [12]
+
+    result = ux.get_input_from_list("Choose", list(OPTIONS), default_index=12)
+
+    assert calls == [12]
+    assert result.value == "profile-12"
+
+
+def test_picker_asks_again_until_valid(picks, capsys):
+    calls, chosen = picks
+    chosen += [1, 2]
+
+    result = ux.get_input_from_list(
+        "Choose", list(OPTIONS), validator=lambda i: i % 2 == 0, validation_failure_msg="Odd."
+    )
+
+    assert len(calls) == 2
+    assert result.value == "profile-2"
+    assert "Odd." in capsys.readouterr().out
+
+
+def test_enter_chooses_default():
+    pty = pytest.importorskip("pty")
+    code = (
+        "from gitprof import picker; "
+        f"print('CHOSE', picker.pick('Choose', {OPTIONS!r}, default=13))"
+    )
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        os.execv(sys.executable, [sys.executable, "-c", code])
+
+    def read_until(expected: bytes = None, output=b"") -> bytes:
+        """
+        Reads the terminal until `expected` appears, or until the picker exits.
+        """
+        deadline = time.monotonic() + 10
+        while not (expected and expected in output):
+            if not select.select([fd], [], [], max(deadline - time.monotonic(), 0))[0]:
+                break
+            try:
+                chunk = os.read(fd, 4096)
+            except OSError:
+                break
+            if not chunk:
+                break
+            output += chunk
+        return output
+
+    try:
+        output = read_until(b"profile-13")
+        os.write(fd, b"\r")
+        output = read_until(output=output)
+    finally:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        os.close(fd)
+
+    assert b"> profile-13" in output
+    assert b"CHOSE 13" in output
@@ -0,0 +1,116 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Sam McCormack
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#  SOFTWARE.
+"""
+Checks the scheduler's backoff and limits with simulated job durations, on an event
+loop with a virtual clock (see `VirtualClockLoop`), so no test waits in real time.
+"""
+import asyncio
+
+import pytest
+
+from gitprof.scheduler import Scheduler
+
+HOST = "example.com"
+
+
+def _run(loop, scheduler, durations, failures=()):
+    """
+    Runs one job per duration on a single host; jobs whose index is in `failures` fail.
+    Returns when each job started, and the host's limit and whether it was resting
+    after each change.
+    """
+    starts, limits = {}, []
+
+    async def job(index):
+        starts[index] = loop.time()
+        await asyncio.sleep(durations[index])
+        return index not in failures
+
+    scheduler.on_change = lambda s: limits.append(
+        (loop.time(), s.hosts[HOST].limit, s.is_resting(HOST))
+    )
+    results = loop.run_until_complete(
+        scheduler.map(
+            job,
+            range(len(durations)),
+            key=lambda index: (HOST, None),
+            failed=lambda ok: not ok,
+        )
+    )
+
+    assert results == [i not in failures for i in range(len(durations))]
+    return [starts[i] for i in range(len(durations))], limits
+
+
+def test_rests_host_after_failures(virtual_loop):
+    scheduler = Scheduler(
+        jobs=1, per_host=1, backoff=5, max_backoff=12, clock=virtual_loop.time
+    )
+    starts, changes = _run(virtual_loop, scheduler, [1] * 5, failures={0, 1, 2})
+
+    # Rests of 5, 10 and then 12 (not 20) seconds after each failure in a row, and
+    # none after a success.
+    assert starts == [0, 6, 17, 30, 31]
+    assert [t for t, _, resting in changes if resting] == [1, 7, 18]
+    assert scheduler.hosts[HOST].failed == 3
+    assert scheduler.hosts[HOST].failures_in_a_row == 0
+
+
+def test_halves_limit_on_failure_and_recovers(virtual_loop):
+    scheduler = Scheduler(jobs=4, per_host=4, backoff=3, clock=virtual_loop.time)
+    # Job 0 fails after 1s, while jobs 1-3 are still running until 2s.
+    starts, limits = _run(virtual_loop, scheduler, [1, 2, 2, 2] + [1] * 8, failures={0})
+
+    assert (1, 2, True) in limits
+    assert min(limit for _, limit, _ in limits) == 2
+    # No job starts while the host rests, even after the others finish at 2s.
+    assert starts[4:8] == [4, 4, 4, 4]
+    assert scheduler.hosts[HOST].limit == 4
+
+
+def test_slow_job_lowers_limit(virtual_loop):
+    scheduler = Scheduler(jobs=4, per_host=4, slow_factor=4, clock=virtual_loop.time)
+    # The first four jobs set a 1s average; job 7 then takes 10 times as long.
+    durations = [1] * 7 + [10] + [1] * 4
+    _, limits = _run(virtual_loop, scheduler, durations)
+
+    assert min(limit for _, limit, _ in limits) == 3
+    assert [t for t, limit, _ in limits if limit == 3] == [pytest.approx(11)]
+    assert scheduler.hosts[HOST].failed == 0
+
+
+
+def test_takes_turns_between_hosts_then_groups(virtual_loop):
+    # One host has four groups (e.g. profiles), the other only one.
+    items = [("many", g, i) for g in range(4) for i in range(2)]
+    items += [("one", 0, i) for i in range(4)]
+    order = []
+
+    async def job(item):
+        order.append(item[:2])
+        await asyncio.sleep(1)
+
+    scheduler = Scheduler(jobs=1, per_host=1, clock=virtual_loop.time)
+    virtual_loop.run_until_complete(scheduler.map(job, items, key=lambda item: item[:2]))
+
+    assert [host for host, _ in order[:8]] == ["many", "one"] * 4
+    assert [group for host, group in order if host == "many"][:4] == [0, 1, 2, 3]